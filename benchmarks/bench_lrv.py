@@ -0,0 +1,45 @@
+import numpy as np
+from lrv_test import LRV
+from lrv_test.coherence import default_freqs
+from lrv_test.constants import compute_f_against_D
+from lrv_test.functions import support_MP, t
+from lrv_test.lag_window import lag_window
+from lrv_test.LRV import _compute_r_n
+from lrv_test.lss import compute_LSSs
+from lrv_test.sigma import compute_sigma
+from lrv_test.utils import action_D_on_f, action_D_on_f_gauss_jacobi
+
+# a plain function, so that the constants go through the numerical integrations
+f = lambda x: (x - 1) ** 2
+tolerance = 1e-6
+
+
+def bench_compute_LSSs(measure, setting, y):
+    measure(compute_LSSs, y, setting.B, f)
+
+
+def bench_lag_window(measure, setting, y):
+    freqs = default_freqs(setting.N, setting.B)
+    measure(lambda: _compute_r_n(lag_window(y, setting.L), freqs))
+
+
+def bench_compute_sigma(measure, setting):
+    measure(compute_sigma, f, setting.M / setting.B, tolerance)
+
+
+def bench_action_D_on_f(measure, setting):
+    c = setting.M / setting.B
+    measure(action_D_on_f, f, lambda z: t(z, c), support_MP(c), tolerance)
+
+
+def bench_action_D_on_f_gauss_jacobi(measure, setting):
+    c = setting.M / setting.B
+    measure(action_D_on_f_gauss_jacobi, f, lambda z: t(z, c), support_MP(c), tolerance)
+
+
+def bench_f_against_D(measure, setting):
+    measure(compute_f_against_D, f, setting.M / setting.B, tolerance)
+
+
+def bench_LRV(measure, setting, y):
+    measure(LRV, y, setting.B, f, L=setting.L)
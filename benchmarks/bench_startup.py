@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+"""
+Import time and resident memory of `import lrv_test` in a fresh interpreter, as in
+the short-lived workers of a process pool.
+"""
+
+HEAVY_MODULES = ("jax", "mlx", "spectral_coherence", "pydantic", "scipy")
+
+SCRIPT = f"""
+import resource, sys
+import lrv_test
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+# ru_maxrss is in bytes on macOS, and in kilobytes on Linux
+print(rss if sys.platform == "darwin" else rss * 1024)
+print(",".join(name for name in {HEAVY_MODULES!r} if name in sys.modules))
+"""
+
+
+def _environment() -> dict:
+    return {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+
+
+# the benchmarks are grouped by setting (see pytest.ini), the import has its own group
+@pytest.mark.parametrize("setting", ["import"])
+def bench_import(benchmark, setting):
+    environment = _environment()
+    run = lambda: subprocess.run(
+        [sys.executable, "-c", SCRIPT],
+        env=environment,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    process = benchmark.pedantic(run, rounds=5)
+
+    rss, heavy_modules = process.stdout.splitlines()
+    benchmark.extra_info["peak_memory"] = int(rss)
+    benchmark.extra_info["heavy_modules"] = heavy_modules
@@ -0,0 +1,48 @@
+"""
+Comparison report of two runs of the benchmarks, for instance on two commits:
+
+    git checkout A && pytest benchmarks --benchmark-json=A.json
+    git checkout B && pytest benchmarks --benchmark-json=B.json
+    python benchmarks/compare.py A.json B.json
+
+A ratio above 1 means that B is slower, or uses more memory, than A.
+"""
+
+import argparse
+import json
+
+
+def _load(path: str) -> dict[str, dict]:
+    with open(path) as file:
+        benchmarks = json.load(file)["benchmarks"]
+    return {benchmark["fullname"]: benchmark for benchmark in benchmarks}
+
+
+def compare(path_a: str, path_b: str) -> str:
+    a, b = _load(path_a), _load(path_b)
+    header = f"{'benchmark':<70} {'time A':>10} {'time B':>10} {'ratio':>6}"
+    header += f" {'mem A':>9} {'mem B':>9} {'ratio':>6}"
+    lines = [header]
+    for name in sorted(a.keys() & b.keys()):
+        time_a, time_b = a[name]["stats"]["mean"], b[name]["stats"]["mean"]
+        memory_a = a[name]["extra_info"].get("peak_memory", 0) / 2**20
+        memory_b = b[name]["extra_info"].get("peak_memory", 0) / 2**20
+        memory_ratio = memory_b / memory_a if memory_a else float("nan")
+        lines.append(
+            f"{name:<70} {time_a * 1e3:>8.2f}ms {time_b * 1e3:>8.2f}ms "
+            f"{time_b / time_a:>6.2f} {memory_a:>7.1f}MB {memory_b:>7.1f}MB "
+            f"{memory_ratio:>6.2f}"
+        )
+    for name in sorted(a.keys() ^ b.keys()):
+        lines.append(f"{name:<70} only in {'A' if name in a else 'B'}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("a", help="benchmark json of the reference run")
+    parser.add_argument("b", help="benchmark json of the compared run")
+    arguments = parser.parse_args()
+    print(compare(arguments.a, arguments.b))
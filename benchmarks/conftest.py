@@ -0,0 +1,61 @@
+import os
+import tracemalloc
+from typing import Callable, NamedTuple
+
+import numpy as np
+import pytest
+
+"""
+Settings of the benchmarks, in the regime of the notebooks: B = N^0.66, c = M / B
+close to 1/2 and L = N^0.25. LRV_BENCH_SIZE=large runs the larger, opt-in sizes.
+"""
+
+SIZES = {"small": (500, 1000), "large": (1000, 2000, 4000, 8000)}
+
+
+class Setting(NamedTuple):
+    N: int
+    M: int
+    B: int
+    L: int
+
+    def __str__(self) -> str:
+        return f"N={self.N}-M={self.M}-B={self.B}-L={self.L}"
+
+
+def setting_from_N(N: int) -> Setting:
+    B = int(N**0.66) // 2 * 2 + 1
+    return Setting(N, B // 2, B, round(N**0.25))
+
+
+def pytest_generate_tests(metafunc):
+    # the settings of the sizes, unless the benchmark sets its own
+    is_parametrized = metafunc.definition.get_closest_marker("parametrize")
+    if "setting" in metafunc.fixturenames and is_parametrized is None:
+        size = os.environ.get("LRV_BENCH_SIZE", "small")
+        settings = [setting_from_N(N) for N in SIZES[size]]
+        metafunc.parametrize("setting", settings, ids=str)
+
+
+@pytest.fixture
+def y(setting: Setting) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    shape = (setting.N, setting.M)
+    return rng.standard_normal(shape) + 1j * rng.standard_normal(shape)
+
+
+@pytest.fixture
+def measure(benchmark) -> Callable:
+    """
+    Record the peak memory allocated by one call of the function, then time it.
+    """
+
+    def run(function: Callable, *args, **kwargs):
+        tracemalloc.start()
+        function(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        benchmark.extra_info["peak_memory"] = peak
+        return benchmark(function, *args, **kwargs)
+
+    return run
@@ -1,16 +1,30 @@
-from typing import Optional
+import dataclasses
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+from math import gamma
+from typing import Hashable, Optional, Union
 
 import numpy as np
-from scipy.special import gamma
 
-from lrv_test.contour import Contour
-from lrv_test.functions import support_MP, t
-from lrv_test.lag_window import lag_window
-from lrv_test.lss import compute_LSSs
+from lrv_test.constants import compute_f_against_D, compute_f_against_mp
+from lrv_test.instrument import count, count_nbytes, profiling, stage
+from lrv_test.lag_window import LagWindowEstimator, lag_window
+from lrv_test.lss import (
+    _stacked_half_coherences,
+    coherence_eigenvalues,
+    coherence_LSSs,
+)
+from lrv_test.out_of_core import LRV_out_of_core, is_out_of_core
+from lrv_test.parallel import check_n_jobs, parallel_LSSs
 from lrv_test.result import LRVResult
 from lrv_test.sigma import compute_sigma
-from lrv_test.types import f64_2d, real_function
-from lrv_test.utils import action_D_on_f, contour_integral, derivative, psi
+from lrv_test.trace import STATISTIC_TOLERANCE
+from lrv_test.types import Backend, EigenMethod, Precision, f64_2d, real_function
+
+# maximum number of r_n of true spectral densities kept in memory
+R_N_CACHE_SIZE = 32
+
+_r_n_cache: OrderedDict[tuple, tuple[real_function, np.ndarray]] = OrderedDict()
 
 
 def _v_n(B: int, N: int) -> float:
@@ -26,6 +40,71 @@ def _r_n(sd: real_function, sd_prime: real_function) -> real_function:
     return lambda freq: np.mean(values(freq)) ** 2
 
 
+def _r_n_values(sd_values: np.ndarray, sd_prime_values: np.ndarray) -> np.ndarray:
+    """
+    Vectorized version of _r_n, the inputs are of shape (n_freqs, n_features)
+    """
+    return np.mean(sd_prime_values / sd_values, axis=-1) ** 2
+
+
+def _evaluate_on_grid(sd: real_function, nus: np.ndarray) -> np.ndarray:
+    """
+    Values of sd on the frequencies nus, of shape (n_nus, n_features). sd is called
+    once on the whole array if it supports it, and on each frequency otherwise.
+    """
+    first = np.atleast_1d(sd(nus[0]))
+    try:
+        values = np.asarray(sd(nus))
+    except (TypeError, ValueError):
+        values = None
+
+    if values is not None and values.shape == (len(nus), first.size):
+        return values
+    if values is not None and first.size == 1 and values.shape == (len(nus),):
+        return values[:, np.newaxis]
+    return np.stack([np.atleast_1d(sd(nu)) for nu in nus])
+
+
+def _compute_r_n(sd: real_function, freqs: np.ndarray) -> np.ndarray:
+    """
+    r_n at each frequency, from the (estimated or true) spectral densities.
+
+    A true spectral density (such as the one of an ARMA model) is evaluated on the
+    frequencies and on the finite difference points of its derivative in a single
+    grid, and the result is memoized (up to R_N_CACHE_SIZE entries) for this sd and
+    these frequencies, as it does not depend on the data.
+    """
+    freqs = np.asarray(freqs, dtype=float)
+    if isinstance(sd, LagWindowEstimator):
+        # the lag window estimator and its analytic derivative are evaluated on all
+        # the frequencies at once, with the cached exponentials of (L, freqs)
+        return _r_n_values(*sd.evaluate(freqs))
+
+    # the entries keep a reference to sd, so that its id is not reused
+    key = (id(sd), freqs.shape, freqs.tobytes())
+    if key in _r_n_cache and _r_n_cache[key][0] is sd:
+        _r_n_cache.move_to_end(key)
+        return _r_n_cache[key][1]
+
+    # sd is evaluated once, and twice by the finite difference derivative (with the
+    # same step as utils.derivative)
+    epsilon = 1e-6
+    count("sd_evaluations", 3 * len(freqs))
+    values, upper, lower = np.split(
+        _evaluate_on_grid(
+            sd, np.concatenate([freqs, freqs + epsilon, freqs - epsilon])
+        ),
+        3,
+    )
+    r_n = _r_n_values(values, (upper - lower) / (2 * epsilon))
+    r_n.flags.writeable = False
+
+    _r_n_cache[key] = (sd, r_n)
+    if len(_r_n_cache) > R_N_CACHE_SIZE:
+        _r_n_cache.popitem(last=False)
+    return r_n
+
+
 def LRV(
     y: f64_2d,
     B: int,
@@ -37,11 +116,91 @@ def LRV(
     f_against_D: Optional[float] = None,
     sigma: Optional[float] = None,
     tolerance: float = 1e-6,
+    backend: Optional[Backend] = None,
+    method: EigenMethod = "svd",
+    n_samples: Optional[int] = None,
+    profile: bool = False,
+    precision: Precision = "double",
+    n_jobs: int = 1,
+    trace_tolerance: float = STATISTIC_TOLERANCE,
 ) -> LRVResult:
     """
     Compute the LRV statistics on the time series y. The LRVResult object also
     contains additional details about the statistics computation.
+
+    With profile=True, the wall time, number of calls and counters of each stage
+    are recorded in the timings of the result (see lrv_test.instrument).
+
+    y is usually an in-memory array of shape (N, M) (NumPy, or any array library).
+    A np.memmap or a chunked array (Zarr, HDF5 dataset...) is read by blocks, and an
+    iterable of row blocks (with its total number of rows n_samples) in a single
+    streaming pass, by LRV_out_of_core instead.
+
+    The eigenvalues of the coherency matrices are computed in a single batched call,
+    with the linear algebra backend given by `backend` ("numpy", "jax" or "mlx", read
+    from the LRV_TEST_BACKEND environment variable when None, see lrv_test.backends).
+    Use method="gram" to compute them from the gram matrix instead of the svd, which
+    is faster when min(M, B) is small, or method="trace" to compute the LSSs from
+    traces of matrix products without the eigenvalues, which is faster when M is
+    large (exact for a PolynomialTestFunction, stochastic otherwise when
+    min(M, B) is large enough to pay off, see lrv_test.trace). The stochastic
+    estimates target a standard error trace_tolerance on each statistic t_stats_0,
+    that is trace_tolerance * sigma / M on each LSS, and the LSSs that miss it are
+    computed from the exact eigenvalues.
+
+    With precision="single", the half coherency matrices, their eigenvalues and the
+    autocovariances of an in-memory y are computed in float32 / complex64, which
+    halves the memory traffic. The thetas and the statistics are still computed in
+    double precision, from the single precision LSSs.
+
+    With n_jobs > 1 (or -1 for all the cpus), the LSSs of an in-memory y are computed
+    on a thread pool by chunks of frequencies, with the same results (see
+    lrv_test.parallel).
     """
+    check_n_jobs(n_jobs)
+    if profile:
+        with profiling() as profiler:
+            result = LRV(
+                y,
+                B,
+                f,
+                freqs,
+                L,
+                sd,
+                f_against_mp,
+                f_against_D,
+                sigma,
+                tolerance,
+                backend,
+                method,
+                n_samples,
+                precision=precision,
+                n_jobs=n_jobs,
+                trace_tolerance=trace_tolerance,
+            )
+        return dataclasses.replace(result, timings=profiler.timings)
+
+    if is_out_of_core(y):
+        if n_jobs != 1:
+            raise ValueError("n_jobs is not supported when y is read by blocks")
+        return LRV_out_of_core(
+            y,
+            B,
+            f,
+            freqs,
+            L,
+            sd,
+            f_against_mp,
+            f_against_D,
+            sigma,
+            tolerance,
+            backend,
+            method,
+            n_samples,
+            precision=precision,
+            trace_tolerance=trace_tolerance,
+        )
+
     # either L or the true spectral density will be used to compute the r_n(nu).
     # If none is provided, the correction term proportional to r_n(nu) will be skipped.
     if L is None and sd is None:
@@ -49,74 +208,181 @@ def LRV(
     else:
         skip_correction = False
 
+    y = np.asarray(y)
     N, M = y.shape
+    c = M / B
+
+    # compute the limit variance of each thetas if not provided, which sets the
+    # error target of the stochastic LSSs
+    if sigma is None:
+        with stage("sigma"):
+            sigma = compute_sigma(f, c, tolerance)
 
     # Compute the LSSs associated with each coherency matrix
-    LSSs, freqs = compute_LSSs(y, B, f, freqs)
+    LSSs, freqs = parallel_LSSs(
+        y,
+        B,
+        f,
+        freqs,
+        backend,
+        method,
+        precision,
+        n_jobs=n_jobs,
+        trace_tolerance=trace_tolerance * sigma / M,
+    )
 
     # compute corrective terms (MP acting and f, and D acting on f)
-    c = M / B
     if f_against_mp is None:
-        f_against_mp = action_D_on_f(f, lambda z: t(z, c), support_MP(c), tolerance)
+        with stage("f_against_mp"):
+            f_against_mp = compute_f_against_mp(f, c, tolerance)
     if f_against_D is None:
-        support = (-np.sqrt(c), np.sqrt(c))
-        radius = (support[1] - support[0]) / 2
-        center = (support[0] + support[1]) / 2
-        contour = Contour.from_circle_parameters(center, radius)
-        f_against_D = contour_integral(
-            lambda w: -c / (2 * np.pi * 1j) * f(psi(w, c)) / (w**3), contour
-        )
-        assert np.imag(f_against_D) < tolerance
-        f_against_D = np.real(f_against_D)
+        with stage("f_against_D"):
+            f_against_D = compute_f_against_D(f, c, tolerance)
 
     # Estimate the spectral densities of the time series if not provided.
     if skip_correction:
         r_n = 0
     else:
         if sd is None:
-            sd = lag_window(y, L)
-        sd_prime = derivative(sd)
-        r_n_function = _r_n(sd, sd_prime)
-        r_n = np.array([r_n_function(freq) for freq in freqs])
+            with stage("lag_window"):
+                sd = lag_window(y, L, precision)
+                count_nbytes(sd.autocors)
+        with stage("r_n"):
+            r_n = _compute_r_n(sd, freqs)
+
+    with stage("statistics"):
+        return _lrv_result(N, M, B, freqs, LSSs, r_n, f_against_mp, f_against_D, sigma)
+
+
+def LRV_multi(
+    y: f64_2d,
+    B: int,
+    fs: Union[Sequence[real_function], Mapping[Hashable, real_function]],
+    freqs: Optional[np.ndarray] = None,
+    L: Optional[int] = None,
+    sd: Optional[real_function] = None,
+    tolerance: float = 1e-6,
+    backend: Optional[Backend] = None,
+    method: EigenMethod = "svd",
+    precision: Precision = "double",
+    trace_tolerance: float = STATISTIC_TOLERANCE,
+) -> Union[list[LRVResult], dict[Hashable, LRVResult]]:
+    """
+    Compute the LRV statistics on the time series y for several test functions, given
+    as a list or a dict. The coherency eigenvalues and the r_n correction do not
+    depend on the test function, so they are computed once for all of them.
+
+    Returns one LRVResult per test function, in a list or a dict matching fs.
+    """
+    # import here, plan depends on this module
+    from lrv_test.plan import prepare
+
+    N, M = y.shape
+    hC_hats, freqs = _stacked_half_coherences(y, B, freqs, backend, precision)
+    if method != "trace":
+        λ = coherence_eigenvalues(hC_hats, backend, method)
+
+    if L is None and sd is None:
+        r_n = 0
+    else:
+        if sd is None:
+            sd = lag_window(y, L, precision)
+        r_n = _compute_r_n(sd, freqs)
+
+    def result(f: real_function) -> LRVResult:
+        plan = prepare(f, M, B, tolerance)
+        if method == "trace":
+            LSSs = coherence_LSSs(
+                hC_hats, f, backend, method, trace_tolerance * plan.sigma / M
+            )
+        else:
+            LSSs = np.mean(f(λ), axis=-1)
+        return _lrv_result(
+            N,
+            M,
+            B,
+            freqs,
+            LSSs,
+            r_n,
+            plan.f_against_mp,
+            plan.f_against_D,
+            plan.sigma,
+        )
+
+    if isinstance(fs, Mapping):
+        return {key: result(f) for key, f in fs.items()}
+    return [result(f) for f in fs]
+
+
+def _gumbel_normalization(n_freqs: int) -> tuple[float, float]:
+    """
+    a_n and b_n such that a_n * (max(t_stats_0 ** 2) - b_n) is asymptotically Gumbel
+    """
+    a_n = 1 / 2
+    b_n = 2 * (np.log(n_freqs) - 0.5 * np.log(np.log(n_freqs)) - np.log(gamma(1 / 2)))
+    return a_n, b_n
+
 
+def _statistics(
+    N: int,
+    M: int,
+    B: int,
+    LSSs: np.ndarray,
+    r_n: np.ndarray,
+    f_against_mp: float,
+    f_against_D: float,
+    sigma: float,
+) -> dict[str, np.ndarray]:
+    """
+    Compute the LRV statistics from the LSSs and the constants of the test. The
+    frequencies are on the last axis of LSSs and r_n, the other axes are batch axes.
+    """
+    c = M / B
     v_n = _v_n(B, N)
 
-    # compute thetas (are asymptoticaly gaussian under H0)
+    # compute thetas (are asymptoticaly gaussian under H0), in double precision
+    # whatever the precision of the LSSs and the type of the constants
+    LSSs = np.asarray(LSSs, dtype=np.float64)
     corrections = f_against_D * (r_n * v_n - 1 / (c * B))
     thetas = LSSs - f_against_mp - corrections
 
-    # compute the limit variance of each thetas if not provided
-    if sigma is None:
-        sigma = compute_sigma(f, c, tolerance)
-
     # compute the LRV test statistics
-    n_freqs = len(thetas)
+    n_freqs = thetas.shape[-1]
     # t_stats_0, 1 and 2 are  N(0,1) asymptotically
     t_stats_0 = M * thetas / sigma
-    t_stat_1 = (1 / np.sqrt(n_freqs)) * np.sum(t_stats_0)
+    t_stat_1 = (1 / np.sqrt(n_freqs)) * np.sum(t_stats_0, axis=-1)
     t_stat_2 = (
         (1 / np.sqrt(n_freqs))
-        * (np.sum((M * thetas) ** 2 - sigma**2))
+        * (np.sum((M * thetas) ** 2 - sigma**2, axis=-1))
         / (np.sqrt(2) * sigma**2)
     )
-    t_stat_3 = np.sum(t_stats_0**2)  # is χ²(n_freqs) asymptotically
-    a_n = 1 / 2
-    b_n = 2 * (np.log(n_freqs) - 0.5 * np.log(np.log(n_freqs)) - np.log(gamma(1 / 2)))
-    t_stat_4 = a_n * (np.max(t_stats_0**2) - b_n)  # is conjectured Gumbel distribution
+    t_stat_3 = np.sum(t_stats_0**2, axis=-1)  # is χ²(n_freqs) asymptotically
+    a_n, b_n = _gumbel_normalization(n_freqs)
+    # is conjectured Gumbel distribution
+    t_stat_4 = a_n * (np.max(t_stats_0**2, axis=-1) - b_n)
 
-    return LRVResult(
-        N,
-        M,
-        B,
-        freqs,
-        LSSs,
-        v_n,
-        thetas,
-        f_against_mp,
-        corrections,
-        t_stats_0,
-        t_stat_1,
-        t_stat_2,
-        t_stat_3,
-        t_stat_4,
-    )
+    return {
+        "v_n": v_n,
+        "thetas": thetas,
+        "corrections": corrections,
+        "t_stats_0": t_stats_0,
+        "t_stat_1": t_stat_1,
+        "t_stat_2": t_stat_2,
+        "t_stat_3": t_stat_3,
+        "t_stat_4": t_stat_4,
+    }
+
+
+def _lrv_result(
+    N: int,
+    M: int,
+    B: int,
+    freqs: np.ndarray,
+    LSSs: np.ndarray,
+    r_n: np.ndarray,
+    f_against_mp: float,
+    f_against_D: float,
+    sigma: float,
+) -> LRVResult:
+    statistics = _statistics(N, M, B, LSSs, r_n, f_against_mp, f_against_D, sigma)
+    return LRVResult(N, M, B, freqs, LSSs, f_mp=f_against_mp, **statistics)
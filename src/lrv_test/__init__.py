@@ -1,2 +1,6 @@
-from lrv_test.LRV import LRV
+from lrv_test.batch import LRVResultBatch
+from lrv_test.LRV import LRV, LRV_multi
+from lrv_test.panel import LRV_panel
+from lrv_test.plan import LRVPlan, prepare
+from lrv_test.polynomial import PolynomialTestFunction
 from lrv_test.result import LRVResult
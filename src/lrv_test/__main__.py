@@ -0,0 +1,3 @@
+from lrv_test.cli import main
+
+main()
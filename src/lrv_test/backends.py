@@ -0,0 +1,47 @@
+import importlib
+import os
+from types import ModuleType
+from typing import Optional, get_args
+
+from lrv_test.types import Backend
+
+"""
+Selection and lazy loading of the linear algebra backends.
+
+Only NumPy is required: JAX and MLX are imported on the first computation that uses
+them, so that `import lrv_test` stays fast in short-lived processes. The backend only
+computes the eigenvalues, the half coherency matrices are always computed with NumPy.
+When a function is called with backend=None, the backend is read from the
+LRV_TEST_BACKEND environment variable, and defaults to "numpy".
+"""
+
+BACKEND_VARIABLE = "LRV_TEST_BACKEND"
+BACKENDS = get_args(Backend)
+
+
+def resolve_backend(backend: Optional[Backend] = None) -> Backend:
+    if backend is None:
+        backend = os.environ.get(BACKEND_VARIABLE, "numpy")
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend}, expected one of {BACKENDS}")
+    return backend
+
+
+def _import(module: str, backend: Backend) -> ModuleType:
+    try:
+        return importlib.import_module(module)
+    except ImportError as error:
+        raise ImportError(
+            f"The {backend} backend requires {module.split('.')[0]}, install it or "
+            'use backend="numpy"'
+        ) from error
+
+
+def jax() -> ModuleType:
+    # importing jax.numpy also makes the jax module available as its parent
+    _import("jax.numpy", "jax")
+    return _import("jax", "jax")
+
+
+def mlx() -> ModuleType:
+    return _import("mlx.core", "mlx")
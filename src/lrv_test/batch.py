@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+import numpy as np
+
+from lrv_test.result import Alternative, LRVResult, is_positive, p_value
+
+# columns with one value per result
+SCALAR_COLUMNS = {
+    "N": np.int64,
+    "M": np.int64,
+    "B": np.int64,
+    "v_n": np.float64,
+    "f_mp": np.float64,
+    "t_stat_1": np.float64,
+    "t_stat_2": np.float64,
+    "t_stat_3": np.float64,
+    "t_stat_4": np.float64,
+}
+# columns with one value per result and per frequency, stored as 2-D blocks
+FREQUENCY_COLUMNS = ["freqs", "LSSs", "thetas", "corrections", "t_stats_0"]
+
+
+class LRVResultBatch:
+    """
+    Columnar storage of many LRVResult sharing the same number of frequencies. The
+    scalar fields are stored in contiguous 1-D columns, and the per frequency fields
+    in 2-D blocks of shape (n_results, n_freqs).
+
+    The columns are available as attributes (e.g. batch.t_stat_3), as views on the
+    underlying buffers, and the is_positive_* and p_value_* methods are vectorized
+    over the results.
+    """
+
+    def __init__(self, n_freqs: int, capacity: int = 16):
+        self._width = n_freqs
+        self._size = 0
+        self._columns = {
+            name: np.empty(capacity, dtype) for name, dtype in SCALAR_COLUMNS.items()
+        }
+        self._columns.update(
+            {name: np.empty((capacity, n_freqs)) for name in FREQUENCY_COLUMNS}
+        )
+
+    @classmethod
+    def from_results(cls, results: Iterable[LRVResult]) -> LRVResultBatch:
+        results = list(results)
+        if len(results) == 0:
+            raise ValueError("At least one result is needed to infer the shape")
+        batch = cls(len(results[0].freqs), capacity=len(results))
+        batch.extend(results)
+        return batch
+
+    @classmethod
+    def from_columns(cls, columns: dict[str, np.ndarray]) -> LRVResultBatch:
+        """
+        Build a batch from arrays of the columns, without copying them when they
+        already have the right dtype.
+        """
+        size, width = np.shape(columns["freqs"])
+        batch = cls(width, capacity=0)
+        for name, dtype in SCALAR_COLUMNS.items():
+            batch._columns[name] = np.asanyarray(columns[name], dtype)
+        for name in FREQUENCY_COLUMNS:
+            values = np.asanyarray(columns[name], np.float64)
+            if values.shape != (size, width):
+                # e.g. scalar corrections, when r_n is skipped
+                values = np.broadcast_to(values, (size, width))
+            batch._columns[name] = values
+        batch._size = size
+        return batch
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getattr__(self, name: str) -> np.ndarray:
+        if not name.startswith("_") and name in self._columns:
+            return self._columns[name][: self._size]
+        raise AttributeError(name)
+
+    @property
+    def n_freqs(self) -> np.ndarray:
+        return np.full(self._size, self._width)
+
+    @property
+    def _capacity(self) -> int:
+        return len(self._columns["N"])
+
+    def _reserve(self, capacity: int) -> None:
+        if capacity <= self._capacity:
+            return
+
+        # grow geometrically, so that appending is amortized O(1)
+        capacity = max(capacity, 2 * self._capacity)
+        for name, column in self._columns.items():
+            new_column = np.empty((capacity, *column.shape[1:]), column.dtype)
+            new_column[: self._size] = column[: self._size]
+            self._columns[name] = new_column
+
+    def append(self, result: LRVResult) -> None:
+        if len(result.freqs) != self._width:
+            raise ValueError(
+                f"Expected {self._width} frequencies, got {len(result.freqs)}"
+            )
+
+        self._reserve(self._size + 1)
+        for name, column in self._columns.items():
+            column[self._size] = getattr(result, name)
+        self._size += 1
+
+    def extend(self, results: Iterable[LRVResult]) -> None:
+        for result in results:
+            self.append(result)
+
+    def __getitem__(self, index: int) -> LRVResult:
+        if not -self._size <= index < self._size:
+            raise IndexError(index)
+        values = {
+            name: column[index % self._size] for name, column in self._columns.items()
+        }
+        return LRVResult(**values)
+
+    def to_numpy(self) -> dict[str, np.ndarray]:
+        """Views on the columns, without copy"""
+        return {name: getattr(self, name) for name in self._columns}
+
+    def to_arrow(self):
+        """
+        pyarrow Table of the results, without copy for the numeric columns. The per
+        frequency columns are fixed size lists.
+        """
+        import pyarrow as pa
+
+        arrays = {name: pa.array(getattr(self, name)) for name in SCALAR_COLUMNS}
+        for name in FREQUENCY_COLUMNS:
+            values = np.ascontiguousarray(getattr(self, name)).reshape(-1)
+            arrays[name] = pa.FixedSizeListArray.from_arrays(values, self._width)
+        return pa.table(arrays)
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Save the columns as .npy files in the directory path"""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for name in self._columns:
+            np.save(path / f"{name}.npy", getattr(self, name))
+        with open(path / "batch.json", "w") as handle:
+            json.dump({"n_results": self._size, "n_freqs": self._width}, handle)
+
+    @classmethod
+    def load(
+        cls, path: Union[str, Path], mmap_mode: Optional[str] = "r"
+    ) -> LRVResultBatch:
+        """Load a saved batch, memory mapped from the disk by default"""
+        path = Path(path)
+        columns = {
+            name: np.load(path / f"{name}.npy", mmap_mode=mmap_mode)
+            for name in [*SCALAR_COLUMNS, *FREQUENCY_COLUMNS]
+        }
+        return cls.from_columns(columns)
+
+    def is_positive_0(
+        self, level: float, alternative: Alternative = "double"
+    ) -> np.ndarray:
+        return is_positive(self.t_stats_0, "normal", alternative, level)
+
+    def is_positive_1(
+        self, level: float, alternative: Alternative = "double"
+    ) -> np.ndarray:
+        return is_positive(self.t_stat_1, "normal", alternative, level)
+
+    def is_positive_2(
+        self, level: float, alternative: Alternative = "double"
+    ) -> np.ndarray:
+        return is_positive(self.t_stat_2, "normal", alternative, level)
+
+    def is_positive_3(
+        self, level: float, alternative: Alternative = "right"
+    ) -> np.ndarray:
+        return is_positive(self.t_stat_3, "chi2", alternative, level, df=self._width)
+
+    def is_positive_4(
+        self, level: float, alternative: Alternative = "right"
+    ) -> np.ndarray:
+        return is_positive(self.t_stat_4, "gumbel", alternative, level)
+
+    def p_value_1(self, alternative: Alternative = "double") -> np.ndarray:
+        return p_value(self.t_stat_1, "normal", alternative)
+
+    def p_value_2(self, alternative: Alternative = "double") -> np.ndarray:
+        return p_value(self.t_stat_2, "normal", alternative)
+
+    def p_value_3(self, alternative: Alternative = "right") -> np.ndarray:
+        return p_value(self.t_stat_3, "chi2", alternative, df=self._width)
+
+    def p_value_4(self, alternative: Alternative = "right") -> np.ndarray:
+        return p_value(self.t_stat_4, "gumbel", alternative)
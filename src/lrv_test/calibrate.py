@@ -0,0 +1,264 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Optional, Union
+
+import numpy as np
+
+from lrv_test.coherence import (
+    default_freqs,
+    dft,
+    fourier_indices,
+    half_coherences_from_dft,
+)
+from lrv_test.lag_window import lag_window
+from lrv_test.LRV import _compute_r_n, _lrv_result, _statistics
+from lrv_test.lss import coherence_LSSs
+from lrv_test.plan import prepare
+from lrv_test.result import TESTS, Alternative, LRVResult
+from lrv_test.types import Backend, EigenMethod, f64_1d, f64_2d, real_function
+
+"""
+Empirical calibration of the LRV statistics by phase randomization.
+
+The surrogate datasets multiply the DFT values of each component of y by independent
+random phases. They keep the periodograms, hence the marginal spectral densities, of
+y and make its components independent, as under H0. Only the DFT values at the
+Fourier frequencies used by the coherency matrices are randomized, so a surrogate
+costs one evaluation of the coherency matrices and their eigenvalues, without any
+FFT. The constants of the test and r_n, which only depends on the marginal spectral
+densities, are shared by all the surrogates.
+"""
+
+# default memory budget of a chunk of surrogates, in bytes
+CHUNK_BYTES = 2**28
+
+# state of the worker processes, set once by _init_worker
+_worker: dict = {}
+
+
+@dataclass(frozen=True)
+class Calibration:
+    """
+    Statistics t_stat_1..4 of the observed data and of the surrogate datasets, from
+    which the empirical critical values and p-values are computed. The alternatives
+    default to the ones of the asymptotic tests.
+    """
+
+    observed: LRVResult
+    t_stats: np.ndarray  # shape (n_resamples, 4), t_stat_1..4 of the surrogates
+
+    @property
+    def n_resamples(self) -> int:
+        return len(self.t_stats)
+
+    def _surrogates(self, statistic: int) -> np.ndarray:
+        return self.t_stats[:, statistic - 1]
+
+    def critical_values(
+        self, statistic: int, level: float, alternative: Optional[Alternative] = None
+    ) -> tuple[float, float]:
+        """
+        Lower and upper bounds of the empirical acceptance region. The test is
+        positive if the statistic is strictly below the lower or above the upper
+        bound.
+        """
+        alternative = alternative or TESTS[statistic][1]
+        surrogates = self._surrogates(statistic)
+        if alternative == "left":
+            return np.quantile(surrogates, level), np.inf
+        elif alternative == "right":
+            return -np.inf, np.quantile(surrogates, 1 - level)
+        elif alternative == "double":
+            return tuple(np.quantile(surrogates, [level / 2, 1 - level / 2]))
+        raise ValueError(f"Unknown alternative: {alternative}")
+
+    def p_value(
+        self, statistic: int, alternative: Optional[Alternative] = None
+    ) -> float:
+        """
+        Empirical p-value, counting the observed statistic as one of the resamples
+        so that it is never 0.
+        """
+        alternative = alternative or TESTS[statistic][1]
+        surrogates = self._surrogates(statistic)
+        observed = getattr(self.observed, f"t_stat_{statistic}")
+        p_right = (1 + np.sum(surrogates >= observed)) / (1 + len(surrogates))
+        p_left = (1 + np.sum(surrogates <= observed)) / (1 + len(surrogates))
+        if alternative == "left":
+            return p_left
+        elif alternative == "right":
+            return p_right
+        elif alternative == "double":
+            return min(1, 2 * min(p_left, p_right))
+        raise ValueError(f"Unknown alternative: {alternative}")
+
+    def is_positive(
+        self, statistic: int, level: float, alternative: Optional[Alternative] = None
+    ) -> bool:
+        lower, upper = self.critical_values(statistic, level, alternative)
+        observed = getattr(self.observed, f"t_stat_{statistic}")
+        return bool(observed < lower or observed > upper)
+
+
+@dataclass(frozen=True)
+class PhaseLayout:
+    """
+    For the Fourier indices used by the coherency matrices, the index of their
+    random phase among n_phases, its sign, and whether it is the phase of a real DFT
+    value (None for a complex series).
+    """
+
+    phase_indices: np.ndarray
+    signs: np.ndarray
+    is_self_conjugate: Optional[np.ndarray]
+    n_phases: int
+
+
+def _phase_layout(indices: np.ndarray, N: int, is_real: bool) -> PhaseLayout:
+    """
+    The DFT of a real series is Hermitian, so k and N - k share their phase with
+    opposite signs, and the values at 0 and N / 2 stay real.
+    """
+    if not is_real:
+        unique, inverse = np.unique(indices, return_inverse=True)
+        return PhaseLayout(
+            inverse.reshape(indices.shape), np.ones(indices.shape), None, len(unique)
+        )
+
+    canonical = np.minimum(indices, N - indices) % N
+    unique, inverse = np.unique(canonical, return_inverse=True)
+    signs = np.where(indices > N / 2, -1.0, 1.0)
+    is_self_conjugate = (unique == 0) | (2 * unique == N)
+    return PhaseLayout(
+        inverse.reshape(indices.shape), signs, is_self_conjugate, len(unique)
+    )
+
+
+def _random_phases(rng: np.random.Generator, M: int, layout: PhaseLayout) -> np.ndarray:
+    """Random phases of the surrogate, of shape (n_freqs, B, M)"""
+    theta = rng.uniform(0, 2 * np.pi, size=(layout.n_phases, M))
+    if layout.is_self_conjugate is not None:
+        # the real DFT values are only flipped
+        theta[layout.is_self_conjugate] = np.pi * (
+            theta[layout.is_self_conjugate] < np.pi
+        )
+    return layout.signs[..., np.newaxis] * theta[layout.phase_indices]
+
+
+@dataclass(frozen=True)
+class _Surrogates:
+    """Everything needed to compute the statistics of the surrogates"""
+
+    xi: np.ndarray  # DFT values of y, of shape (n_freqs, B, M)
+    N: int
+    f: real_function
+    r_n: Union[float, np.ndarray]
+    constants: tuple[float, float, float]
+    backend: Optional[Backend]
+    method: EigenMethod
+    layout: PhaseLayout
+
+    def t_stats(self, start: int, stop: int, seed: int) -> np.ndarray:
+        """
+        t_stat_1..4 of the surrogates start to stop - 1, of shape (stop - start, 4)
+        """
+        n_freqs, B, M = self.xi.shape
+
+        # each surrogate draws its phases from its own SeedSequence, so the results
+        # do not depend on the chunking
+        xi = np.empty((stop - start, n_freqs, B, M), dtype=complex)
+        for i, resample in enumerate(range(start, stop)):
+            seed_sequence = np.random.SeedSequence(seed, spawn_key=(resample,))
+            phases = _random_phases(
+                np.random.default_rng(seed_sequence), M, self.layout
+            )
+            xi[i] = self.xi * np.exp(1j * phases)
+
+        hC_hats = half_coherences_from_dft(xi)
+        LSSs = coherence_LSSs(hC_hats, self.f, self.backend, self.method)
+        statistics = _statistics(self.N, M, B, LSSs, self.r_n, *self.constants)
+        return np.stack([statistics[f"t_stat_{i}"] for i in range(1, 5)], axis=-1)
+
+
+def _init_worker(surrogates: _Surrogates) -> None:
+    _worker["surrogates"] = surrogates
+
+
+def _run_chunk(start: int, stop: int, seed: int) -> np.ndarray:
+    return _worker["surrogates"].t_stats(start, stop, seed)
+
+
+def _chunk_size(xi: np.ndarray, memory_budget: int) -> int:
+    """
+    Number of surrogates per chunk such that their randomized DFT values and half
+    coherency matrices, two complex values per DFT value, fit in memory_budget bytes
+    """
+    surrogate_bytes = 2 * xi.size * np.dtype(complex).itemsize
+    return max(1, memory_budget // surrogate_bytes)
+
+
+def calibrate(
+    y: f64_2d,
+    B: int,
+    f: real_function,
+    n_resamples: int = 1000,
+    freqs: Optional[f64_1d] = None,
+    L: Optional[int] = None,
+    sd: Optional[real_function] = None,
+    seed: int = 0,
+    n_jobs: int = 1,
+    chunk_size: Optional[int] = None,
+    tolerance: float = 1e-6,
+    backend: Optional[Backend] = None,
+    method: EigenMethod = "svd",
+) -> Calibration:
+    """
+    Compute the LRV statistics of y and of n_resamples phase randomized surrogates
+    of y, from which finite sample critical values and p-values are derived.
+
+    The surrogates are computed by chunks of chunk_size, in batched operations, on
+    n_jobs processes. Each surrogate holds two copies of the n_freqs * B * M DFT
+    values, about 32 * N * M bytes on the default frequencies, so chunk_size
+    defaults to the number of surrogates that fit in CHUNK_BYTES. f must be
+    picklable when n_jobs > 1 and the processes are not forked.
+    """
+    N, M = y.shape
+    freqs = default_freqs(N, B) if freqs is None else np.asarray(freqs)
+    plan = prepare(f, M, B, tolerance)
+    constants = (plan.f_against_mp, plan.f_against_D, plan.sigma)
+
+    indices = fourier_indices(freqs, B, N)
+    xi = dft(y)[indices]
+
+    if sd is None and L is not None:
+        sd = lag_window(y, L)
+    r_n = 0 if sd is None else _compute_r_n(sd, freqs)
+
+    LSSs = coherence_LSSs(half_coherences_from_dft(xi), f, backend, method)
+    observed = _lrv_result(N, M, B, freqs, LSSs, r_n, *constants)
+
+    surrogates = _Surrogates(
+        xi,
+        N,
+        f,
+        r_n,
+        constants,
+        backend,
+        method,
+        _phase_layout(indices, N, np.isrealobj(y)),
+    )
+    if chunk_size is None:
+        chunk_size = _chunk_size(xi, CHUNK_BYTES)
+    chunks = [
+        (start, min(start + chunk_size, n_resamples), seed)
+        for start in range(0, n_resamples, chunk_size)
+    ]
+    if n_jobs == 1:
+        t_stats = [surrogates.t_stats(*chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(
+            n_jobs, initializer=_init_worker, initargs=(surrogates,)
+        ) as executor:
+            t_stats = list(executor.map(_run_chunk, *zip(*chunks)))
+
+    return Calibration(observed, np.concatenate(t_stats))
@@ -0,0 +1,261 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+
+from lrv_test.batch import LRVResultBatch
+from lrv_test.config.run import RunConfig, check_expression
+from lrv_test.LRV import LRV
+from lrv_test.plan import prepare
+from lrv_test.polynomial import PolynomialTestFunction
+from lrv_test.storage import check_config
+from lrv_test.types import f64_2d, real_function
+
+"""
+Command line batch runner of the LRV test, `python -m lrv_test CONFIG INPUT...`.
+
+Each input is a time series of shape (N, M) in a .npy file (memory mapped), a .npz
+file or a Parquet file (one column per component). The settings of the test are read
+from a JSON file validated by RunConfig. The constants of the test are computed once
+for each M in the main process and shared with the worker processes, which write the
+results of each input to a Parquet file of the results directory, which forms a
+single table with one row per input (e.g. pyarrow.parquet.read_table). Each completed
+input is then appended to the manifest, so that a rerun skips the inputs whose file
+has not changed since.
+"""
+
+MANIFEST = "manifest.jsonl"
+RESULTS = "results"
+
+# state of the worker processes, set once by _init_worker
+_worker: dict = {}
+
+
+def build_test_function(config: RunConfig) -> real_function:
+    if isinstance(config.f, str):
+        # checked again, in case the config was built without validation
+        check_expression(config.f)
+        return eval(f"lambda x: {config.f}", {"__builtins__": {}, "np": np})
+    return PolynomialTestFunction(tuple(config.f))
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as error:
+        raise ImportError("pyarrow is required to read and write Parquet") from error
+    return pyarrow
+
+
+def load_input(path: Path, config: RunConfig) -> f64_2d:
+    if path.suffix == ".npy":
+        # the pages are read on access, without copy
+        return np.asarray(np.load(path, mmap_mode="r"))
+    elif path.suffix == ".npz":
+        with np.load(path) as arrays:
+            return arrays[config.array or arrays.files[0]]
+    elif path.suffix == ".parquet":
+        table = _pyarrow().parquet.read_table(
+            path, columns=config.columns, memory_map=True
+        )
+        return np.column_stack([column.to_numpy() for column in table.columns])
+    raise ValueError(f"Unsupported input: {path}, expected .npy, .npz or .parquet")
+
+
+def _n_features(path: Path, config: RunConfig) -> int:
+    """M from the header or the schema of the input, without reading the data"""
+    if path.suffix == ".npy":
+        return np.load(path, mmap_mode="r").shape[1]
+    elif path.suffix == ".npz":
+        with np.load(path) as arrays:
+            name = config.array or arrays.files[0]
+            with arrays.zip.open(f"{name}.npy") as handle:
+                version = np.lib.format.read_magic(handle)
+                if version == (1, 0):
+                    shape = np.lib.format.read_array_header_1_0(handle)[0]
+                else:
+                    shape = np.lib.format.read_array_header_2_0(handle)[0]
+        return shape[1]
+    elif path.suffix == ".parquet":
+        schema = _pyarrow().parquet.read_schema(path)
+        return len(config.columns or schema.names)
+    raise ValueError(f"Unsupported input: {path}, expected .npy, .npz or .parquet")
+
+
+def _part_path(output_dir: Path, path: Path) -> Path:
+    digest = hashlib.sha256(str(path).encode()).hexdigest()[:16]
+    return output_dir / RESULTS / f"{path.stem}-{digest}.parquet"
+
+
+def _file_state(path: Path) -> dict:
+    stat = path.stat()
+    return {"input": str(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _load_manifest(output_dir: Path) -> dict[str, dict]:
+    manifest_path = output_dir / MANIFEST
+    if not manifest_path.exists():
+        return {}
+    with open(manifest_path) as handle:
+        entries = [json.loads(line) for line in handle if line.strip()]
+    # the last entry of an input wins, when it was rerun after a change
+    return {entry["input"]: entry for entry in entries}
+
+
+def _init_worker(
+    config: RunConfig, constants: dict[int, tuple[float, float, float]]
+) -> None:
+    _worker.update(config=config, f=build_test_function(config), constants=constants)
+
+
+def _run_file(path: Path, part_path: Path) -> int:
+    """Run the test on the input path, write it to part_path and return n_freqs"""
+    pa = _pyarrow()
+    config = _worker["config"]
+    y = load_input(path, config)
+    f_against_mp, f_against_D, sigma = _worker["constants"][y.shape[1]]
+
+    result = LRV(
+        y,
+        config.B,
+        _worker["f"],
+        freqs=None if config.freqs is None else np.array(config.freqs),
+        L=config.L,
+        f_against_mp=f_against_mp,
+        f_against_D=f_against_D,
+        sigma=sigma,
+        backend=config.backend,
+        method=config.method,
+        precision=config.precision,
+    )
+
+    table = LRVResultBatch.from_results([result]).to_arrow()
+    # variable size lists, as the number of frequencies differs between inputs
+    table = table.cast(
+        pa.schema(
+            [
+                (
+                    field.with_type(pa.list_(field.type.value_type))
+                    if pa.types.is_fixed_size_list(field.type)
+                    else field
+                )
+                for field in table.schema
+            ]
+        )
+    )
+    table = table.append_column("input", pa.array([str(path)]))
+    for i in range(1, 5):
+        p_value = getattr(result, f"p_value_{i}")()
+        table = table.append_column(f"p_value_{i}", pa.array([float(p_value)]))
+
+    # write then rename, so that an interrupted write never leaves a partial file
+    tmp_path = part_path.with_suffix(".tmp")
+    pa.parquet.write_table(table, tmp_path)
+    os.replace(tmp_path, part_path)
+    return len(result.freqs)
+
+
+def run(
+    config: RunConfig,
+    inputs: Sequence[Path],
+    output_dir: Path,
+    n_jobs: int = 1,
+    cache_dir: Optional[Path] = None,
+) -> dict[str, float]:
+    """
+    Run the test on each input not completed by a previous run, and return the
+    throughput of the run.
+    """
+    start_time = time.perf_counter()
+    (output_dir / RESULTS).mkdir(parents=True, exist_ok=True)
+    check_config(output_dir, config.model_dump())
+
+    manifest = _load_manifest(output_dir)
+    tasks = []
+    for path in (Path(path).resolve() for path in inputs):
+        state = _file_state(path)
+        entry = manifest.get(str(path))
+        if entry is None or any(entry[key] != value for key, value in state.items()):
+            tasks.append((path, state))
+
+    # the constants only depend on M, they are computed once for all the inputs
+    f = build_test_function(config)
+    spec = config.f if isinstance(config.f, str) else None
+    constants = {}
+    for path, _ in tasks:
+        M = _n_features(path, config)
+        if M not in constants:
+            plan = prepare(f, M, config.B, config.tolerance, spec, cache_dir)
+            constants[M] = (plan.f_against_mp, plan.f_against_D, plan.sigma)
+
+    n_freqs = 0
+    with open(output_dir / MANIFEST, "a") as manifest_file:
+
+        def complete(path: Path, state: dict, part_path: Path, n: int) -> None:
+            nonlocal n_freqs
+            n_freqs += n
+            entry = {**state, "output": part_path.name, "n_freqs": n}
+            manifest_file.write(json.dumps(entry) + "\n")
+            manifest_file.flush()
+
+        initargs = (config, constants)
+        if n_jobs == 1:
+            _init_worker(*initargs)
+            for path, state in tasks:
+                part_path = _part_path(output_dir, path)
+                complete(path, state, part_path, _run_file(path, part_path))
+        else:
+            with ProcessPoolExecutor(
+                n_jobs, initializer=_init_worker, initargs=initargs
+            ) as pool:
+                # bound the number of inputs in flight to keep the memory flat
+                pending = {}
+                for path, state in tasks:
+                    part_path = _part_path(output_dir, path)
+                    future = pool.submit(_run_file, path, part_path)
+                    pending[future] = (path, state, part_path)
+                    if len(pending) >= 2 * n_jobs:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            complete(*pending.pop(future), future.result())
+                for future in list(pending):
+                    complete(*pending.pop(future), future.result())
+
+    elapsed = time.perf_counter() - start_time
+    return {
+        "n_files": len(tasks),
+        "n_skipped": len(inputs) - len(tasks),
+        "n_freqs": n_freqs,
+        "elapsed": elapsed,
+        "files_per_second": len(tasks) / elapsed,
+        "freqs_per_second": n_freqs / elapsed,
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="lrv-test", description="Run the LRV test on time series files"
+    )
+    parser.add_argument("config", type=Path, help="JSON file of the RunConfig")
+    parser.add_argument("inputs", type=Path, nargs="+", help=".npy, .npz or .parquet")
+    parser.add_argument("-o", "--output", type=Path, required=True)
+    parser.add_argument("-j", "--n-jobs", type=int, default=1)
+    parser.add_argument(
+        "--cache-dir", type=Path, help="on-disk cache of the constants of the test"
+    )
+    args = parser.parse_args(argv)
+
+    config = RunConfig.model_validate_json(args.config.read_text())
+    stats = run(config, args.inputs, args.output, args.n_jobs, args.cache_dir)
+    print(
+        f"{stats['n_files']} files ({stats['n_skipped']} skipped) in "
+        f"{stats['elapsed']:.2f}s: {stats['files_per_second']:.2f} files/s, "
+        f"{stats['freqs_per_second']:.1f} frequencies/s"
+    )
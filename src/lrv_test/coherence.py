@@ -0,0 +1,92 @@
+from typing import Optional
+
+import numpy as np
+
+from lrv_test.types import Precision, complex_2d, f64_1d, f64_2d
+
+"""
+NumPy computation of the half coherency matrices from the discrete Fourier transform
+(DFT) of the time series.
+
+At frequency nu, with xi(nu) = sum_n y_n exp(-2i pi n nu) / sqrt(N) and the B
+Fourier frequencies k / N closest to nu, the half coherency matrix is
+    hC(nu) = diag(S(nu))^(-1/2) [xi(nu + b / N)]_b / sqrt(B)
+where S(nu) is the frequency smoothed periodogram. Its squared singular values are
+the eigenvalues of the estimated coherency matrix.
+
+With precision="single", the time series is cast to float32 (or complex64) and the
+DFT and the half coherency matrices stay in single precision.
+"""
+
+# real and complex dtypes of each precision
+DTYPES = {"single": (np.float32, np.complex64), "double": (np.float64, np.complex128)}
+
+
+def as_precision(y: np.ndarray, precision: Precision) -> np.ndarray:
+    """y as an array of the real or complex dtype of the precision"""
+    real_dtype, complex_dtype = DTYPES[precision]
+    return np.asarray(y, dtype=complex_dtype if np.iscomplexobj(y) else real_dtype)
+
+
+def default_freqs(N: int, B: int) -> f64_1d:
+    """
+    Frequencies -1/2 + k B / N spaced by B Fourier frequencies on [-1/2, 1/2), as
+    in spectral_coherence
+    """
+    return np.arange(0, N, B) / N - 0.5
+
+
+def fourier_indices(freqs: f64_1d, B: int, N: int) -> np.ndarray:
+    """
+    Indices k of the B Fourier frequencies k / N around each frequency, of shape
+    (n_freqs, B)
+    """
+    half_B = (B - 1) // 2
+    centers = np.rint(np.asarray(freqs) * N).astype(int)
+    return (centers[:, np.newaxis] + np.arange(-half_B, B - half_B)) % N
+
+
+def dft(y: f64_2d) -> complex_2d:
+    """
+    Normalized DFT of the time series along the time axis, which is the second to
+    last one: y can be a single (N, M) series or a stack (..., N, M).
+    """
+    # divide by a Python float, which keeps the precision of the FFT
+    return np.fft.fft(y, axis=-2) / float(np.sqrt(y.shape[-2]))
+
+
+def half_coherences_from_dft(xi: np.ndarray) -> np.ndarray:
+    """
+    Half coherency matrices from the DFT values around each frequency.
+
+    Parameters
+    ----------
+    xi : np.ndarray
+        DFT values at the B Fourier frequencies around each frequency, of shape
+        (..., B, M)
+
+    Returns
+    -------
+    hC_hats : np.ndarray
+        Half coherency matrices, of shape (..., M, B)
+    """
+    xi = np.swapaxes(xi, -1, -2)
+    B = xi.shape[-1]
+    periodogram = np.mean(np.abs(xi) ** 2, axis=-1, keepdims=True)
+    return xi / np.sqrt(B * periodogram)
+
+
+def half_coherences(
+    y: f64_2d, B: int, freqs: Optional[f64_1d] = None, precision: Precision = "double"
+) -> tuple[np.ndarray, f64_1d]:
+    """
+    Half coherency matrices of y (of shape (N, M), or (..., N, M) for a stack of
+    time series) at each frequency, of shape (..., n_freqs, M, B), in the given
+    precision.
+    """
+    N = y.shape[-2]
+    if freqs is None:
+        freqs = default_freqs(N, B)
+
+    xi = dft(as_precision(y, precision))[..., fourier_indices(freqs, B, N), :]
+    return half_coherences_from_dft(xi), freqs
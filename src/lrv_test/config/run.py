@@ -0,0 +1,93 @@
+import ast
+from typing import Literal, Optional, Union
+
+import numpy as np
+from pydantic import BaseModel, PositiveFloat, PositiveInt, field_validator
+
+# nodes of the arithmetic of an expression, besides names, attributes, calls and
+# constants which are checked individually
+_ARITHMETIC_NODES = (
+    ast.Expression,
+    ast.BinOp,
+    ast.UnaryOp,
+    ast.Add,
+    ast.Sub,
+    ast.Mult,
+    ast.Div,
+    ast.Pow,
+    ast.UAdd,
+    ast.USub,
+    ast.Load,
+)
+
+
+def check_expression(expression: str) -> None:
+    """
+    Raise a ValueError unless the expression only combines x, numbers, the NumPy
+    ufuncs and constants (np.log1p, np.pi...) with arithmetic operators.
+    """
+    try:
+        tree = ast.parse(expression, mode="eval")
+    except SyntaxError as error:
+        raise ValueError(f"Invalid expression of x: {expression}") from error
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name):
+            is_allowed = node.id in ("x", "np")
+        elif isinstance(node, ast.Attribute):
+            is_allowed = (
+                isinstance(node.value, ast.Name)
+                and node.value.id == "np"
+                and isinstance(getattr(np, node.attr, None), (np.ufunc, float))
+            )
+        elif isinstance(node, ast.Call):
+            is_allowed = isinstance(node.func, ast.Attribute) and not node.keywords
+        elif isinstance(node, ast.Constant):
+            is_allowed = type(node.value) in (int, float)
+        else:
+            is_allowed = isinstance(node, _ARITHMETIC_NODES)
+        if not is_allowed:
+            raise ValueError(
+                f"The expression of x may only use numbers, arithmetic operators and "
+                f"NumPy ufuncs, got {ast.unparse(node)!r} in {expression!r}"
+            )
+
+
+class RunConfig(BaseModel):
+    """
+    Settings of the LRV test run by the command line on each input file.
+
+    The test function f is either an expression in x (e.g. "(x - 1) ** 2"), limited
+    to numbers, arithmetic operators and the NumPy ufuncs and constants as np.*
+    (see check_expression), or the coefficients of a polynomial, lowest degree
+    first, whose constants are computed in closed form.
+    """
+
+    B: PositiveInt
+    f: Union[str, list[float]]
+    L: Optional[PositiveInt] = None  # None to skip the r_n correction
+    freqs: Optional[list[float]] = None  # default_freqs(N, B) when None
+    tolerance: PositiveFloat = 1e-6
+    backend: Optional[Literal["numpy", "jax", "mlx"]] = None
+    method: Literal["svd", "gram", "trace"] = "svd"
+    precision: Literal["single", "double"] = "double"
+    # array of a .npz file (the first one when None), columns of a Parquet file (all
+    # of them when None)
+    array: Optional[str] = None
+    columns: Optional[list[str]] = None
+
+    @field_validator("f")
+    @classmethod
+    def check_f(cls, v):
+        if isinstance(v, str):
+            check_expression(v)
+        elif len(v) == 0:
+            raise ValueError("A polynomial needs at least one coefficient")
+        return v
+
+    @field_validator("freqs")
+    @classmethod
+    def check_freqs(cls, v):
+        if v is not None and not all(0 <= freq < 1 for freq in v):
+            raise ValueError("The frequencies must be in [0, 1)")
+        return v
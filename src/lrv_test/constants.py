@@ -0,0 +1,44 @@
+import numpy as np
+
+from lrv_test.contour import Contour
+from lrv_test.functions import support_MP, t
+from lrv_test.polynomial import PolynomialTestFunction
+from lrv_test.types import real_function
+from lrv_test.utils import (
+    action_D_on_f_gauss_jacobi,
+    contour_integral_trapezoidal,
+    psi,
+)
+
+"""
+The corrective terms of the LRV statistics only depend on the test function f and
+on the ratio c = M / B, not on the data. They are computed here.
+"""
+
+
+def compute_f_against_mp(f: real_function, c: float, tolerance: float) -> float:
+    """
+    Integral of f against the Marchenko-Pastur distribution of parameter c.
+    """
+    if isinstance(f, PolynomialTestFunction):
+        return f.against_mp(c)
+
+    return action_D_on_f_gauss_jacobi(f, lambda z: t(z, c), support_MP(c), tolerance)
+
+
+def compute_f_against_D(f: real_function, c: float, tolerance: float) -> float:
+    """
+    Action of the distribution D on f, used in the bias correction of the LSSs.
+    """
+    if isinstance(f, PolynomialTestFunction):
+        return f.against_D(c)
+
+    support = (-np.sqrt(c), np.sqrt(c))
+    radius = (support[1] - support[0]) / 2
+    center = (support[0] + support[1]) / 2
+    contour = Contour.from_circle_parameters(center, radius)
+    f_against_D = contour_integral_trapezoidal(
+        lambda w: -c / (2 * np.pi * 1j) * f(psi(w, c)) / (w**3), contour
+    )
+    assert np.imag(f_against_D) < tolerance
+    return np.real(f_against_D)
@@ -1,11 +1,13 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Callable
+from typing import TYPE_CHECKING, Callable
 
 import numpy as np
 
-from lrv_test.config.contour import ContourConfig
+if TYPE_CHECKING:
+    # pydantic is slow to import, and only needed to build the configuration
+    from lrv_test.config.contour import ContourConfig
 
 
 @dataclass(frozen=True)
@@ -1,3 +1,5 @@
+from typing import Union
+
 import numpy as np
 
 """ 
@@ -13,11 +15,13 @@ def support_MP(c: float) -> tuple[float, float]:
     return (low, high)
 
 
-def t(z: complex, c: float) -> complex:
+def t(z: Union[complex, np.ndarray], c: float) -> Union[complex, np.ndarray]:
     """
-    Stieltjes transform of the Marchenko-Pastur distribution
+    Stieltjes transform of the Marchenko-Pastur distribution, evaluated elementwise
+    on z
     """
     # Compute the discriminant for the square root term
+    z = np.asarray(z, dtype=complex)
     discriminant = (z - 1 - c) ** 2 - 4 * c
 
     # Compute the two solutions of the square root
@@ -28,13 +32,14 @@ def t(z: complex, c: float) -> complex:
     G1 = -((1 - c) - z + sqrt_discriminant_1) / (2 * c * z)
     G2 = -((1 - c) - z + sqrt_discriminant_2) / (2 * c * z)
 
-    # Return the solution with positive imaginary part
-    return G1 if np.imag(G1) > 0 else G2
+    # Return the solution with positive imaginary part, [()] returns a scalar for a
+    # scalar z
+    return np.where(np.imag(G1) > 0, G1, G2)[()]
 
 
-def t_tilde(z: complex, c: float) -> complex:
+def t_tilde(z: Union[complex, np.ndarray], c: float) -> Union[complex, np.ndarray]:
     return -1 / (z * (1 + c * t(z, c)))
 
 
-def z_t_t_tilde(z: complex, c: float) -> complex:
+def z_t_t_tilde(z: Union[complex, np.ndarray], c: float) -> Union[complex, np.ndarray]:
     return z * t(z, c) * t_tilde(z, c)
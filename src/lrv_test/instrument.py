@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, ContextManager, Iterator, Optional
+
+import numpy as np
+
+"""
+Opt-in instrumentation of the stages of the LRV test.
+
+The stages are delimited with `stage(name)`, and `count(name, n)` increments a
+counter of the innermost open stage (integrand evaluations, contour integrals, bytes
+of the allocated arrays...). Nothing is recorded outside of a `profiling()` context:
+`stage` then returns a shared no-op context manager and `count` returns at once.
+
+Each closed stage is aggregated by name in the Profiler, and passed as a Span to the
+callbacks of the profiling context and of the enclosing ones, for instance to log
+it, or to forward it to a tracing library.
+
+A Profiler can be shared by threads that run in a copy of the profiling context
+(contextvars.copy_context().run), as lrv_test.parallel does: each thread has its own
+stack of open stages, and the wall times of their spans add up in the timings.
+"""
+
+logger = logging.getLogger("lrv_test")
+
+
+@dataclass(frozen=True)
+class Span:
+    name: str
+    start: float  # time.perf_counter() at the start of the stage
+    duration: float  # wall time, in seconds
+    counters: dict[str, int]
+
+
+@dataclass
+class StageTiming:
+    wall_time: float = 0.0
+    calls: int = 0
+    counters: Counter = field(default_factory=Counter)
+
+
+SpanCallback = Callable[[Span], None]
+
+
+class Profiler:
+    """
+    Aggregates the spans by stage name in `timings`, and passes them to the
+    callbacks and to the parent profiler. The spans of several threads are
+    serialized by a lock.
+    """
+
+    def __init__(
+        self,
+        callbacks: tuple[SpanCallback, ...] = (),
+        parent: Optional[Profiler] = None,
+    ):
+        self.callbacks = callbacks
+        self.parent = parent
+        self.timings: dict[str, StageTiming] = {}
+        self._lock = threading.Lock()
+        # stack of the counters of the open stages, of each thread
+        self._local = threading.local()
+
+    @property
+    def _open_counters(self) -> list[Counter]:
+        if not hasattr(self._local, "open_counters"):
+            self._local.open_counters = []
+        return self._local.open_counters
+
+    def on_span(self, span: Span) -> None:
+        with self._lock:
+            timing = self.timings.setdefault(span.name, StageTiming())
+            timing.wall_time += span.duration
+            timing.calls += 1
+            timing.counters.update(span.counters)
+            for callback in self.callbacks:
+                callback(span)
+        if self.parent is not None:
+            self.parent.on_span(span)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        counters = Counter()
+        self._open_counters.append(counters)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            self._open_counters.pop()
+            self.on_span(Span(name, start, duration, dict(counters)))
+
+    def count(self, name: str, n: int = 1) -> None:
+        if self._open_counters:
+            self._open_counters[-1][name] += n
+
+
+_profiler: ContextVar[Optional[Profiler]] = ContextVar("profiler", default=None)
+_NULL_STAGE = nullcontext()
+
+
+@contextmanager
+def profiling(*callbacks: SpanCallback) -> Iterator[Profiler]:
+    """
+    Record the stages run in this context (in the current thread, and in the threads
+    running a copy of it), and pass each span to the callbacks. The spans are also
+    passed to the enclosing profilers.
+    """
+    profiler = Profiler(callbacks, parent=_profiler.get())
+    token = _profiler.set(profiler)
+    try:
+        yield profiler
+    finally:
+        _profiler.reset(token)
+
+
+def is_profiling() -> bool:
+    return _profiler.get() is not None
+
+
+def stage(name: str) -> ContextManager:
+    profiler = _profiler.get()
+    if profiler is None:
+        return _NULL_STAGE
+    return profiler.stage(name)
+
+
+def count(name: str, n: int = 1) -> None:
+    profiler = _profiler.get()
+    if profiler is not None:
+        profiler.count(name, n)
+
+
+def counted(function: Callable, name: str = "integrand_evaluations") -> Callable:
+    """
+    function, counting its calls when profiling. Wrap it right before use, so that
+    it is left as is when not profiling.
+    """
+    profiler = _profiler.get()
+    if profiler is None:
+        return function
+
+    def wrapper(*args, **kwargs):
+        profiler.count(name)
+        return function(*args, **kwargs)
+
+    return wrapper
+
+
+def count_nbytes(*arrays: np.ndarray) -> None:
+    """Count the bytes of arrays allocated by the current stage"""
+    profiler = _profiler.get()
+    if profiler is not None:
+        profiler.count("nbytes", sum(np.asarray(array).nbytes for array in arrays))
+
+
+def log_span(span: Span) -> None:
+    """Callback logging the spans on the lrv_test logger, at the debug level"""
+    counters = ", ".join(f"{name}={value}" for name, value in span.counters.items())
+    logger.debug("%s: %.6fs %s", span.name, span.duration, counters)
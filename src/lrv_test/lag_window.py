@@ -1,51 +1,138 @@
-from typing import Callable
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Union
 
 import numpy as np
 
+from lrv_test.coherence import as_precision
+from lrv_test.types import Precision
+
+# maximum number of (L, freqs) grids of exponentials kept in memory
+GRID_CACHE_SIZE = 32
+
+_grids: OrderedDict[tuple, np.ndarray] = OrderedDict()
+
 
 def _compute_autocors(x: np.array, L: int) -> np.array:
     """
-    Compute the autocorrelation of a time series x up to lag L
+    Compute the autocorrelation of a time series x up to lag L, using the FFT
 
     Parameters
     ----------
-    x : mx.array
-        Time series of shape (n_samples, n_features)
+    x : np.array
+        Time series of shape (n_samples, n_features), or (..., n_samples,
+        n_features) for a stack of time series
     L : int
         Maximum lag
 
     Returns
     -------
-    autocors : mx.array
-        Autocorrelation of shape (2L+1, n_features)
+    autocors : np.array
+        Autocorrelation of shape (..., 2L+1, n_features)
     """
-    # compute the autocorrelation of the time series (positive, 0 and negative lags)
-    # shape of x is L x n_features
-    r_l_positive_hats = np.stack(
-        [np.mean(x[l:, :] * np.conj(x[:-l, :]), axis=0) for l in range(1, L + 1)]
-    )
-    r_l_negative_hats = np.conj(r_l_positive_hats[::-1, :])
-    r_l_0_hats = np.mean(np.abs(x) ** 2, axis=0)
+    # imported here, as scipy.fft is slow to import
+    from scipy.fft import next_fast_len
+
+    n_samples = x.shape[-2]
+
+    # zero padding to at least n_samples + L avoids the circular wrap around up to
+    # lag L. The inverse FFT of the periodogram gives sum_n x[n + l] * conj(x[n])
+    n_fft = next_fast_len(n_samples + L)
+    x_fft = np.fft.fft(x, n=n_fft, axis=-2)
+    sums = np.fft.ifft(np.abs(x_fft) ** 2, axis=-2)[..., : L + 1, :]
+
+    # average over the n_samples - l available products, in the precision of x
+    n_products = n_samples - np.arange(L + 1, dtype=sums.real.dtype)
+    r_l_hats = sums / n_products[:, np.newaxis]
+    return _symmetrize_autocors(r_l_hats)
+
+
+def _symmetrize_autocors(r_l_hats: np.array) -> np.array:
+    """
+    Autocorrelations at lags -L..L, of shape (..., 2L+1, n_features), from the ones
+    at lags 0..L
+    """
+    r_l_positive_hats = r_l_hats[..., 1:, :]
+    r_l_negative_hats = np.conj(r_l_positive_hats[..., ::-1, :])
+    r_l_0_hats = np.real(r_l_hats[..., :1, :])
 
     # shape will be (2L+1) x n_features
     r_l_hats = np.concatenate(
-        [r_l_negative_hats, r_l_0_hats[np.newaxis, :], r_l_positive_hats]
+        [r_l_negative_hats, r_l_0_hats, r_l_positive_hats], axis=-2
     )
     return r_l_hats
 
 
-def lag_window(X: np.array, L: int) -> Callable[[float], np.array]:
+def _fourier_grid(L: int, freqs: np.ndarray) -> np.ndarray:
     """
-    Compute the lag window estimator of the spectral density of a time series X.
+    exp(-2i pi l nu) and its derivative with respect to nu, for l = -L..L and nu in
+    freqs, stacked in an array of shape (2, n_freqs, 2L+1). The grids only depend
+    on L and freqs, so they are cached and shared by all the estimators.
     """
-    n_samples, n_features = X.shape
+    key = (L, freqs.shape, freqs.tobytes())
+    if key in _grids:
+        _grids.move_to_end(key)
+        return _grids[key]
 
-    # compute the autocorrelation of the time series
-    r_l_hats = _compute_autocors(X, L)
-
-    # compute the exponential term
     L_range = np.arange(-L, L + 1)
-    exp_sequence = lambda nu: np.exp(-2j * np.pi * L_range * nu)
-    exp_term = lambda nu: np.tile(exp_sequence(nu)[:, np.newaxis], (1, n_features))
+    exp_term = np.exp(-2j * np.pi * np.multiply.outer(freqs, L_range))
+    grid = np.stack([exp_term, exp_term * (-2j * np.pi * L_range)])
+    grid.flags.writeable = False
+
+    _grids[key] = grid
+    if len(_grids) > GRID_CACHE_SIZE:
+        _grids.popitem(last=False)
+    return grid
+
 
-    return lambda nu: np.real(np.sum(r_l_hats * exp_term(nu), axis=0))
+@dataclass(frozen=True)
+class LagWindowEstimator:
+    """
+    Lag window estimator of the spectral densities of the components of a time
+    series. It can be evaluated on a single frequency, which gives an array of shape
+    (n_features,), or on an array of frequencies at once, which gives an array of
+    shape (n_freqs, n_features). For a stack of time series, the stack axes come
+    first.
+    """
+
+    autocors: np.ndarray  # shape (..., 2L+1, n_features)
+
+    @property
+    def L(self) -> int:
+        return (self.autocors.shape[-2] - 1) // 2
+
+    @property
+    def _L_range(self) -> np.ndarray:
+        return np.arange(-self.L, self.L + 1)
+
+    def _exp_term(self, nu: Union[float, np.ndarray]) -> np.ndarray:
+        # shape (..., 2L+1)
+        return np.exp(-2j * np.pi * np.multiply.outer(nu, self._L_range))
+
+    def __call__(self, nu: Union[float, np.ndarray]) -> np.ndarray:
+        return np.real(self._exp_term(nu) @ self.autocors)
+
+    def derivative(self, nu: Union[float, np.ndarray]) -> np.ndarray:
+        """Analytic derivative of the spectral densities with respect to nu"""
+        derivative_term = self._exp_term(nu) * (-2j * np.pi * self._L_range)
+        return np.real(derivative_term @ self.autocors)
+
+    def evaluate(self, freqs: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Spectral densities and their derivatives on a grid of frequencies, each of
+        shape (..., n_freqs, n_features), from the cached grid of exponentials.
+        """
+        grid = _fourier_grid(self.L, np.asarray(freqs, dtype=float))
+        autocors = self.autocors[..., np.newaxis, :, :]
+        values, derivatives = np.moveaxis(np.real(grid @ autocors), -3, 0)
+        return values, derivatives
+
+
+def lag_window(
+    X: np.array, L: int, precision: Precision = "double"
+) -> LagWindowEstimator:
+    """
+    Compute the lag window estimator of the spectral density of a time series X,
+    with the autocovariances in the given precision.
+    """
+    return LagWindowEstimator(_compute_autocors(as_precision(X, precision), L))
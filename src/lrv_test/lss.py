@@ -1,28 +1,166 @@
-import jax.numpy as jnp
-import mlx.core as mx
+from functools import lru_cache
+from typing import Callable, Optional
+
 import numpy as np
-from spectral_coherence import half_coherences
 
-from lrv_test.types import f64_1d, f64_2d, real_function
+from lrv_test import backends
+from lrv_test.coherence import half_coherences
+from lrv_test.instrument import count_nbytes, stage
+from lrv_test.trace import TRACE_TOLERANCE, trace_LSSs
+from lrv_test.types import (
+    Backend,
+    EigenMethod,
+    Precision,
+    f64_1d,
+    f64_2d,
+    real_function,
+)
+
+
+@lru_cache(maxsize=None)
+def _jax_singular_values() -> Callable:
+    # jit once, the compiled function is reused for every stack of the same shape
+    jax = backends.jax()
+    return jax.jit(
+        lambda a: jax.numpy.linalg.svd(a, full_matrices=False, compute_uv=False)
+    )
+
+
+def _singular_values(hC_hats: np.ndarray, backend: Backend) -> np.ndarray:
+    if backend == "numpy":
+        return np.linalg.svd(hC_hats, compute_uv=False)
+    elif backend == "jax":
+        return np.asarray(_jax_singular_values()(hC_hats))
+    elif backend == "mlx":
+        # the mlx linear algebra routines are only available on the cpu stream, in
+        # single precision
+        mx = backends.mlx()
+        sv = mx.linalg.svd(
+            mx.array(hC_hats.astype(np.complex64)), compute_uv=False, stream=mx.cpu
+        )
+        return np.array(sv).astype(np.float64)
+    raise ValueError(f"Unknown backend: {backend}")
+
+
+def _gram_eigenvalues(hC_hats: np.ndarray, backend: Backend) -> np.ndarray:
+    # the gram matrix is taken on the smallest dimension, so that it is
+    # min(M, B) x min(M, B)
+    hC_hats_H = np.conj(np.swapaxes(hC_hats, -1, -2))
+    M, B = hC_hats.shape[-2:]
+    gram = hC_hats @ hC_hats_H if M <= B else hC_hats_H @ hC_hats
+
+    if backend == "numpy":
+        λ = np.linalg.eigvalsh(gram)
+    elif backend == "jax":
+        λ = np.asarray(backends.jax().numpy.linalg.eigvalsh(gram))
+    elif backend == "mlx":
+        mx = backends.mlx()
+        λ = mx.linalg.eigvalsh(mx.array(gram.astype(np.complex64)), stream=mx.cpu)
+        λ = np.array(λ).astype(np.float64)
+    else:
+        raise ValueError(f"Unknown backend: {backend}")
+
+    # the gram matrix is positive semi-definite, negative values are rounding errors
+    return np.clip(λ, 0, None)
+
+
+def coherence_eigenvalues(
+    hC_hats: np.ndarray,
+    backend: Optional[Backend] = None,
+    method: EigenMethod = "svd",
+) -> np.ndarray:
+    """
+    Compute the eigenvalues of the coherency matrices hC_hat @ hC_hat^H for a stack
+    of half coherency matrices of shape (..., M, B), in a single batched call.
+
+    Only the min(M, B) eigenvalues of the most favorable matrix are returned, so the
+    output has shape (..., min(M, B)). With method="gram", the eigenvalues are
+    computed with eigvalsh on the min(M, B) x min(M, B) gram matrix, which is faster
+    than the svd when min(M, B) is small.
+
+    backend=None reads the backend from the LRV_TEST_BACKEND environment variable
+    (see lrv_test.backends).
+    """
+    backend = backends.resolve_backend(backend)
+    if method == "svd":
+        return _singular_values(hC_hats, backend) ** 2
+    elif method == "gram":
+        return _gram_eigenvalues(hC_hats, backend)
+    elif method == "trace":
+        raise ValueError("The trace method computes the LSSs without eigenvalues")
+    raise ValueError(f"Unknown method: {method}")
+
+
+def coherence_LSSs(
+    hC_hats: np.ndarray,
+    f: real_function,
+    backend: Optional[Backend] = None,
+    method: EigenMethod = "svd",
+    trace_tolerance: float = TRACE_TOLERANCE,
+) -> np.ndarray:
+    """
+    LSSs mean(f(λ)) of a stack of half coherency matrices of shape (..., M, B).
+
+    With method="trace", they are computed from traces of the gram matrices with
+    NumPy (see lrv_test.trace): exactly with matrix products for a
+    PolynomialTestFunction, and by stochastic Lanczos quadrature otherwise, with a
+    target standard error trace_tolerance on each LSS, falling back to the exact
+    eigenvalues when it is not reached.
+    """
+    if method == "trace":
+        with stage("trace_LSSs"):
+            return trace_LSSs(hC_hats, f, trace_tolerance)
 
+    with stage("eigenvalues"):
+        λ = coherence_eigenvalues(hC_hats, backend, method)
+        count_nbytes(λ)
+    return np.mean(f(λ), axis=-1)
 
-def _compute_LSS(hC_hat: f64_2d, f: real_function) -> float:
-    hC_hat = np.array(hC_hat)
 
-    # Always compute the svd on the most favorable matrix
-    M, B = hC_hat.shape
-    if M > B:
-        hC_hat = hC_hat.T
+def _stacked_half_coherences(
+    y: f64_2d,
+    B: int,
+    freqs: f64_1d = None,
+    backend: Optional[Backend] = None,
+    precision: Precision = "double",
+) -> tuple[np.ndarray, f64_1d]:
+    """
+    Half coherency matrices of y at each frequency, as a (n_freqs, M, B) array, in
+    the given precision. They are computed by lrv_test.coherence whatever the
+    backend, which only selects the engine of the eigenvalues.
+    """
+    with stage("half_coherences"):
+        hC_hats, freqs = half_coherences(np.asarray(y), B, freqs, precision)
+        count_nbytes(hC_hats)
+    return hC_hats, freqs
 
-    sv = jnp.linalg.svd(hC_hat, full_matrices=False, compute_uv=False)
-    λ = sv**2
 
-    return np.mean(f(λ))
+def compute_eigenvalues(
+    y: f64_2d,
+    B: int,
+    freqs: f64_1d = None,
+    backend: Optional[Backend] = None,
+    method: EigenMethod = "svd",
+    precision: Precision = "double",
+) -> tuple[np.ndarray, f64_1d]:
+    """
+    Eigenvalues of the coherency matrices of y at each frequency, of shape
+    (n_freqs, min(M, B)). They do not depend on the test function, so they can be
+    shared by several LSSs.
+    """
+    hC_hats, freqs = _stacked_half_coherences(y, B, freqs, backend, precision)
+    return coherence_eigenvalues(hC_hats, backend, method), freqs
 
 
 def compute_LSSs(
-    y: f64_2d, B: int, f: real_function, freqs: f64_1d = None
+    y: f64_2d,
+    B: int,
+    f: real_function,
+    freqs: f64_1d = None,
+    backend: Optional[Backend] = None,
+    method: EigenMethod = "svd",
+    precision: Precision = "double",
+    trace_tolerance: float = TRACE_TOLERANCE,
 ) -> tuple[f64_1d, f64_1d]:
-    hC_hats, freqs = half_coherences(mx.array(y), B, freqs=freqs)
-    LSSs = np.array([_compute_LSS(hC_hat, f) for hC_hat in hC_hats])
-    return LSSs, freqs
+    hC_hats, freqs = _stacked_half_coherences(y, B, freqs, backend, precision)
+    return coherence_LSSs(hC_hats, f, backend, method, trace_tolerance), freqs
@@ -0,0 +1,146 @@
+from typing import Optional
+
+import numpy as np
+
+from lrv_test.coherence import default_freqs, fourier_indices, half_coherences_from_dft
+from lrv_test.lag_window import LagWindowEstimator, _symmetrize_autocors
+from lrv_test.LRV import _lrv_result, _r_n_values
+from lrv_test.lss import coherence_LSSs
+from lrv_test.plan import prepare
+from lrv_test.result import LRVResult
+from lrv_test.types import Backend, EigenMethod, f64_1d, f64_2d, real_function
+
+
+class OnlineLRV:
+    """
+    LRV test on a sliding window of the last N samples of a M-dimensional feed.
+
+    The DFT values behind the coherency matrices and the lagged sums behind the
+    autocovariances of the lag window estimator are updated incrementally, so that
+    ingesting a sample costs O(n_freqs * B * M + L * M), independently of N. The
+    statistics are computed on demand with `result`.
+
+    Rounding errors accumulate slowly in the sliding updates, use refresh_every to
+    recompute them from the window every given number of samples.
+    """
+
+    def __init__(
+        self,
+        N: int,
+        M: int,
+        B: int,
+        f: real_function,
+        freqs: Optional[f64_1d] = None,
+        L: Optional[int] = None,
+        tolerance: float = 1e-6,
+        backend: Optional[Backend] = None,
+        method: EigenMethod = "svd",
+        refresh_every: Optional[int] = None,
+    ):
+        self.N, self.M, self.B, self.L = N, M, B, L
+        self.freqs = default_freqs(N, B) if freqs is None else np.asarray(freqs)
+        self.plan = prepare(f, M, B, tolerance)
+        self.backend, self.method = backend, method
+        self.refresh_every = refresh_every
+
+        # DFT values at the Fourier frequencies used by the coherency matrices
+        self._indices = fourier_indices(self.freqs, B, N).reshape(-1)
+        self._xi = np.zeros((len(self._indices), M), dtype=complex)
+
+        # sums of x[n + l] * conj(x[n]) over the window, for l = 0..L
+        self._lag_sums = np.zeros((0 if L is None else L + 1, M), dtype=complex)
+
+        # ring buffer of the window, the oldest sample is at self._position
+        self._window = np.zeros((N, M), dtype=complex)
+        self._position = 0
+        self.n_samples = 0
+
+    @property
+    def is_ready(self) -> bool:
+        """Whether N samples have been ingested"""
+        return self.n_samples >= self.N
+
+    def _window_rows(self, start: int, stop: int) -> np.ndarray:
+        """Rows start to stop - 1 of the window, 0 being the oldest"""
+        return self._window[(self._position + np.arange(start, stop)) % self.N]
+
+    def _update_dft(self, rows: np.ndarray) -> None:
+        # with R new rows, xi_k <- exp(2i pi k R / N) (xi_k + sum_j (x_j - w_j)
+        # exp(-2i pi k j / N) / sqrt(N)), where w_j are the R oldest rows
+        R = len(rows)
+        differences = rows - self._window_rows(0, R)
+        exponents = np.exp(-2j * np.pi * np.outer(self._indices, np.arange(R)) / self.N)
+        self._xi += exponents @ differences / np.sqrt(self.N)
+        self._xi *= np.exp(2j * np.pi * self._indices * R / self.N)[:, np.newaxis]
+
+    def _push(self, row: np.ndarray) -> None:
+        L = len(self._lag_sums) - 1
+        if L >= 0:
+            # remove the products with the oldest sample, add the ones with the new
+            oldest = self._window[self._position]
+            self._lag_sums -= self._window_rows(0, L + 1) * np.conj(oldest)
+            previous = self._window_rows(self.N - L, self.N)[::-1]
+            self._lag_sums[1:] += row * np.conj(previous)
+            self._lag_sums[0] += np.abs(row) ** 2
+
+        self._window[self._position] = row
+        self._position = (self._position + 1) % self.N
+
+    def update(self, rows: f64_2d) -> None:
+        """
+        Ingest new samples, of shape (n_samples, M), or (M,) for a single sample.
+        """
+        rows = np.atleast_2d(rows)
+        if rows.shape[1] != self.M:
+            raise ValueError(f"Expected {self.M} features, got {rows.shape[1]}")
+
+        for start in range(0, len(rows), self.N):
+            block = rows[start : start + self.N]
+            self._update_dft(block)
+            for row in block:
+                self._push(row)
+
+                self.n_samples += 1
+                if self.refresh_every and self.n_samples % self.refresh_every == 0:
+                    self.refresh()
+
+    def refresh(self) -> None:
+        """
+        Recompute the DFT values and the lagged sums from the window, discarding the
+        rounding errors of the sliding updates.
+        """
+        window = self._window_rows(0, self.N)
+        self._xi = (np.fft.fft(window, axis=0) / np.sqrt(self.N))[self._indices]
+        for l in range(len(self._lag_sums)):
+            self._lag_sums[l] = np.sum(window[l:] * np.conj(window[: self.N - l]), 0)
+
+    def result(self) -> LRVResult:
+        """
+        LRV statistics on the current window.
+        """
+        if not self.is_ready:
+            raise ValueError(f"{self.n_samples} samples ingested, {self.N} needed")
+
+        n_freqs = len(self.freqs)
+        xi = self._xi.reshape(n_freqs, self.B, self.M)
+        hC_hats = half_coherences_from_dft(xi)
+        LSSs = coherence_LSSs(hC_hats, self.plan.f, self.backend, self.method)
+
+        if self.L is None:
+            r_n = 0
+        else:
+            autocors = self._lag_sums / (self.N - np.arange(self.L + 1))[:, np.newaxis]
+            sd = LagWindowEstimator(_symmetrize_autocors(autocors))
+            r_n = _r_n_values(*sd.evaluate(self.freqs))
+
+        return _lrv_result(
+            self.N,
+            self.M,
+            self.B,
+            self.freqs,
+            LSSs,
+            r_n,
+            self.plan.f_against_mp,
+            self.plan.f_against_D,
+            self.plan.sigma,
+        )
@@ -0,0 +1,241 @@
+from itertools import chain
+from typing import Iterable, Iterator, Optional, Union
+
+import numpy as np
+
+from lrv_test.coherence import (
+    as_precision,
+    default_freqs,
+    dft,
+    fourier_indices,
+    half_coherences_from_dft,
+)
+from lrv_test.lag_window import LagWindowEstimator, _symmetrize_autocors
+from lrv_test.lss import coherence_LSSs
+from lrv_test.result import LRVResult
+from lrv_test.trace import STATISTIC_TOLERANCE
+from lrv_test.types import (
+    Backend,
+    EigenMethod,
+    Precision,
+    f64_1d,
+    f64_2d,
+    real_function,
+)
+
+"""
+LRV test on time series larger than the memory: np.memmap, chunked arrays (Zarr,
+HDF5 datasets...) or iterators of row blocks.
+
+An array-like y is read by blocks of columns, each transformed by an FFT along the
+time axis, of which only the DFT values needed by the coherency matrices are kept.
+This costs O(N * M * log N) like the in-memory path, and the peak memory is that of
+the kept values, O(M * B * n_freqs), plus a block of at most BLOCK_VALUES values.
+
+An iterator of row blocks, which can only be read once and in order, has its DFT
+values accumulated with matrix products of the blocks by tiles of at most TILE_SIZE
+exponentials, so the temporaries do not grow with N. This costs
+O(N * M * B * n_freqs), O(N^2 * M) on the default frequencies, so it is only used
+for an array-like y when the frequencies are sparse: B * n_freqs <= log2(N).
+
+In both cases the autocovariances of the lag window estimator are accumulated in a
+pass over blocks of rows.
+"""
+
+# default number of rows per block when reading the rows of y
+CHUNK_SIZE = 4096
+# maximum number of values of a block of columns of y transformed at once
+BLOCK_VALUES = 2**24
+# maximum number of exponentials exp(-2i pi k n / N) formed at once
+TILE_SIZE = 2**18
+
+
+def is_out_of_core(y) -> bool:
+    """
+    Whether y should be read by blocks rather than loaded at once: a np.memmap, a
+    chunked array (with a `chunks` attribute, as Zarr arrays and HDF5 datasets) or
+    an iterable of blocks, but not a list, a tuple, or an in-memory array of another
+    library (JAX, MLX...)
+    """
+    if isinstance(y, np.memmap):
+        return True
+    if isinstance(y, (np.ndarray, list, tuple)):
+        return False
+    if hasattr(y, "shape"):
+        return hasattr(y, "chunks")
+    return isinstance(y, Iterable)
+
+
+def column_block_dft(
+    y: f64_2d,
+    indices: np.ndarray,
+    precision: Precision = "double",
+    block_values: int = BLOCK_VALUES,
+) -> np.ndarray:
+    """
+    Normalized DFT values of the array-like y at the Fourier indices, of shape
+    (*indices.shape, M), computed by blocks of columns of at most block_values values.
+    Each block is cast to the precision before its FFT, as in the in-memory path.
+    """
+    N, M = y.shape
+    n_columns = max(1, block_values // N)
+    xi = None
+    for start in range(0, M, n_columns):
+        block = as_precision(np.asarray(y[:, start : start + n_columns]), precision)
+        values = dft(block)[indices]
+        if xi is None:
+            xi = np.empty((*indices.shape, M), dtype=values.dtype)
+        xi[..., start : start + n_columns] = values
+    return xi
+
+
+def _iter_blocks(y, chunk_size: int) -> Iterator[np.ndarray]:
+    if hasattr(y, "shape") and hasattr(y, "__getitem__"):
+        for start in range(0, y.shape[0], chunk_size):
+            yield np.asarray(y[start : start + chunk_size])
+    else:
+        for block in y:
+            yield np.atleast_2d(np.asarray(block))
+
+
+class DFTAccumulator:
+    """
+    DFT values of a time series of length N at Fourier frequencies indices / N,
+    accumulated block by block.
+    """
+
+    def __init__(self, indices: np.ndarray, N: int, M: int):
+        self.indices = indices
+        self.N = N
+        self.n_samples = 0
+        self._sums = np.zeros((len(indices), M), dtype=complex)
+
+    def update(self, block: f64_2d) -> None:
+        times = self.n_samples + np.arange(len(block))
+        tile = max(1, TILE_SIZE // max(len(block), 1))
+        for start in range(0, len(self.indices), tile):
+            indices = self.indices[start : start + tile]
+            # k * n is reduced modulo N to keep the phases accurate for large N
+            phases = np.outer(indices, times) % self.N
+            exponents = np.exp(-2j * np.pi * phases / self.N)
+            self._sums[start : start + tile] += exponents @ block
+        self.n_samples += len(block)
+
+    @property
+    def xi(self) -> np.ndarray:
+        return self._sums / np.sqrt(self.N)
+
+
+class AutocovarianceAccumulator:
+    """
+    Sums of x[n + l] * conj(x[n]) for l = 0..L, accumulated block by block. The last
+    L rows of each block are kept to form the products across blocks.
+    """
+
+    def __init__(self, L: int, M: int):
+        self.L = L
+        self.n_samples = 0
+        self._sums = np.zeros((L + 1, M), dtype=complex)
+        self._tail = np.zeros((0, M))
+
+    def update(self, block: f64_2d) -> None:
+        x = np.concatenate([self._tail, block])
+        n_tail = len(self._tail)
+        for l in range(self.L + 1):
+            # products whose later element is in the new block
+            start = max(n_tail, l)
+            if start >= len(x):
+                break
+            self._sums[l] += np.sum(x[start:] * np.conj(x[start - l : len(x) - l]), 0)
+
+        self._tail = x[max(len(x) - self.L, 0) :] if self.L > 0 else x[:0]
+        self.n_samples += len(block)
+
+    def lag_window(self, precision: Precision = "double") -> LagWindowEstimator:
+        autocors = self._sums / (self.n_samples - np.arange(self.L + 1))[:, np.newaxis]
+        return LagWindowEstimator(
+            _symmetrize_autocors(as_precision(autocors, precision))
+        )
+
+
+def LRV_out_of_core(
+    y: Union[f64_2d, Iterable[f64_2d]],
+    B: int,
+    f: real_function,
+    freqs: Optional[f64_1d] = None,
+    L: Optional[int] = None,
+    sd: Optional[real_function] = None,
+    f_against_mp: Optional[float] = None,
+    f_against_D: Optional[float] = None,
+    sigma: Optional[float] = None,
+    tolerance: float = 1e-6,
+    backend: Optional[Backend] = None,
+    method: EigenMethod = "svd",
+    n_samples: Optional[int] = None,
+    chunk_size: int = CHUNK_SIZE,
+    precision: Precision = "double",
+    trace_tolerance: float = STATISTIC_TOLERANCE,
+) -> LRVResult:
+    """
+    Compute the LRV statistics on y, which is either an array-like of shape (N, M),
+    read by blocks of columns for the DFT and by blocks of chunk_size rows for the
+    autocovariances, or an iterable of row blocks read in a single streaming pass, in
+    which case the total number of samples n_samples is required.
+
+    trace_tolerance is the target standard error of the statistics t_stats_0 with
+    method="trace" (see LRV). With precision="single", an array-like y is transformed
+    in single precision as an in-memory y. The streamed sums are accumulated in
+    double precision, then the coherency matrices, their eigenvalues and the
+    autocovariances are cast to single precision.
+    """
+    # import here, LRV dispatches to this function
+    from lrv_test.LRV import _compute_r_n, _lrv_result
+    from lrv_test.plan import prepare
+
+    if n_samples is None and not hasattr(y, "shape"):
+        raise ValueError("n_samples is required when y is an iterable of blocks")
+
+    blocks = _iter_blocks(y, chunk_size)
+    first_block = next(blocks)
+    M = first_block.shape[1]
+    N = y.shape[0] if n_samples is None else n_samples
+    freqs = default_freqs(N, B) if freqs is None else np.asarray(freqs)
+
+    indices = fourier_indices(freqs, B, N)
+    # the FFT of the columns, unless y can only be streamed or the freqs are sparse
+    is_streamed = not hasattr(y, "shape") or indices.size <= np.log2(N)
+    accumulator = DFTAccumulator(indices.reshape(-1), N, M) if is_streamed else None
+    autocovariances = None
+    if sd is None and L is not None:
+        autocovariances = AutocovarianceAccumulator(L, M)
+
+    if is_streamed or autocovariances is not None:
+        n_read = 0
+        for block in chain([first_block], blocks):
+            n_read += len(block)
+            if accumulator is not None:
+                accumulator.update(block)
+            if autocovariances is not None:
+                autocovariances.update(block)
+        if n_read != N:
+            raise ValueError(f"Expected {N} samples, got {n_read}")
+
+    if f_against_mp is None or f_against_D is None or sigma is None:
+        plan = prepare(f, M, B, tolerance)
+        f_against_mp = plan.f_against_mp if f_against_mp is None else f_against_mp
+        f_against_D = plan.f_against_D if f_against_D is None else f_against_D
+        sigma = plan.sigma if sigma is None else sigma
+
+    if accumulator is not None:
+        xi = as_precision(accumulator.xi.reshape(*indices.shape, M), precision)
+    else:
+        xi = column_block_dft(y, indices, precision)
+    LSSs = coherence_LSSs(
+        half_coherences_from_dft(xi), f, backend, method, trace_tolerance * sigma / M
+    )
+
+    if autocovariances is not None:
+        sd = autocovariances.lag_window(precision)
+    r_n = 0 if sd is None else _compute_r_n(sd, freqs)
+
+    return _lrv_result(N, M, B, freqs, LSSs, r_n, f_against_mp, f_against_D, sigma)
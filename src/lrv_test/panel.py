@@ -0,0 +1,77 @@
+from typing import Optional
+
+import numpy as np
+
+from lrv_test.batch import LRVResultBatch
+from lrv_test.coherence import default_freqs, half_coherences
+from lrv_test.lag_window import lag_window
+from lrv_test.LRV import _r_n_values, _statistics
+from lrv_test.lss import coherence_LSSs
+from lrv_test.plan import prepare
+from lrv_test.types import Backend, EigenMethod, f64_1d, real_function
+
+
+def LRV_panel(
+    Y: np.ndarray,
+    B: int,
+    f: real_function,
+    freqs: Optional[f64_1d] = None,
+    L: Optional[int] = None,
+    chunk_size: int = 64,
+    tolerance: float = 1e-6,
+    backend: Optional[Backend] = None,
+    method: EigenMethod = "svd",
+) -> LRVResultBatch:
+    """
+    Compute the LRV statistics on P independent time series sharing the same shape,
+    given as a (P, N, M) array. The DFTs, coherency matrices, eigenvalues and
+    autocovariances are computed with batched operations over chunks of chunk_size
+    series, which bounds the peak memory, and the constants of the test are shared.
+
+    Returns the results of the P tests as a LRVResultBatch.
+    """
+    P, N, M = Y.shape
+    freqs = default_freqs(N, B) if freqs is None else np.asarray(freqs)
+    plan = prepare(f, M, B, tolerance)
+
+    columns = []
+    for start in range(0, P, chunk_size):
+        Y_chunk = np.asarray(Y[start : start + chunk_size])
+
+        hC_hats, _ = half_coherences(Y_chunk, B, freqs)
+        LSSs = coherence_LSSs(hC_hats, f, backend, method)
+
+        if L is None:
+            r_n = np.zeros_like(LSSs)
+        else:
+            sd = lag_window(Y_chunk, L)
+            r_n = _r_n_values(*sd.evaluate(freqs))
+
+        statistics = _statistics(
+            N,
+            M,
+            B,
+            LSSs,
+            r_n,
+            plan.f_against_mp,
+            plan.f_against_D,
+            plan.sigma,
+        )
+        columns.append({"LSSs": LSSs, **statistics})
+
+    batch_columns = {
+        name: np.concatenate([chunk[name] for chunk in columns])
+        for name in ["LSSs", "thetas", "corrections", "t_stats_0"]
+        + [f"t_stat_{i}" for i in range(1, 5)]
+    }
+    batch_columns.update(
+        {
+            "N": np.full(P, N),
+            "M": np.full(P, M),
+            "B": np.full(P, B),
+            "v_n": np.full(P, columns[0]["v_n"]),
+            "f_mp": np.full(P, plan.f_against_mp),
+            "freqs": np.broadcast_to(freqs, (P, len(freqs))),
+        }
+    )
+    return LRVResultBatch.from_columns(batch_columns)
@@ -0,0 +1,148 @@
+import contextvars
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+import numpy as np
+
+from lrv_test.backends import resolve_backend
+from lrv_test.coherence import (
+    as_precision,
+    default_freqs,
+    dft,
+    fourier_indices,
+    half_coherences_from_dft,
+)
+from lrv_test.instrument import stage
+from lrv_test.lss import compute_LSSs, coherence_LSSs
+from lrv_test.polynomial import PolynomialTestFunction
+from lrv_test.trace import TRACE_TOLERANCE
+from lrv_test.types import (
+    Backend,
+    EigenMethod,
+    Precision,
+    f64_1d,
+    f64_2d,
+    real_function,
+)
+
+"""
+Evaluation of the LSSs on a thread pool, by chunks of frequencies.
+
+The DFT of the time series is computed once, and each task forms the half coherency
+matrices of its chunk of frequencies and computes their LSSs. NumPy releases the GIL
+in the FFT and LAPACK routines, so the chunks run in parallel on threads, without
+copying the data to other processes. At most 2 * n_jobs chunks are in flight, so the
+coherency matrices held in memory are bounded by 2 * n_jobs * chunk_size * M * B
+values, whatever the number of frequencies.
+
+The tasks run in a copy of the context of the caller, so that their stages are
+recorded when profiling (see lrv_test.instrument). The per matrix LAPACK calls are
+the same as in the batched serial path, so the results are identical. The MLX
+backend, whose GPU streams are not meant to be driven from several threads, and the
+stochastic trace estimates, whose random probes depend on the chunking, stay serial.
+
+To avoid oversubscription, the BLAS threads are capped to cpu_count / n_jobs with
+threadpoolctl when it is installed. These limits are process-wide: they also apply
+to BLAS calls made by other threads meanwhile, and they are set by one parallel
+evaluation at a time, the concurrent ones running without them.
+"""
+
+# default number of frequencies per task
+CHUNK_SIZE = 16
+
+# held by the parallel evaluation which sets the process-wide BLAS limits
+_blas_lock = threading.Lock()
+
+
+def check_n_jobs(n_jobs: int) -> None:
+    if n_jobs == 0 or n_jobs < -1:
+        raise ValueError(
+            f"n_jobs must be a positive number of threads, or -1 for all the cpus, "
+            f"got {n_jobs}"
+        )
+
+
+def n_workers(n_jobs: int) -> int:
+    """Number of threads, n_jobs = -1 uses all the cpus"""
+    check_n_jobs(n_jobs)
+    return (os.cpu_count() or 1) if n_jobs == -1 else n_jobs
+
+
+@contextmanager
+def _blas_limits(n_jobs: int) -> Iterator[None]:
+    """
+    Cap the BLAS threads while no other evaluation does, so that concurrent callers
+    do not restore each other's limits in the wrong order
+    """
+    try:
+        # imported here, threadpoolctl is an optional dependency
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        yield
+        return
+
+    if not _blas_lock.acquire(blocking=False):
+        yield
+        return
+    try:
+        with threadpool_limits(max(1, (os.cpu_count() or 1) // n_jobs), "blas"):
+            yield
+    finally:
+        _blas_lock.release()
+
+
+def parallel_LSSs(
+    y: f64_2d,
+    B: int,
+    f: real_function,
+    freqs: Optional[f64_1d] = None,
+    backend: Optional[Backend] = None,
+    method: EigenMethod = "svd",
+    precision: Precision = "double",
+    n_jobs: int = -1,
+    chunk_size: int = CHUNK_SIZE,
+    trace_tolerance: float = TRACE_TOLERANCE,
+) -> tuple[f64_1d, f64_1d]:
+    """
+    Same as compute_LSSs, on n_jobs threads (all the cpus with -1), by chunks of
+    chunk_size frequencies.
+
+    The MLX backend and the stochastic trace estimates are computed serially.
+    """
+    n_jobs = n_workers(n_jobs)
+    is_stochastic = method == "trace" and not isinstance(f, PolynomialTestFunction)
+    is_mlx = method != "trace" and resolve_backend(backend) == "mlx"
+    if n_jobs == 1 or is_stochastic or is_mlx:
+        return compute_LSSs(y, B, f, freqs, backend, method, precision, trace_tolerance)
+
+    N = y.shape[0]
+    freqs = default_freqs(N, B) if freqs is None else np.asarray(freqs)
+    indices = fourier_indices(freqs, B, N)
+    with stage("dft"):
+        xi = dft(as_precision(y, precision))
+
+    def run_chunk(start: int) -> np.ndarray:
+        hC_hats = half_coherences_from_dft(xi[indices[start : start + chunk_size]])
+        return coherence_LSSs(hC_hats, f, backend, method, trace_tolerance)
+
+    LSSs = [None] * len(range(0, len(freqs), chunk_size))
+    with stage("parallel_LSSs"), _blas_limits(n_jobs), ThreadPoolExecutor(
+        n_jobs
+    ) as pool:
+        # bound the number of chunks in flight to bound the memory
+        pending = {}
+        for i, start in enumerate(range(0, len(freqs), chunk_size)):
+            # a copy for each task, a context cannot be entered by two threads
+            context = contextvars.copy_context()
+            pending[pool.submit(context.run, run_chunk, start)] = i
+            if len(pending) >= 2 * n_jobs:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    LSSs[pending.pop(future)] = future.result()
+        for future in list(pending):
+            LSSs[pending.pop(future)] = future.result()
+
+    return np.concatenate(LSSs), freqs
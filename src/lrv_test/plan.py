@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Hashable, Optional, Union
+
+from lrv_test.constants import compute_f_against_D, compute_f_against_mp
+from lrv_test.LRV import LRV
+from lrv_test.result import LRVResult
+from lrv_test.sigma import compute_sigma
+from lrv_test.table import lookup
+from lrv_test.types import f64_2d, real_function
+
+# maximum number of (f, c) constants kept in memory
+PLAN_CACHE_SIZE = 128
+
+_cache: OrderedDict[tuple, tuple[float, float, float]] = OrderedDict()
+
+
+@dataclass(frozen=True)
+class LRVPlan:
+    """
+    Data independent part of the LRV test, for a given test function f and shape
+    (M, B). Use `prepare` to build it.
+    """
+
+    f: real_function
+    M: int
+    B: int
+    f_against_mp: float
+    f_against_D: float
+    sigma: float
+
+    @property
+    def c(self) -> float:
+        return self.M / self.B
+
+    def run(self, y: f64_2d, **kwargs) -> LRVResult:
+        """
+        Run the LRV test on y, skipping the computation of the constants. The
+        keyword arguments are passed to `LRV`.
+        """
+        if y.shape[1] != self.M:
+            raise ValueError(f"Expected {self.M} features, got {y.shape[1]}")
+
+        return LRV(
+            y,
+            self.B,
+            self.f,
+            f_against_mp=self.f_against_mp,
+            f_against_D=self.f_against_D,
+            sigma=self.sigma,
+            **kwargs,
+        )
+
+
+def _compute_constants(
+    f: real_function, c: float, tolerance: float
+) -> tuple[float, float, float]:
+    f_against_mp = compute_f_against_mp(f, c, tolerance)
+    f_against_D = compute_f_against_D(f, c, tolerance)
+    sigma = compute_sigma(f, c, tolerance)
+    return float(f_against_mp), float(f_against_D), float(sigma)
+
+
+def _disk_path(cache_dir: Union[str, Path], key: tuple) -> Path:
+    digest = hashlib.sha256(repr(key).encode()).hexdigest()[:16]
+    return Path(cache_dir) / f"{digest}.json"
+
+
+def _load_constants(
+    cache_dir: Union[str, Path], key: tuple
+) -> Optional[tuple[float, float, float]]:
+    path = _disk_path(cache_dir, key)
+    if not path.exists():
+        return None
+
+    with open(path) as handle:
+        content = json.load(handle)
+
+    # guard against (unlikely) hash collisions
+    if content["key"] != repr(key):
+        return None
+    return content["f_against_mp"], content["f_against_D"], content["sigma"]
+
+
+def _store_constants(
+    cache_dir: Union[str, Path], key: tuple, constants: tuple[float, float, float]
+) -> None:
+    path = _disk_path(cache_dir, key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    f_against_mp, f_against_D, sigma = constants
+    content = {
+        "key": repr(key),
+        "f_against_mp": f_against_mp,
+        "f_against_D": f_against_D,
+        "sigma": sigma,
+    }
+    with open(path, "w") as handle:
+        json.dump(content, handle)
+
+
+def clear_cache() -> None:
+    _cache.clear()
+
+
+def prepare(
+    f: real_function,
+    M: int,
+    B: int,
+    tolerance: float = 1e-6,
+    spec: Optional[Hashable] = None,
+    cache_dir: Optional[Union[str, Path]] = None,
+) -> LRVPlan:
+    """
+    Compute once the constants f_against_mp, f_against_D and sigma of the LRV test,
+    which only depend on f and c = M / B.
+
+    The constants are memoized in memory (up to PLAN_CACHE_SIZE entries), keyed by
+    `spec` if provided, by the function object otherwise. `spec` is a hashable
+    description of the test function with a stable repr, such as "(x - 1) ** 2", and
+    defaults to `f.spec` if it exists. When `cache_dir` is given, the constants are
+    also stored on disk, which requires a spec.
+
+    If a table registered for the spec covers c within tolerance (see
+    lrv_test.table), the constants are interpolated from it instead.
+    """
+    if spec is None:
+        spec = getattr(f, "spec", None)
+    if cache_dir is not None and spec is None:
+        raise ValueError("An on-disk cache requires a spec of the test function")
+
+    c = M / B
+    key = (f if spec is None else spec, c, tolerance)
+
+    if key in _cache:
+        _cache.move_to_end(key)
+        constants = _cache[key]
+    else:
+        constants = lookup(spec, c, tolerance)
+        if constants is None and cache_dir is not None:
+            constants = _load_constants(cache_dir, (spec, c, tolerance))
+        if constants is None:
+            constants = _compute_constants(f, c, tolerance)
+            if cache_dir is not None:
+                _store_constants(cache_dir, (spec, c, tolerance), constants)
+
+        _cache[key] = constants
+        if len(_cache) > PLAN_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+    return LRVPlan(f, M, B, *constants)
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from math import comb
+from typing import Union
+
+import numpy as np
+from numpy.polynomial import polynomial
+
+"""
+Closed forms of the constants of the LRV test for polynomial test functions.
+
+With psi(w) = w + (1 + c) + c / w, f(psi(w)) is a Laurent polynomial in w, so the
+contour integrals around 0 of f_against_D and sigma reduce to its coefficients, and
+the moments of the Marchenko-Pastur distribution are the Narayana polynomials in c.
+"""
+
+
+def mp_moments(degree: int, c: float) -> np.ndarray:
+    """
+    Moments of order 0 to `degree` of the absolutely continuous part of the
+    Marchenko-Pastur distribution of parameter c (for c > 1, the atom at 0 of mass
+    1 - 1 / c is left out, as in the Stieltjes inversion in action_D_on_f).
+    """
+    moments = np.zeros(degree + 1)
+    moments[0] = min(1, 1 / c)
+    for k in range(1, degree + 1):
+        moments[k] = sum(c**r / (r + 1) * comb(k, r) * comb(k - 1, r) for r in range(k))
+    return moments
+
+
+def _psi_powers_coefficients(degree: int, c: float) -> np.ndarray:
+    """
+    Coefficients of f(psi(w)) for f(x) = x^k, k = 0..degree, as a Laurent polynomial
+    in w. Row k contains the coefficients of w^-degree, ..., w^degree.
+    """
+    psi_coefficients = np.array([c, 1 + c, 1])  # w^-1, w^0, w^1
+    coefficients = np.zeros((degree + 1, 2 * degree + 1))
+    power = np.array([1.0])
+    for k in range(degree + 1):
+        coefficients[k, degree - k : degree + k + 1] = power
+        power = np.convolve(power, psi_coefficients)
+    return coefficients
+
+
+@dataclass(frozen=True)
+class PolynomialTestFunction:
+    """
+    Polynomial test function f(x) = sum_k coefficients[k] x^k. It can be used
+    wherever a test function is expected, and the constants f_against_mp,
+    f_against_D and sigma are then computed in closed form.
+    """
+
+    coefficients: tuple[float, ...]
+
+    def __post_init__(self):
+        object.__setattr__(
+            self, "coefficients", tuple(float(a) for a in self.coefficients)
+        )
+        if len(self.coefficients) == 0:
+            raise ValueError("A polynomial needs at least one coefficient")
+
+    @classmethod
+    def from_roots(
+        cls, roots: tuple[float, ...], scale: float = 1
+    ) -> PolynomialTestFunction:
+        """For instance, from_roots((1, 1)) is f(x) = (x - 1) ** 2"""
+        return cls(tuple(scale * polynomial.polyfromroots(roots)))
+
+    @property
+    def degree(self) -> int:
+        return len(self.coefficients) - 1
+
+    @property
+    def spec(self) -> tuple:
+        return ("polynomial", self.coefficients)
+
+    def __call__(self, x: Union[float, np.ndarray]) -> Union[float, np.ndarray]:
+        return polynomial.polyval(x, self.coefficients)
+
+    def _laurent_coefficients(self, c: float) -> np.ndarray:
+        """Coefficients of w^-degree, ..., w^degree in f(psi(w))"""
+        powers = _psi_powers_coefficients(self.degree, c)
+        return np.array(self.coefficients) @ powers
+
+    def against_mp(self, c: float) -> float:
+        return float(np.dot(self.coefficients, mp_moments(self.degree, c)))
+
+    def against_D(self, c: float) -> float:
+        # residue at 0 of -c / (2 pi i) f(psi(w)) / w^3 on a clockwise contour
+        laurent = self._laurent_coefficients(c)
+        index = self.degree + 2
+        return c * laurent[index] if index < len(laurent) else 0.0
+
+    def sigma(self, c: float) -> float:
+        # sum over n >= 1 of (n + 1) c^2 p_{n+1}^2, where p_k is the coefficient of
+        # w^k in f(psi(w))
+        laurent = self._laurent_coefficients(c)
+        p = laurent[self.degree + 2 :]
+        k = np.arange(2, len(p) + 2)
+        return float(np.sqrt(np.sum(k * c**2 * p**2)))
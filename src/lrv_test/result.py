@@ -1,16 +1,69 @@
+from collections.abc import Sequence
 from dataclasses import dataclass
-from typing import Literal, Union
+from functools import lru_cache
+from typing import Literal, Optional, Union
 
 import numpy as np
-from scipy.stats import chi2, gumbel_r, norm
 
+from lrv_test.instrument import StageTiming
 from lrv_test.types import f64_1d
 
+Alternative = Literal["left", "right", "double"]
+
+# limit distribution and default alternative of the test statistics t_stat_1..4
+TESTS = {
+    1: ("normal", "double"),
+    2: ("normal", "double"),
+    3: ("chi2", "right"),
+    4: ("gumbel", "right"),
+}
+
+
+def _distribution(distribution: str, df: int = None):
+    # scipy.stats is slow to import, it is only loaded to compute p-values and
+    # critical values
+    from scipy.stats import chi2, gumbel_r, norm
+
+    if distribution == "normal":
+        return norm
+    elif distribution == "chi2":
+        return chi2(df)
+    elif distribution == "gumbel":
+        return gumbel_r
+    raise ValueError(f"Unknown distribution: {distribution}")
+
+
+@lru_cache(maxsize=1024)
+def _critical_values(
+    distribution: str, alternative: Alternative, levels: tuple[float, ...], df: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Lower and upper bounds of the acceptance region for each level. The test is
+    positive if the statistic is strictly below the lower or above the upper bound.
+    """
+    dist = _distribution(distribution, df)
+    levels = np.array(levels)
+    infinity = np.full(len(levels), np.inf)
+
+    if alternative == "left":
+        lower, upper = dist.ppf(levels), infinity
+    elif alternative == "right":
+        lower, upper = -infinity, dist.ppf(1 - levels)
+    elif alternative == "double":
+        lower, upper = dist.ppf(levels / 2), dist.ppf(1 - levels / 2)
+    else:
+        raise ValueError(f"Unknown alternative: {alternative}")
+
+    # the arrays are shared by all the callers through the cache
+    lower.setflags(write=False)
+    upper.setflags(write=False)
+    return lower, upper
+
 
 def is_positive(
     test_stat: Union[float, np.ndarray],
     distribution: str,
-    alternative: Literal["left", "right", "double"],
+    alternative: Alternative,
     level: float,
     df: int = None,
 ) -> Union[bool, np.ndarray]:
@@ -24,42 +77,110 @@ def is_positive(
         level: Significance level (e.g., 0.05)
         df: Degrees of freedom (only for chi2 distribution)
     """
-    if distribution == "normal":
-        if alternative == "left":
-            critical_value = norm.ppf(level)
-            return test_stat < critical_value
-        elif alternative == "right":
-            critical_value = norm.ppf(1 - level)
-            return test_stat > critical_value
-        else:  # double
-            critical_value = norm.ppf(1 - level / 2)
-            return np.abs(test_stat) > critical_value
+    lower, upper = _critical_values(distribution, alternative, (level,), df)
+    return (test_stat < lower[0]) | (test_stat > upper[0])
 
-    elif distribution == "chi2":
-        if alternative == "left":
-            critical_value = chi2.ppf(level, df)
-            return test_stat < critical_value
-        elif alternative == "right":
-            critical_value = chi2.ppf(1 - level, df)
-            return test_stat > critical_value
-        else:  # double
-            lower = chi2.ppf(level / 2, df)
-            upper = chi2.ppf(1 - level / 2, df)
-            return (test_stat < lower) | (test_stat > upper)
 
-    elif distribution == "gumbel":
-        if alternative == "left":
-            critical_value = gumbel_r.ppf(level)
-            return test_stat < critical_value
-        elif alternative == "right":
-            critical_value = gumbel_r.ppf(1 - level)
-            return test_stat > critical_value
-        else:  # double
-            lower = gumbel_r.ppf(level / 2)
-            upper = gumbel_r.ppf(1 - level / 2)
-            return (test_stat < lower) | (test_stat > upper)
+def p_value(
+    test_stat: Union[float, np.ndarray],
+    distribution: str,
+    alternative: Alternative,
+    df: Union[int, np.ndarray] = None,
+) -> Union[float, np.ndarray]:
+    """
+    p-value of the test statistic, i.e. the smallest level at which it is positive.
+    """
+    dist = _distribution(distribution, df)
+    if alternative == "left":
+        return dist.cdf(test_stat)
+    elif alternative == "right":
+        return dist.sf(test_stat)
+    elif alternative == "double":
+        return np.minimum(1, 2 * np.minimum(dist.cdf(test_stat), dist.sf(test_stat)))
+    raise ValueError(f"Unknown alternative: {alternative}")
 
-    raise ValueError(f"Unknown distribution: {distribution}")
+
+def _columns(results, statistic: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Values of t_stat_{statistic} and number of frequencies of each result. results
+    is either a sequence of LRVResult, an object with array attributes, or a
+    columnar table (dict of arrays, polars DataFrame, pyarrow Table...) with a n_freqs
+    column.
+    """
+    name = f"t_stat_{statistic}"
+    if isinstance(results, Sequence):
+        test_stats = np.array([getattr(result, name) for result in results], float)
+        n_freqs = np.array([len(result.freqs) for result in results])
+        return test_stats, n_freqs
+    elif hasattr(results, name):
+        return np.asarray(getattr(results, name), float), np.asarray(results.n_freqs)
+    return np.asarray(results[name], float), np.asarray(results["n_freqs"])
+
+
+def _alternative(statistic: int, alternatives: Optional[dict]) -> Alternative:
+    if alternatives is not None and statistic in alternatives:
+        return alternatives[statistic]
+    return TESTS[statistic][1]
+
+
+def reject(
+    results,
+    levels: Sequence[float],
+    statistics: Sequence[int] = (1, 2, 3, 4),
+    alternatives: Optional[dict[int, Alternative]] = None,
+) -> np.ndarray:
+    """
+    Decisions of the tests t_stat_1..4 for a stack of results and several levels at
+    once, as a boolean array of shape (n_results, n_statistics, n_levels).
+
+    results is a sequence of LRVResult or a columnar table (see _columns). The
+    alternatives default to the ones of the is_positive_* methods, and can be
+    overridden per statistic, e.g. alternatives={1: "right"}.
+    """
+    levels = tuple(float(level) for level in levels)
+
+    decisions = []
+    for statistic in statistics:
+        test_stats, n_freqs = _columns(results, statistic)
+        distribution = TESTS[statistic][0]
+        alternative = _alternative(statistic, alternatives)
+
+        if distribution == "chi2":
+            # one set of critical values per number of degrees of freedom
+            dfs, index = np.unique(n_freqs, return_inverse=True)
+            bounds = [
+                _critical_values(distribution, alternative, levels, int(df))
+                for df in dfs
+            ]
+            lower = np.stack([bound[0] for bound in bounds])[index]
+            upper = np.stack([bound[1] for bound in bounds])[index]
+        else:
+            lower, upper = _critical_values(distribution, alternative, levels, None)
+
+        test_stats = test_stats[:, np.newaxis]
+        decisions.append((test_stats < lower) | (test_stats > upper))
+
+    return np.stack(decisions, axis=1)
+
+
+def p_values(
+    results,
+    statistics: Sequence[int] = (1, 2, 3, 4),
+    alternatives: Optional[dict[int, Alternative]] = None,
+) -> np.ndarray:
+    """
+    p-values of the tests t_stat_1..4 for a stack of results, as an array of shape
+    (n_results, n_statistics). A test is positive at level l iff its p-value is < l.
+    """
+    values = []
+    for statistic in statistics:
+        test_stats, n_freqs = _columns(results, statistic)
+        distribution = TESTS[statistic][0]
+        alternative = _alternative(statistic, alternatives)
+        df = n_freqs if distribution == "chi2" else None
+        values.append(p_value(test_stats, distribution, alternative, df))
+
+    return np.stack(values, axis=1)
 
 
 @dataclass(frozen=True)
@@ -78,6 +199,14 @@ class LRVResult:
     t_stat_2: float
     t_stat_3: float
     t_stat_4: float
+    # size of the frequency grid, when only part of it was evaluated (see screen)
+    n_freqs_total: Optional[int] = None
+    # per stage timings and counters, when computed with profile=True
+    timings: Optional[dict[str, StageTiming]] = None
+
+    @property
+    def n_freqs_evaluated(self) -> int:
+        return len(self.freqs)
 
     def is_positive_0(
         self, level: float, alternative: Literal["left", "right", "double"] = "double"
@@ -105,3 +234,15 @@ class LRVResult:
         self, level: float, alternative: Literal["left", "right", "double"] = "right"
     ) -> bool:
         return is_positive(self.t_stat_4, "gumbel", alternative, level)
+
+    def p_value_1(self, alternative: Alternative = "double") -> float:
+        return p_value(self.t_stat_1, "normal", alternative)
+
+    def p_value_2(self, alternative: Alternative = "double") -> float:
+        return p_value(self.t_stat_2, "normal", alternative)
+
+    def p_value_3(self, alternative: Alternative = "right") -> float:
+        return p_value(self.t_stat_3, "chi2", alternative, df=len(self.freqs))
+
+    def p_value_4(self, alternative: Alternative = "right") -> float:
+        return p_value(self.t_stat_4, "gumbel", alternative)
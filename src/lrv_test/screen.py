@@ -0,0 +1,125 @@
+import dataclasses
+from typing import Literal, Optional
+
+import numpy as np
+
+from lrv_test.coherence import (
+    default_freqs,
+    dft,
+    fourier_indices,
+    half_coherences_from_dft,
+)
+from lrv_test.instrument import stage
+from lrv_test.lag_window import lag_window
+from lrv_test.LRV import _compute_r_n, _gumbel_normalization, _lrv_result
+from lrv_test.lss import coherence_LSSs
+from lrv_test.plan import prepare
+from lrv_test.result import LRVResult, _critical_values
+from lrv_test.types import Backend, EigenMethod, f64_1d, f64_2d, real_function
+
+
+def _coarse_to_fine_order(n_freqs: int) -> np.ndarray:
+    """
+    Order of evaluation of the frequencies of a grid, such that every prefix is
+    well spread over the grid: 0, n/2, n/4, 3n/4, n/8, ...
+    """
+    order = []
+    is_picked = np.zeros(n_freqs, dtype=bool)
+    stride = 1 << max(n_freqs - 1, 0).bit_length()
+    while stride >= 1:
+        indices = np.arange(0, n_freqs, stride)
+        order.extend(indices[~is_picked[indices]])
+        is_picked[indices] = True
+        stride //= 2
+    return np.array(order, dtype=int)
+
+
+def _threshold(statistic: int, level: float, n_freqs: int) -> float:
+    """
+    Value of max(t_stats_0 ** 2) (statistic 4) or sum(t_stats_0 ** 2) (statistic 3)
+    above which the test on n_freqs frequencies is positive.
+    """
+    if statistic == 4:
+        critical_value = _critical_values("gumbel", "right", (level,), None)[1][0]
+        a_n, b_n = _gumbel_normalization(n_freqs)
+        return critical_value / a_n + b_n
+    elif statistic == 3:
+        return _critical_values("chi2", "right", (level,), n_freqs)[1][0]
+    raise ValueError("Early exit is only available for statistics 3 and 4")
+
+
+def screen(
+    y: f64_2d,
+    B: int,
+    f: real_function,
+    level: float,
+    statistic: Literal[3, 4] = 4,
+    freqs: Optional[f64_1d] = None,
+    L: Optional[int] = None,
+    sd: Optional[real_function] = None,
+    n_coarse: int = 8,
+    tolerance: float = 1e-6,
+    backend: Optional[Backend] = None,
+    method: EigenMethod = "svd",
+) -> LRVResult:
+    """
+    Decide if the (right sided) test based on t_stat_3 or t_stat_4 is positive at the
+    given level, evaluating as few frequencies as possible.
+
+    The frequencies are evaluated from a coarse, well spread subset of n_coarse
+    frequencies, doubling the number of evaluated frequencies at each round. Both
+    sum(t_stats_0 ** 2) and max(t_stats_0 ** 2) can only grow with more frequencies,
+    so the screening stops as soon as they exceed the critical value of the test on
+    the whole grid. A negative decision requires all the frequencies. The DFT of y is
+    computed once, and each round only forms the coherency matrices of its
+    frequencies.
+
+    The returned result only contains the evaluated frequencies, and n_freqs_total
+    is the size of the grid. When the screening stopped early, the exact statistics
+    on the whole grid are unknown, but is_positive_3 / is_positive_4 of the result
+    are positive as well.
+    """
+    N, M = y.shape
+    freqs = default_freqs(N, B) if freqs is None else np.asarray(freqs)
+    n_total = len(freqs)
+    plan = prepare(f, M, B, tolerance)
+    threshold = _threshold(statistic, level, n_total)
+    reduce = np.max if statistic == 4 else np.sum
+
+    if sd is None and L is not None:
+        sd = lag_window(y, L)
+
+    indices = fourier_indices(freqs, B, N)
+    with stage("dft"):
+        xi = dft(y)
+
+    order = _coarse_to_fine_order(n_total)
+    LSSs = np.empty(n_total)
+    r_n = np.zeros(n_total)
+    n_evaluated = 0
+    while n_evaluated < n_total:
+        # double the number of evaluated frequencies at each round
+        batch = order[n_evaluated : n_evaluated + max(n_coarse, n_evaluated)]
+        with stage("half_coherences"):
+            hC_hats = half_coherences_from_dft(xi[indices[batch]])
+        LSSs[batch] = coherence_LSSs(hC_hats, f, backend, method)
+        if sd is not None:
+            r_n[batch] = _compute_r_n(sd, freqs[batch])
+        n_evaluated += len(batch)
+
+        evaluated = np.sort(order[:n_evaluated])
+        result = _lrv_result(
+            N,
+            M,
+            B,
+            freqs[evaluated],
+            LSSs[evaluated],
+            r_n[evaluated],
+            plan.f_against_mp,
+            plan.f_against_D,
+            plan.sigma,
+        )
+        if reduce(result.t_stats_0**2) > threshold:
+            break
+
+    return dataclasses.replace(result, n_freqs_total=n_total)
@@ -1,13 +1,15 @@
+from typing import Union
+
 import numpy as np
-from scipy.integrate import quad
 
 from lrv_test.contour import Contour
 from lrv_test.functions import z_t_t_tilde
+from lrv_test.polynomial import PolynomialTestFunction
 from lrv_test.types import real_function
-from lrv_test.utils import contour_integral, psi
+from lrv_test.utils import contour_integral_trapezoidal, psi
 
 
-def s(z: complex, c: float) -> complex:
+def s(z: Union[complex, np.ndarray], c: float) -> Union[complex, np.ndarray]:
     z_t_t_tilde_square = z_t_t_tilde(z, c) ** 2
     return np.sqrt(c) * z_t_t_tilde_square / (1 - c * z_t_t_tilde_square)
 
@@ -15,6 +17,8 @@ def s(z: complex, c: float) -> complex:
 def rectangle_integral(
     f: real_function, min_x: float, max_x: float, min_y: float, max_y: float
 ) -> float:
+    from scipy.integrate import quad
+
     # compute the four integrals
     integral_1 = quad(lambda x: f(x + 1j * max_y), min_x, max_x, complex_func=True)[0]
     integral_2 = quad(lambda y: f(max_x + 1j * y), max_y, min_y, complex_func=True)[0]
@@ -33,29 +37,30 @@ def compute_sigma(f: real_function, c: float, tolerance: float) -> float:
     integral is equal to the infinite (converging) sum of square of a single contour
     integral. This single contour integral is very fast to compute, and the sum
     converges sufficiently fast for our needs.
+
+    For a PolynomialTestFunction, the contour integrals are residues at 0 and the
+    sum is finite, so sigma is computed in closed form.
     """
+    if isinstance(f, PolynomialTestFunction):
+        return f.sigma(c)
+
     radius = np.sqrt(c) + 0.1
     center = 0
     contour = Contour.from_circle_parameters(center, radius)
 
-    def integrand(w, n):
-        return -np.sqrt(n + 1) * c * f(psi(w, c)) / w ** (n + 2)
-
-    ci = lambda n: contour_integral(
-        integrand=lambda w: integrand(w, n), contour=contour
-    )
+    # all the contour integrals are computed on the same nodes, so that f(psi(w, c))
+    # is evaluated only once
+    n_max = 20
+    n = np.arange(1, n_max + 1)[:, np.newaxis]
+    integrands = lambda w: -np.sqrt(n + 1) * c * f(psi(w, c)) / w ** (n + 2)
+    cis = contour_integral_trapezoidal(integrands, contour, tolerance)
 
-    # compute the integrals until a term is small enough
-    cis = []
-    n = 1
-    integral_value = ci(n)
-    while np.abs(integral_value) > 1e-4 and n < 20:
-        cis.append(integral_value)
-        n += 1
-        integral_value = ci(n)
-    cis.append(integral_value)
+    # keep the integrals until a term is small enough
+    is_small = np.abs(cis) <= 1e-4
+    n_terms = np.argmax(is_small) + 1 if np.any(is_small) else n_max
+    cis = cis[:n_terms]
 
-    result = -np.sum([ci**2 for ci in cis]) / (4 * np.pi**2)
+    result = -np.sum(cis**2) / (4 * np.pi**2)
     assert np.imag(result) < tolerance
 
     return np.sqrt(np.real(result))
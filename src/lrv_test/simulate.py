@@ -0,0 +1,244 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Hashable, Iterable, Optional, Union
+
+import numpy as np
+
+from lrv_test.parallel import n_workers
+from lrv_test.plan import prepare
+from lrv_test.storage import check_config
+from lrv_test.types import f64_1d, f64_2d, real_function
+
+"""
+Monte Carlo simulations of the LRV test, typically to estimate its level and power.
+
+The replicates are split in chunks, run on a process pool and written to one Parquet
+file per chunk as soon as they are done, so that the memory stays flat and an
+interrupted simulation resumes where it stopped. Each replicate draws its data from
+its own SeedSequence, keyed by (N, M, replicate), so the results depend neither on
+the chunking nor on the number of workers, and settings sharing N and M are run on
+the same samples.
+"""
+
+# one point of the grid: N, M, B and L (None to skip the r_n correction)
+Setting = tuple[int, int, int, Optional[int]]
+# draws a sample of shape (N, M) from a random generator
+DataGenerator = Callable[[np.random.Generator, int, int], f64_2d]
+
+IS_POSITIVE_COLUMNS = [f"is_positive_{i}" for i in range(5)]
+
+# state of the worker processes, set once by _init_worker
+_worker: dict = {}
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as error:
+        raise ImportError("pyarrow is required to store the simulations") from error
+    return pyarrow
+
+
+def _init_worker(
+    generator: DataGenerator,
+    f: real_function,
+    freqs: Optional[f64_1d],
+    tolerance: float,
+    spec: Optional[Hashable],
+    cache_dir: Optional[Union[str, Path]],
+) -> None:
+    _worker.update(
+        generator=generator,
+        f=f,
+        freqs=freqs,
+        tolerance=tolerance,
+        spec=spec,
+        cache_dir=cache_dir,
+    )
+
+
+def _part_path(output_dir: Path, setting: Setting, start: int) -> Path:
+    N, M, B, L = setting
+    return output_dir / f"N={N}_M={M}_B={B}_L={L}_start={start:09d}.parquet"
+
+
+def _rejection_counts(columns: dict[str, list]) -> dict[str, float]:
+    return {column: float(np.sum(columns[column])) for column in IS_POSITIVE_COLUMNS}
+
+
+def _run_chunk(
+    setting: Setting,
+    start: int,
+    stop: int,
+    seed: int,
+    level: float,
+    path: Path,
+) -> dict[str, float]:
+    """
+    Run the replicates start to stop - 1 of a setting, write them to path and return
+    the number of positive tests of each statistic.
+    """
+    pa = _pyarrow()
+    N, M, B, L = setting
+
+    # the constants are memoized by prepare, so each worker computes them once
+    plan = prepare(
+        _worker["f"],
+        M,
+        B,
+        _worker["tolerance"],
+        _worker["spec"],
+        _worker["cache_dir"],
+    )
+
+    columns = {"replicate": list(range(start, stop)), "n_freqs": []}
+    columns.update({f"t_stat_{i}": [] for i in range(1, 5)})
+    columns.update({column: [] for column in IS_POSITIVE_COLUMNS})
+    for replicate in range(start, stop):
+        seed_sequence = np.random.SeedSequence(seed, spawn_key=(N, M, replicate))
+        y = _worker["generator"](np.random.default_rng(seed_sequence), N, M)
+        result = plan.run(y, freqs=_worker["freqs"], L=L)
+
+        columns["n_freqs"].append(len(result.freqs))
+        for i in range(1, 5):
+            columns[f"t_stat_{i}"].append(float(getattr(result, f"t_stat_{i}")))
+        # for the frequency-wise statistic, keep the fraction of positive tests
+        columns["is_positive_0"].append(float(np.mean(result.is_positive_0(level))))
+        for i in range(1, 5):
+            is_positive = getattr(result, f"is_positive_{i}")(level)
+            columns[f"is_positive_{i}"].append(bool(is_positive))
+
+    n_rows = stop - start
+    table = pa.table(
+        {
+            "N": pa.array([N] * n_rows, pa.int64()),
+            "M": pa.array([M] * n_rows, pa.int64()),
+            "B": pa.array([B] * n_rows, pa.int64()),
+            "L": pa.array([L] * n_rows, pa.int64()),
+            **columns,
+        }
+    )
+
+    # write then rename, so that an interrupted write never leaves a partial chunk
+    tmp_path = path.with_suffix(".tmp")
+    pa.parquet.write_table(table, tmp_path)
+    os.replace(tmp_path, path)
+
+    return _rejection_counts(columns)
+
+
+def simulate(
+    generator: DataGenerator,
+    grid: Iterable[Setting],
+    n_replicates: int,
+    f: real_function,
+    output_dir: Union[str, Path],
+    level: float = 0.05,
+    freqs: Optional[f64_1d] = None,
+    seed: int = 0,
+    n_jobs: int = 1,
+    chunk_size: int = 100,
+    tolerance: float = 1e-6,
+    spec: Optional[Hashable] = None,
+    cache_dir: Optional[Union[str, Path]] = None,
+) -> list[dict]:
+    """
+    Run the LRV test on n_replicates samples drawn by `generator` for each setting
+    (N, M, B, L) of the grid, and store the test statistics and decisions at the
+    given level in output_dir, one Parquet file per chunk of replicates.
+
+    The generator and f are sent to the worker processes, so they must be picklable
+    (module level functions or PolynomialTestFunction, not lambdas) when n_jobs > 1
+    (-1 for all the cpus). Chunks already present in output_dir are not recomputed. To resume safely, the
+    configuration stored in output_dir identifies f by its spec (`spec`, or `f.spec`
+    if it exists, which is then required), and the generator by its qualified name.
+
+    Returns the rejection rate of each statistic for each setting. For
+    is_positive_0, it is the average fraction of frequencies at which the test is
+    positive.
+    """
+    n_jobs = n_workers(n_jobs)
+    if spec is None:
+        spec = getattr(f, "spec", None)
+    if spec is None:
+        raise ValueError("A simulation requires a spec of the test function")
+
+    grid = [tuple(setting) for setting in grid]
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    config = {
+        "n_replicates": n_replicates,
+        "level": level,
+        "seed": seed,
+        "chunk_size": chunk_size,
+        "generator": f"{generator.__module__}.{generator.__qualname__}",
+        "f": repr(spec),
+        "freqs": None if freqs is None else np.asarray(freqs).tolist(),
+        "tolerance": tolerance,
+    }
+    check_config(output_dir, config)
+
+    counts = [dict.fromkeys(IS_POSITIVE_COLUMNS, 0.0) for _ in grid]
+
+    def add_counts(setting_index: int, chunk_counts: dict[str, float]) -> None:
+        for column, count in chunk_counts.items():
+            counts[setting_index][column] += count
+
+    # list the chunks to run, and aggregate the ones stored by a previous run
+    tasks = []
+    for setting_index, setting in enumerate(grid):
+        for start in range(0, n_replicates, chunk_size):
+            stop = min(start + chunk_size, n_replicates)
+            path = _part_path(output_dir, setting, start)
+            if path.exists():
+                stored = _pyarrow().parquet.read_table(
+                    path, columns=IS_POSITIVE_COLUMNS
+                )
+                add_counts(setting_index, _rejection_counts(stored.to_pydict()))
+            else:
+                task = (setting, start, stop, seed, level, path)
+                tasks.append((setting_index, task))
+
+    initargs = (generator, f, freqs, tolerance, spec, cache_dir)
+    if n_jobs == 1:
+        _init_worker(*initargs)
+        for setting_index, task in tasks:
+            add_counts(setting_index, _run_chunk(*task))
+    else:
+        with ProcessPoolExecutor(
+            n_jobs, initializer=_init_worker, initargs=initargs
+        ) as pool:
+            # bound the number of chunks in flight to keep the memory flat
+            pending = {}
+            for setting_index, task in tasks:
+                pending[pool.submit(_run_chunk, *task)] = setting_index
+                if len(pending) >= 2 * n_jobs:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        add_counts(pending.pop(future), future.result())
+            for future in list(pending):
+                add_counts(pending.pop(future), future.result())
+
+    return [
+        {
+            "N": N,
+            "M": M,
+            "B": B,
+            "L": L,
+            **{
+                column: count / n_replicates for column, count in setting_counts.items()
+            },
+        }
+        for (N, M, B, L), setting_counts in zip(grid, counts)
+    ]
+
+
+def load_simulations(output_dir: Union[str, Path]):
+    """
+    Load all the replicates stored in output_dir as a single pyarrow Table
+    """
+    pa = _pyarrow()
+    paths = sorted(Path(output_dir).glob("*.parquet"))
+    return pa.concat_tables([pa.parquet.read_table(path) for path in paths])
@@ -0,0 +1,26 @@
+import json
+from pathlib import Path
+
+"""
+Bookkeeping of the output directories of the batch runs (simulate and the command
+line), which can be resumed.
+"""
+
+
+def check_config(output_dir: Path, config: dict) -> None:
+    """
+    Make sure a resumed run uses the same configuration as the results stored in
+    output_dir, or store it if there are none
+    """
+    config_path = output_dir / "config.json"
+    if config_path.exists():
+        with open(config_path) as handle:
+            stored_config = json.load(handle)
+        if stored_config != config:
+            raise ValueError(
+                f"{output_dir} contains results of another configuration: "
+                f"{stored_config}"
+            )
+    else:
+        with open(config_path, "w") as handle:
+            json.dump(config, handle)
@@ -0,0 +1,103 @@
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+import numpy as np
+
+from lrv_test.coherence import default_freqs, dft, fourier_indices
+from lrv_test.lag_window import LagWindowEstimator, _compute_autocors
+from lrv_test.LRV import _lrv_result, _r_n_values
+from lrv_test.lss import coherence_LSSs
+from lrv_test.plan import LRVPlan, prepare
+from lrv_test.result import LRVResult
+from lrv_test.types import Backend, EigenMethod, f64_2d, real_function
+
+"""
+Sweep of the smoothing span B and of the lag window truncation L on the same data.
+
+The DFT of the data and its autocovariances up to the largest L are computed once.
+For each B, the smoothed periodograms are differences of a cumulative sum of the
+periodogram over the Fourier frequencies, and for each L the lag window estimator
+keeps the autocovariances up to lag L, so a sweep costs about one LRV call plus the
+eigenvalues of the coherency matrices for each B.
+"""
+
+
+@dataclass(frozen=True)
+class SweepResult:
+    results: dict[tuple[int, Optional[int]], LRVResult]  # keyed by (B, L)
+    plans: dict[int, LRVPlan]  # constants of the test for each B, i.e. c = M / B
+
+
+def _smoothed_periodograms(
+    periodogram_cumsum: np.ndarray, indices: np.ndarray
+) -> np.ndarray:
+    """
+    Mean of the periodogram over the B Fourier frequencies around each frequency,
+    of shape (n_freqs, M), from the cumulative sum of the periodogram over two
+    periods (the blocks of frequencies can wrap around).
+    """
+    B = indices.shape[1]
+    start = indices[:, 0]
+    return (periodogram_cumsum[start + B] - periodogram_cumsum[start]) / B
+
+
+def sweep(
+    y: f64_2d,
+    Bs: Iterable[int],
+    Ls: Iterable[Optional[int]],
+    f: real_function,
+    tolerance: float = 1e-6,
+    backend: Optional[Backend] = None,
+    method: EigenMethod = "svd",
+) -> SweepResult:
+    """
+    Compute the LRV statistics of y for every smoothing span B in Bs and lag window
+    truncation L in Ls (None to skip the r_n correction), on the default frequencies
+    of each B. In the notebooks, B = N ** alpha (odd) and L = N ** gamma.
+    """
+    N, M = y.shape
+    Bs, Ls = list(Bs), list(Ls)
+
+    xi = dft(y)
+    # cumulative sum over two periods, starting with 0
+    periodogram = np.abs(xi) ** 2
+    periodogram_cumsum = np.concatenate(
+        [np.zeros((1, M)), np.cumsum(np.concatenate([periodogram] * 2), axis=0)]
+    )
+
+    L_max = max((L for L in Ls if L is not None), default=None)
+    if L_max is not None:
+        autocors = _compute_autocors(y, L_max)
+
+    results, plans = {}, {}
+    for B in Bs:
+        plans[B] = plan = prepare(f, M, B, tolerance)
+        freqs = default_freqs(N, B)
+        indices = fourier_indices(freqs, B, N)
+
+        # same as coherence.half_coherences_from_dft, with the smoothed periodogram
+        # from the cumulative sum
+        S = _smoothed_periodograms(periodogram_cumsum, indices)
+        hC_hats = np.swapaxes(xi[indices], -1, -2) / np.sqrt(B * S[..., np.newaxis])
+        LSSs = coherence_LSSs(hC_hats, f, backend, method)
+
+        for L in Ls:
+            if L is None:
+                r_n = 0
+            else:
+                sd = LagWindowEstimator(autocors[L_max - L : L_max + L + 1])
+                r_n = _r_n_values(*sd.evaluate(freqs))
+
+            results[B, L] = _lrv_result(
+                N,
+                M,
+                B,
+                freqs,
+                LSSs,
+                r_n,
+                plan.f_against_mp,
+                plan.f_against_D,
+                plan.sigma,
+            )
+
+    return SweepResult(results, plans)
@@ -0,0 +1,166 @@
+import json
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Hashable, Optional, Union
+
+import numpy as np
+from numpy.polynomial import chebyshev
+
+from lrv_test.types import real_function
+
+"""
+Tables of the constants f_against_mp, f_against_D and sigma of a test function over
+a range of c = M / B.
+
+The constants are smooth functions of c on each side of c = 1, where the Marchenko-
+Pastur law gains an atom at 0, so over a range not containing 1 they are
+interpolated by Chebyshev polynomials from their values at the Chebyshev nodes of the range. The
+error of the interpolation is estimated when the table is built, from direct
+computations at the points halfway between the nodes and from the size of the last
+Chebyshev coefficients. A registered table then serves `prepare` in microseconds for
+any c in its range, as long as its error estimate is below the requested tolerance.
+"""
+
+# degree of the Chebyshev interpolation, there are TABLE_DEGREE + 1 nodes
+TABLE_DEGREE = 24
+
+# registered tables, keyed by the repr of the spec of the test function
+_tables: dict[str, "ConstantTable"] = {}
+
+
+@dataclass(frozen=True)
+class ConstantTable:
+    key: str  # repr of the spec of the test function
+    c_range: tuple[float, float]
+    # Chebyshev coefficients of f_against_mp, f_against_D and sigma over c_range,
+    # of shape (3, degree + 1)
+    coefficients: np.ndarray
+    # estimated maximum error of each interpolated constant over c_range
+    error_bounds: np.ndarray
+
+    def _x(self, c: float) -> float:
+        low, high = self.c_range
+        return (2 * c - low - high) / (high - low)
+
+    def covers(self, c: float, tolerance: float) -> bool:
+        low, high = self.c_range
+        return low <= c <= high and bool(np.all(self.error_bounds <= tolerance))
+
+    def __call__(self, c: float) -> tuple[float, float, float]:
+        values = chebyshev.chebval(self._x(c), self.coefficients.T)
+        return tuple(float(value) for value in values)
+
+    def save(self, path: Union[str, Path]) -> None:
+        content = {
+            "key": self.key,
+            "c_range": list(self.c_range),
+            "coefficients": self.coefficients.tolist(),
+            "error_bounds": self.error_bounds.tolist(),
+        }
+        with open(path, "w") as handle:
+            json.dump(content, handle)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "ConstantTable":
+        with open(path) as handle:
+            content = json.load(handle)
+        return cls(
+            content["key"],
+            tuple(content["c_range"]),
+            np.array(content["coefficients"]),
+            np.array(content["error_bounds"]),
+        )
+
+
+def _compute_checked(
+    f: real_function, c: float, tolerance: float
+) -> tuple[float, float, float]:
+    """
+    Constants at c, raising a RuntimeWarning of the integration as an error: the
+    error bounds of the table would not hold otherwise
+    """
+    # import here, plan depends on this module
+    from lrv_test.plan import _compute_constants
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", RuntimeWarning)
+        return _compute_constants(f, c, tolerance)
+
+
+def _compute_all(
+    f: real_function, cs: np.ndarray, tolerance: float, n_jobs: int
+) -> np.ndarray:
+    """Constants at each c, of shape (len(cs), 3)"""
+    n = len(cs)
+    if n_jobs == 1:
+        return np.array([_compute_checked(f, c, tolerance) for c in cs])
+    with ProcessPoolExecutor(n_jobs) as executor:
+        return np.array(
+            list(executor.map(_compute_checked, [f] * n, cs, [tolerance] * n))
+        )
+
+
+def build_table(
+    f: real_function,
+    c_range: tuple[float, float],
+    spec: Optional[Hashable] = None,
+    degree: int = TABLE_DEGREE,
+    tolerance: float = 1e-10,
+    n_jobs: int = 1,
+) -> ConstantTable:
+    """
+    Compute the constants of f at the Chebyshev nodes of c_range, a subset of (0, 1)
+    or of (1, inf), and at the points halfway between them to estimate the error, on
+    n_jobs processes (f must then be picklable if the processes are not forked).
+    tolerance is the one of the direct computations, and is included in the error
+    estimate. A direct computation that does not converge raises a RuntimeWarning
+    as an error.
+    """
+    if spec is None:
+        spec = getattr(f, "spec", None)
+    if spec is None:
+        raise ValueError("A table requires a spec of the test function")
+    low, high = c_range
+    if not 0 < low < high or low <= 1 <= high:
+        raise ValueError(
+            f"The range of c must be a subset of (0, 1) or (1, inf), got {c_range}"
+        )
+
+    # Chebyshev nodes of the first kind, and the points halfway between them
+    nodes = np.cos(np.pi * (np.arange(degree + 1) + 0.5) / (degree + 1))
+    checks = np.cos(np.pi * (np.arange(degree) + 1) / (degree + 1))
+    xs = np.concatenate([nodes, checks])
+    values = _compute_all(
+        f, (low + high) / 2 + (high - low) / 2 * xs, tolerance, n_jobs
+    )
+
+    coefficients = chebyshev.chebfit(nodes, values[: degree + 1], degree).T
+    interpolated = chebyshev.chebval(checks, coefficients.T).T
+    check_errors = np.max(np.abs(interpolated - values[degree + 1 :]), axis=0)
+    tail = np.sum(np.abs(coefficients[:, -2:]), axis=1)
+    error_bounds = np.maximum(check_errors, tail) + tolerance
+
+    return ConstantTable(repr(spec), (low, high), coefficients, error_bounds)
+
+
+def register_table(table: ConstantTable) -> None:
+    """Serve the constants of the table's test function from the table in prepare"""
+    _tables[table.key] = table
+
+
+def clear_tables() -> None:
+    _tables.clear()
+
+
+def lookup(
+    spec: Optional[Hashable], c: float, tolerance: float
+) -> Optional[tuple[float, float, float]]:
+    """Interpolated constants, if a registered table covers c at this tolerance"""
+    if spec is None or not _tables:
+        return None
+    table = _tables.get(repr(spec))
+    if table is None or not table.covers(c, tolerance):
+        return None
+    return table(c)
@@ -0,0 +1,182 @@
+from typing import Callable
+
+import numpy as np
+
+from lrv_test.polynomial import PolynomialTestFunction
+from lrv_test.types import real_function
+
+"""
+Trace based computation of the LSSs, without the eigenvalues of the coherency
+matrices.
+
+With G the min(M, B) x min(M, B) gram matrix of a half coherency matrix, the LSS is
+tr(f(G)) / min(M, B). For a polynomial f, it is a combination of the power traces
+tr(G^k), which are computed exactly with matrix products. For any other f, tr(f(G))
+is estimated by stochastic Lanczos quadrature: Hutchinson estimation with random
+probes v of tr(f(G)) = E[v^H f(G) v], where each v^H f(G) v is approximated by the
+Gauss quadrature of a few Lanczos steps, which only needs products of the half
+coherency matrix and its adjoint with vectors.
+
+An error e on an LSS is an error M * e / sigma on the statistic t_stats_0 of its
+frequency, so LRV sets the target standard error of the LSSs to
+trace_tolerance * sigma / M, where trace_tolerance is the target on t_stats_0.
+
+Each probe costs n_steps products with G, while the eigenvalues cost about min(M, B)
+such products, so at most min(M, B) / n_steps probes are drawn: the stochastic
+estimation only pays off when min(M, B) is large compared to n_steps * n_probes.
+The LSSs that do not reach the target standard error within this budget, and all
+of them when a single round of probes exceeds it, are computed from the exact
+eigenvalues instead, so that an inaccurate estimate is never returned.
+"""
+
+# default number of Lanczos steps
+LANCZOS_STEPS = 20
+# default number of probes drawn at each round of the Hutchinson estimation
+N_PROBES = 16
+MAX_PROBES = 1024
+# default target standard error of the stochastic LSS estimates
+TRACE_TOLERANCE = 1e-3
+# default target standard error of the statistics t_stats_0 in LRV
+STATISTIC_TOLERANCE = 1e-2
+
+
+def _gram(hC_hats: np.ndarray) -> np.ndarray:
+    hC_hats_H = np.conj(np.swapaxes(hC_hats, -1, -2))
+    M, B = hC_hats.shape[-2:]
+    return hC_hats @ hC_hats_H if M <= B else hC_hats_H @ hC_hats
+
+
+def _gram_matvec(hC_hats: np.ndarray) -> Callable[[np.ndarray], np.ndarray]:
+    """Product of the gram matrices with a stack of vectors, without forming them"""
+    hC_hats_H = np.conj(np.swapaxes(hC_hats, -1, -2))
+    M, B = hC_hats.shape[-2:]
+    if M <= B:
+        return lambda v: hC_hats @ (hC_hats_H @ v)
+    return lambda v: hC_hats_H @ (hC_hats @ v)
+
+
+def power_traces(hC_hats: np.ndarray, degree: int) -> np.ndarray:
+    """
+    tr(G^k) for k = 0..degree, of shape (..., degree + 1). With P_j = G^j,
+    tr(G^2j) = |P_j|_F^2 and tr(G^(2j+1)) = <P_j, P_j+1>_F, so only the powers up to
+    degree / 2 are computed.
+
+    The K x K gram matrix G, K = min(M, B), and its powers are formed explicitly, in
+    O(K^2 max(M, B) + degree K^3) operations, which avoids the SVD but is not
+    matrix-free.
+    """
+    G = _gram(hC_hats)
+    powers = [np.broadcast_to(np.eye(G.shape[-1]), G.shape), G]
+    while 2 * (len(powers) - 1) < degree:
+        powers.append(powers[-1] @ G)
+
+    traces = np.empty((*G.shape[:-2], degree + 1))
+    for k in range(degree + 1):
+        P_j, P_k = powers[k // 2], powers[k - k // 2]
+        traces[..., k] = np.real(np.sum(P_j * np.conj(P_k), axis=(-2, -1)))
+    return traces
+
+
+def _lanczos_quadrature(
+    matvec: Callable[[np.ndarray], np.ndarray],
+    probes: np.ndarray,
+    n_steps: int,
+    f: real_function,
+) -> np.ndarray:
+    """
+    Gauss quadrature of v^H f(G) v / |v|^2 for probes of shape (..., K, n_probes),
+    from n_steps Lanczos steps with full reorthogonalization.
+    """
+    q = probes / np.linalg.norm(probes, axis=-2, keepdims=True)
+    Q = [q]
+    alphas, betas = [], []
+    for step in range(n_steps):
+        w = matvec(q)
+        alphas.append(np.real(np.sum(np.conj(q) * w, axis=-2)))
+        for q_i in Q:
+            w = w - q_i * np.sum(np.conj(q_i) * w, axis=-2, keepdims=True)
+        if step == n_steps - 1:
+            break
+
+        beta = np.linalg.norm(w, axis=-2)
+        # on breakdown, the Krylov space is invariant: the next vectors are 0 and
+        # the following Ritz values get a zero weight
+        is_invariant = beta <= 1e-12 * np.maximum(np.abs(alphas[0]), 1)
+        beta = np.where(is_invariant, 0, beta)
+        q = np.where(
+            is_invariant[..., None, :],
+            0,
+            w / np.where(is_invariant, 1, beta)[..., None, :],
+        )
+        betas.append(beta)
+        Q.append(q)
+
+    # tridiagonal Lanczos matrices, of shape (..., n_probes, n_steps, n_steps)
+    T = np.zeros((*alphas[0].shape, n_steps, n_steps))
+    diagonal = np.arange(n_steps)
+    T[..., diagonal, diagonal] = np.stack(alphas, axis=-1)
+    if betas:
+        betas = np.stack(betas, axis=-1)
+        T[..., diagonal[1:], diagonal[:-1]] = betas
+        T[..., diagonal[:-1], diagonal[1:]] = betas
+
+    θ, U = np.linalg.eigh(T)
+    weights = U[..., 0, :] ** 2
+    # Ritz values are nonnegative up to rounding errors, as the eigenvalues of G
+    values = f(np.clip(θ, 0, None))
+    return np.sum(np.where(weights > 0, weights * values, 0), axis=-1)
+
+
+def _exact_LSSs(hC_hats: np.ndarray, f: real_function) -> np.ndarray:
+    # eigenvalues are nonnegative up to rounding errors
+    λ = np.clip(np.linalg.eigvalsh(_gram(hC_hats)), 0, None)
+    return np.mean(f(λ), axis=-1)
+
+
+def trace_LSSs(
+    hC_hats: np.ndarray,
+    f: real_function,
+    tolerance: float = TRACE_TOLERANCE,
+    n_steps: int = LANCZOS_STEPS,
+    n_probes: int = N_PROBES,
+    max_probes: int = MAX_PROBES,
+    seed: int = 0,
+) -> np.ndarray:
+    """
+    LSSs mean(f(λ)) of a stack of half coherency matrices of shape (..., M, B),
+    computed from traces rather than eigenvalues. They are exact for a
+    PolynomialTestFunction, and otherwise estimated by stochastic Lanczos quadrature,
+    drawing n_probes probes at a time until the standard error of every LSS is below
+    tolerance, or the budget of min(max_probes, min(M, B) // n_steps) probes is
+    spent, in which case the LSSs above tolerance are computed from the exact
+    eigenvalues.
+    """
+    K = min(hC_hats.shape[-2:])
+    if isinstance(f, PolynomialTestFunction):
+        traces = power_traces(hC_hats, f.degree)
+        return traces @ np.array(f.coefficients) / K
+
+    # beyond this number of probes, the eigenvalues are cheaper, and the Lanczos
+    # steps would span the whole space when K <= n_steps
+    max_probes = min(max_probes, K // n_steps)
+    if K <= n_steps or max_probes < n_probes:
+        return _exact_LSSs(hC_hats, f)
+
+    matvec = _gram_matvec(hC_hats)
+    rng = np.random.default_rng(seed)
+    estimates = []
+    while (len(estimates) + 1) * n_probes <= max_probes:
+        # Rademacher probes, |v|^2 = K so that the quadratures average to tr(f(G)) / K
+        probes = rng.choice([-1.0, 1.0], size=(*hC_hats.shape[:-2], K, n_probes))
+        estimates.append(_lanczos_quadrature(matvec, probes, n_steps, f))
+
+        samples = np.concatenate(estimates, axis=-1)
+        standard_errors = np.std(samples, axis=-1, ddof=1) / np.sqrt(samples.shape[-1])
+        if np.all(standard_errors <= tolerance):
+            break
+
+    LSSs = np.mean(samples, axis=-1)
+    is_inaccurate = standard_errors > tolerance
+    if np.any(is_inaccurate):
+        LSSs[is_inaccurate] = _exact_LSSs(hC_hats[is_inaccurate], f)
+    return LSSs
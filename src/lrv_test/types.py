@@ -1,4 +1,4 @@
-from typing import Callable, NewType
+from typing import Callable, Literal, NewType
 
 import numpy as np
 
@@ -8,3 +8,7 @@ complex_1d = NewType("complex_1d", np.ndarray)
 complex_2d = NewType("complex_2d", np.ndarray)
 
 real_function = tuple[Callable[[float], float]]
+
+Backend = Literal["numpy", "jax", "mlx"]
+EigenMethod = Literal["svd", "gram", "trace"]
+Precision = Literal["single", "double"]
@@ -1,11 +1,17 @@
-from typing import Callable
+import warnings
+from functools import lru_cache
+from typing import Callable, Union
 
 import numpy as np
-from scipy.integrate import quad
 
 from lrv_test.contour import Contour
+from lrv_test.instrument import count, counted
 from lrv_test.types import real_function
 
+# multiple of the machine epsilon, times the sum of the absolute values of the terms,
+# below which the trapezoidal rule is considered converged
+ROUNDING_FACTOR = 64
+
 
 def derivative(f: real_function) -> real_function:
     epsilon = 1e-6
@@ -22,15 +28,76 @@ def action_D_on_f(
     # against f
     y = 1e-20
     low, high = support
-    value, error = quad(lambda x: f(x) * np.imag(g(x + 1j * y)) / np.pi, low, high)
+    integrand = counted(lambda x: f(x) * np.imag(g(x + 1j * y)) / np.pi)
+    # imported here, as scipy.integrate is slow to import
+    from scipy.integrate import quad
+
+    value, error = quad(integrand, low, high)
     assert error < tolerance
     return value
 
 
+@lru_cache(maxsize=None)
+def _jacobi_rule(n_nodes: int, alpha: float, beta: float) -> tuple:
+    from scipy.special import roots_jacobi
+
+    return roots_jacobi(n_nodes, alpha, beta)
+
+
+def action_D_on_f_gauss_jacobi(
+    f: real_function,
+    g: Callable[[np.ndarray], np.ndarray],
+    support: tuple[float, float],
+    tolerance: float,
+    n_nodes: int = 32,
+    max_nodes: int = 2**12,
+) -> float:
+    """
+    Same as action_D_on_f, with Gauss-Jacobi quadratures evaluating f and the
+    vectorized transform g on all the nodes at once.
+
+    The Marchenko-Pastur density vanishes like a square root at the edges of its
+    support, except at a hard edge at 0 (c = 1) where it diverges like x^-1/2, so
+    these factors are the weights of the quadrature and the rest of the integrand
+    is smooth. The number of nodes is doubled until two successive estimates agree,
+    which takes more nodes when the support nearly touches 0 (c close to 1). When
+    they still disagree with max_nodes nodes, for instance when f is itself singular
+    at the hard edge (log at c = 1), the integral is computed by action_D_on_f.
+    """
+    low, high = support
+    half_width = (high - low) / 2
+    alpha = 0.5
+    beta = -0.5 if low == 0 else 0.5
+
+    def integral(n: int) -> float:
+        # x = low + half_width * (1 + u), with weights (1 - u)^alpha (1 + u)^beta
+        u, weights = _jacobi_rule(n, alpha, beta)
+        x = low + half_width * (1 + u)
+        density = np.imag(g(x + 1j * 1e-20)) / np.pi
+        edge_factors = (1 - u) ** alpha * (1 + u) ** beta
+        count("integrand_evaluations", n)
+        return half_width * np.sum(weights * f(x) * density / edge_factors)
+
+    value = integral(n_nodes)
+    while n_nodes < max_nodes:
+        n_nodes *= 2
+        new_value = integral(n_nodes)
+        error = abs(new_value - value)
+        value = new_value
+        if error <= 1e-10 * max(1, abs(value)):
+            return value
+
+    return action_D_on_f(f, g, support, tolerance)
+
+
 def contour_integral(integrand: Callable, contour: Contour) -> complex:
     integrand_reparametrized = lambda t: integrand(contour.z(t)) * contour.dz(t)
+    count("contour_integrals")
+
+    from scipy.integrate import quad
+
     return quad(
-        lambda z: integrand_reparametrized(z),
+        counted(integrand_reparametrized),
         0,
         1,
         epsabs=1e-6,
@@ -39,5 +106,57 @@ def contour_integral(integrand: Callable, contour: Contour) -> complex:
     )[0]
 
 
-def psi(w: float, c: float) -> float:
+def contour_integral_trapezoidal(
+    integrand: Callable,
+    contour: Contour,
+    tolerance: float = 1e-10,
+    n_nodes: int = 32,
+    max_nodes: int = 2**16,
+) -> Union[complex, np.ndarray]:
+    """
+    Trapezoidal rule on equispaced values of the contour parameter, which converges
+    exponentially fast for analytic integrands on a closed contour. The integrand is
+    evaluated on a whole array of nodes at once, and can return an array of shape
+    (..., n_nodes) to integrate several integrands on the same nodes.
+
+    The number of nodes is doubled (reusing the previous evaluations) until two
+    successive estimates of each integral are within tolerance, relative to the
+    integral, or within the rounding errors of the sum of its terms.
+    """
+    t_min, t_max = contour.t_range
+    period = t_max - t_min
+    count("contour_integrals")
+
+    def partial_sums(t: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        count("integrand_evaluations", len(t))
+        terms = integrand(contour.z(t)) * contour.dz(t)
+        return np.sum(terms, axis=-1), np.sum(np.abs(terms), axis=-1)
+
+    total, magnitude = partial_sums(t_min + period * np.arange(n_nodes) / n_nodes)
+    value = total * period / n_nodes
+    while n_nodes < max_nodes:
+        # the new nodes are the midpoints of the current ones
+        midpoints = t_min + period * (np.arange(n_nodes) + 0.5) / n_nodes
+        new_total, new_magnitude = partial_sums(midpoints)
+        total, magnitude = total + new_total, magnitude + new_magnitude
+        n_nodes *= 2
+        new_value = total * period / n_nodes
+
+        error = np.abs(new_value - value)
+        value = new_value
+        # an integral much smaller than its terms cannot be resolved beyond the
+        # rounding errors of their sum
+        rounding = ROUNDING_FACTOR * np.finfo(float).eps * magnitude * period / n_nodes
+        if np.all(
+            error <= np.maximum(tolerance * np.maximum(1, np.abs(value)), rounding)
+        ):
+            return value
+
+    warnings.warn(
+        f"The trapezoidal rule did not converge with {max_nodes} nodes", RuntimeWarning
+    )
+    return value
+
+
+def psi(w: Union[complex, np.ndarray], c: float) -> Union[complex, np.ndarray]:
     return (w + 1) * (w + c) / w
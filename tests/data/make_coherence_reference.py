@@ -0,0 +1,91 @@
+import argparse
+import pickle
+from pathlib import Path
+
+import numpy as np
+
+"""
+Builds coherence_reference.npz, the reference values of test_coherence.py computed
+with spectral_coherence, so that the tests check them without the library.
+
+The default frequencies are read from the LRV results pickled by the notebooks,
+which were computed with spectral_coherence: the MLX arrays are read back as NumPy
+arrays, so MLX is not needed (lrv_test must be importable). When spectral_coherence is installed, the half
+coherency matrices of a seeded time series are stored too.
+"""
+
+ROOT = Path(__file__).resolve().parents[2]
+RESULTS = ROOT / "notebooks" / "plots" / "clt_arma_large_alpha_nu" / "results.pkl"
+OUTPUT = Path(__file__).with_name("coherence_reference.npz")
+
+# time series of the stored half coherency matrices
+SEED, N, M, B = 0, 300, 4, 21
+
+
+class _Array:
+    """Stand-in for mlx.core.array, whose pickled state is a NumPy array"""
+
+    def __setstate__(self, state):
+        self.array = state[0] if isinstance(state, tuple) else state
+
+
+class _Unpickler(pickle.Unpickler):
+    def find_class(self, module, name):
+        if module.startswith("mlx"):
+            return _Array
+        return super().find_class(module, name)
+
+
+def default_freqs_reference(path: Path) -> dict[str, np.ndarray]:
+    """N, B and the default frequencies of each setting of the pickled results"""
+    with open(path, "rb") as f:
+        results = _Unpickler(f).load()
+
+    settings = {}
+    for result in results:
+        if result["freqs"] is None:
+            lrv = result["lrv"]
+            settings[lrv.N, lrv.B] = np.asarray(lrv.freqs.array)
+
+    keys = sorted(settings)
+    return {
+        "N": np.array([N for N, _ in keys]),
+        "B": np.array([B for _, B in keys]),
+        "n_freqs": np.array([settings[key].size for key in keys]),
+        "freqs": np.concatenate([settings[key] for key in keys]),
+    }
+
+
+def half_coherences_reference() -> dict[str, np.ndarray]:
+    """Half coherency matrices of a seeded time series, with spectral_coherence"""
+    # import here, the library is only needed to store the half coherency matrices
+    import mlx.core as mx
+    import spectral_coherence
+
+    y = np.random.default_rng(SEED).standard_normal((N, M))
+    hC_hats, freqs = spectral_coherence.half_coherences(mx.array(y), B)
+    return {
+        "y": y,
+        "hC_hats": np.stack([np.array(hC_hat) for hC_hat in hC_hats]),
+        "hC_freqs": np.array(freqs),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Reference values of the coherence tests"
+    )
+    parser.add_argument("--results", type=Path, default=RESULTS)
+    parser.add_argument("--output", type=Path, default=OUTPUT)
+    args = parser.parse_args()
+
+    reference = default_freqs_reference(args.results)
+    try:
+        reference |= half_coherences_reference()
+    except ImportError:
+        print("spectral_coherence is not installed: only the frequencies are stored")
+    np.savez_compressed(args.output, **reference)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import numpy as np
 import pytest
-from lrv_test.LRV import _r_n, _v_n
+from lrv_test.LRV import LRV, LRV_multi, _compute_r_n, _lrv_result, _r_n, _v_n
+from lrv_test.utils import derivative
 
 
 @pytest.mark.parametrize(
@@ -24,3 +25,65 @@ def test__v_n(B, N, expected):
 )
 def test__r_n(sd, sd_prime, freq, expected):
     assert _r_n(sd, sd_prime)(freq) == expected
+
+
+def test_LRV_multi():
+    rng = np.random.default_rng(0)
+    y = rng.standard_normal((500, 4)) + 1j * rng.standard_normal((500, 4))
+    fs = {"square": lambda x: (x - 1) ** 2, "log": np.log}
+
+    results = LRV_multi(y, 21, fs, L=2)
+    for key, f in fs.items():
+        expected = LRV(y, 21, f, L=2)
+        assert results[key].thetas == pytest.approx(expected.thetas)
+        assert results[key].t_stat_3 == pytest.approx(expected.t_stat_3)
+
+    assert len(LRV_multi(y, 21, list(fs.values()), L=2)) == 2
+
+
+@pytest.mark.parametrize(
+    "sd",
+    [
+        # vectorized, a single density for all the features
+        lambda nu: 1 / np.abs(1 - 0.5 * np.exp(-2j * np.pi * nu)) ** 2,
+        # vectorized, one density per feature
+        lambda nu: np.multiply.outer(2 + np.cos(2 * np.pi * nu), [1, 2, 3]),
+        # scalar only
+        lambda nu: np.array([2 + np.sin(2 * np.pi * float(nu)), 3.0]),
+    ],
+)
+def test__compute_r_n(sd):
+    freqs = np.array([0.05, 0.2, 0.35])
+    expected = [_r_n(sd, derivative(sd))(freq) for freq in freqs]
+    assert _compute_r_n(sd, freqs) == pytest.approx(expected)
+
+    # memoized for this sd and these frequencies
+    assert _compute_r_n(sd, freqs) is _compute_r_n(sd, freqs)
+
+
+@pytest.mark.parametrize("N, M, B", [(2000, 20, 41), (4000, 60, 121)])
+def test_LRV_single_precision(N, M, B):
+    rng = np.random.default_rng(0)
+    y = rng.standard_normal((N, M))
+    f = lambda x: (x - 1) ** 2
+
+    double = LRV(y, B, f, L=5, backend="numpy")
+    single = LRV(y, B, f, L=5, backend="numpy", precision="single")
+    assert single.LSSs.dtype == np.float32
+    assert single.thetas.dtype == np.float64
+
+    # the LSSs are accurate up to a few float32 epsilons, so the statistics, which
+    # scale the thetas by M / sigma, lose about 7 - log10(M) significant digits
+    eps = np.finfo(np.float32).eps
+    assert np.max(np.abs(single.LSSs - double.LSSs)) < 10 * eps
+    assert np.max(np.abs(single.t_stats_0 - double.t_stats_0)) < 10 * M * eps
+    assert single.t_stat_3 == pytest.approx(double.t_stat_3, rel=1e-4)
+
+    # the thetas are computed from the float32 LSSs in double precision, even with
+    # Python float constants
+    constants = (0.1, 0.2, 0.3)
+    thetas = _lrv_result(N, M, B, single.freqs, single.LSSs, 0, *constants).thetas
+    expected = _lrv_result(
+        N, M, B, single.freqs, single.LSSs.astype(np.float64), 0, *constants
+    ).thetas
+    assert np.array_equal(thetas, expected)
@@ -0,0 +1,58 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+from lrv_test.backends import resolve_backend
+from lrv_test.lss import coherence_eigenvalues
+
+
+def test_resolve_backend(monkeypatch):
+    monkeypatch.delenv("LRV_TEST_BACKEND", raising=False)
+    assert resolve_backend() == "numpy"
+    assert resolve_backend("jax") == "jax"
+
+    monkeypatch.setenv("LRV_TEST_BACKEND", "mlx")
+    assert resolve_backend() == "mlx"
+    assert resolve_backend("numpy") == "numpy"
+
+    monkeypatch.setenv("LRV_TEST_BACKEND", "torch")
+    with pytest.raises(ValueError):
+        resolve_backend()
+
+
+def test_backend_from_environment(monkeypatch):
+    rng = np.random.default_rng(0)
+    hC_hats = rng.standard_normal((2, 3, 5)) + 1j * rng.standard_normal((2, 3, 5))
+
+    monkeypatch.setenv("LRV_TEST_BACKEND", "jax")
+    λ = coherence_eigenvalues(hC_hats)
+    assert λ == pytest.approx(coherence_eigenvalues(hC_hats, "numpy"), rel=1e-4)
+
+
+def test_lazy_imports():
+    # the numpy backend does not load the heavy dependencies
+    script = """
+import sys
+import numpy as np
+from lrv_test import LRV
+
+y = np.random.default_rng(0).standard_normal((200, 4))
+LRV(y, 21, lambda x: (x - 1) ** 2, L=2)
+heavy = ["jax", "mlx", "spectral_coherence", "pydantic", "scipy.stats"]
+print(",".join(name for name in heavy if name in sys.modules))
+"""
+    environment = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(sys.path),
+        "LRV_TEST_BACKEND": "numpy",
+    }
+    process = subprocess.run(
+        [sys.executable, "-c", script],
+        env=environment,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    assert process.stdout.strip() == ""
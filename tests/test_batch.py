@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+from lrv_test.batch import LRVResultBatch
+from lrv_test.result import LRVResult
+
+
+def make_result(seed, n_freqs=6):
+    rng = np.random.default_rng(seed)
+    t_stats_0 = rng.standard_normal(n_freqs)
+    return LRVResult(
+        1000,
+        10,
+        21,
+        np.linspace(-0.4, 0.4, n_freqs),
+        rng.standard_normal(n_freqs),
+        0.01,
+        rng.standard_normal(n_freqs),
+        1.5,
+        0.2,  # scalar corrections, when r_n is skipped
+        t_stats_0,
+        *(3 * rng.standard_normal(4) + [0, 0, n_freqs, 0]),
+    )
+
+
+@pytest.fixture
+def results():
+    return [make_result(seed) for seed in range(40)]
+
+
+def test_append(results):
+    batch = LRVResultBatch(6, capacity=1)
+    batch.extend(results)
+
+    assert len(batch) == 40
+    assert batch.t_stat_3 == pytest.approx([r.t_stat_3 for r in results])
+    assert batch.corrections.shape == (40, 6)
+    assert batch[3].thetas == pytest.approx(results[3].thetas)
+    assert batch[-1].t_stat_1 == results[-1].t_stat_1
+
+
+def test_append_wrong_n_freqs(results):
+    batch = LRVResultBatch.from_results(results)
+    with pytest.raises(ValueError):
+        batch.append(make_result(0, n_freqs=7))
+
+
+def test_is_positive(results):
+    batch = LRVResultBatch.from_results(results)
+    for i in range(5):
+        expected = [getattr(r, f"is_positive_{i}")(0.1) for r in results]
+        assert (getattr(batch, f"is_positive_{i}")(0.1) == expected).all()
+    for i in range(1, 5):
+        expected = [getattr(r, f"p_value_{i}")() for r in results]
+        assert getattr(batch, f"p_value_{i}")() == pytest.approx(expected)
+
+
+def test_save_load(results, tmp_path):
+    batch = LRVResultBatch.from_results(results)
+    batch.save(tmp_path)
+
+    loaded = LRVResultBatch.load(tmp_path)
+    assert isinstance(loaded.t_stats_0, np.memmap)
+    for name, column in batch.to_numpy().items():
+        assert (getattr(loaded, name) == column).all()
+
+    # appending to a memory mapped batch copies it in memory
+    loaded.append(results[0])
+    assert len(loaded) == 41
+
+
+def test_to_arrow(results):
+    pytest.importorskip("pyarrow")
+    table = LRVResultBatch.from_results(results).to_arrow()
+    assert table.num_rows == 40
+    assert table["t_stats_0"][2].as_py() == pytest.approx(list(results[2].t_stats_0))
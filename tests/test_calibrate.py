@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from lrv_test.calibrate import _chunk_size, _phase_layout, _random_phases, calibrate
+from lrv_test.LRV import LRV
+from lrv_test.polynomial import PolynomialTestFunction
+
+
+@pytest.fixture
+def y():
+    rng = np.random.default_rng(0)
+    return rng.standard_normal((300, 4))
+
+
+def test_calibrate(y):
+    f = PolynomialTestFunction.from_roots((1, 1))
+    calibration = calibrate(y, 21, f, n_resamples=40, L=2, chunk_size=15)
+
+    expected = LRV(y, 21, f, L=2, backend="numpy")
+    for i in range(1, 5):
+        observed = getattr(calibration.observed, f"t_stat_{i}")
+        assert observed == pytest.approx(getattr(expected, f"t_stat_{i}"))
+
+    assert calibration.t_stats.shape == (40, 4)
+    assert np.isfinite(calibration.t_stats).all()
+    for i in range(1, 5):
+        assert 0 < calibration.p_value(i) <= 1
+        lower, upper = calibration.critical_values(i, 0.1)
+        assert lower < upper
+
+    # the surrogates do not depend on the chunking nor on the number of workers
+    other = calibrate(y, 21, f, n_resamples=40, L=2, n_jobs=2)
+    assert other.t_stats == pytest.approx(calibration.t_stats)
+
+
+def test_chunk_size():
+    xi = np.zeros((8000 // 381, 381, 190), dtype=complex)
+    # two complex values per DFT value
+    assert _chunk_size(xi, 2**30) == 2**30 // (2 * xi.size * 16)
+    assert _chunk_size(xi, 1) == 1
+
+
+def test_random_phases_hermitian():
+    # the DFT of a real series is Hermitian, and so is the one of its surrogates
+    N, M = 10, 3
+    y = np.random.default_rng(0).standard_normal((N, M))
+    indices = np.array([[0, 1, 2], [8, 9, 5]])
+    xi = np.fft.fft(y, axis=0)[indices]
+    layout = _phase_layout(indices, N, is_real=True)
+
+    phases = _random_phases(np.random.default_rng(1), M, layout)
+    surrogate = xi * np.exp(1j * phases)
+    assert surrogate[1, 1] == pytest.approx(np.conj(surrogate[0, 1]))
+    assert surrogate[1, 0] == pytest.approx(np.conj(surrogate[0, 2]))
+    assert np.imag(surrogate[0, 0]) == pytest.approx(0)
+    assert np.imag(surrogate[1, 2]) == pytest.approx(0)
+    assert np.abs(surrogate) == pytest.approx(np.abs(xi))
@@ -0,0 +1,96 @@
+import json
+import numpy as np
+import pytest
+from lrv_test.cli import _n_features, build_test_function, main
+from lrv_test.config.run import RunConfig
+from lrv_test.LRV import LRV
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    rng = np.random.default_rng(0)
+    ys = [rng.standard_normal((400, M)) for M in (5, 5, 8)]
+    paths = [tmp_path / "a.npy", tmp_path / "b.npz", tmp_path / "c.parquet"]
+    np.save(paths[0], ys[0])
+    np.savez(paths[1], y=ys[1])
+    pq.write_table(pa.table({f"y{m}": ys[2][:, m] for m in range(8)}), paths[2])
+    return ys, paths
+
+
+@pytest.mark.parametrize("f", ["(x - 1) ** 2", [1, -2, 1]])
+def test_main(tmp_path, inputs, capsys, f):
+    ys, paths = inputs
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps({"B": 21, "L": 3, "f": f}))
+    output = tmp_path / "output"
+
+    main([str(config_path), *map(str, paths), "-o", str(output)])
+    assert capsys.readouterr().out.startswith("3 files (0 skipped)")
+
+    table = pq.read_table(
+        output / "results", columns=["input", "t_stat_3", "p_value_3"]
+    )
+    t_stats = dict(zip(table["input"].to_pylist(), table["t_stat_3"].to_pylist()))
+    for y, path in zip(ys, paths):
+        expected = LRV(y, 21, lambda x: (x - 1) ** 2, L=3)
+        assert t_stats[str(path.resolve())] == pytest.approx(expected.t_stat_3)
+
+    # a rerun skips the completed inputs, and reruns the changed ones
+    np.save(paths[0], ys[0][:300])
+    main([str(config_path), *map(str, paths), "-o", str(output), "-j", "2"])
+    assert capsys.readouterr().out.startswith("1 files (2 skipped)")
+    assert len(pq.read_table(output / "results")) == 3
+
+
+def test_main_config_change(tmp_path, inputs):
+    _, paths = inputs
+    output = tmp_path / "output"
+    for B in (21, 31):
+        config_path = tmp_path / f"config_{B}.json"
+        config_path.write_text(json.dumps({"B": B, "f": "x ** 2"}))
+        if B == 31:
+            with pytest.raises(ValueError, match="another configuration"):
+                main([str(config_path), str(paths[0]), "-o", str(output)])
+        else:
+            main([str(config_path), str(paths[0]), "-o", str(output)])
+
+
+@pytest.mark.parametrize(
+    "expression, value",
+    [
+        ("np.log1p(x)", np.log(2)),
+        ("-(x - 3) ** 2 / 2", -2),
+        ("np.sqrt(x) * np.pi", np.pi),
+    ],
+)
+def test_build_test_function(expression, value):
+    f = build_test_function(RunConfig(B=21, f=expression))
+    assert f(np.array([1.0])) == pytest.approx(value)
+
+
+@pytest.mark.parametrize(
+    "expression",
+    [
+        "__import__('os').getcwd()",
+        "np.lib.format",
+        "np.load('y.npy')",
+        "x.__class__",
+        "(lambda: 1)()",
+        "np.log(x, out=x)",
+        "'x'",
+        "x +",
+    ],
+)
+def test_invalid_expression(expression):
+    # only arithmetic on x, numbers and NumPy ufuncs is allowed
+    with pytest.raises(ValueError, match="expression"):
+        RunConfig(B=21, f=expression)
+
+
+def test_n_features(inputs):
+    _, paths = inputs
+    config = RunConfig(B=21, f="x")
+    assert [_n_features(path, config) for path in paths] == [5, 5, 8]
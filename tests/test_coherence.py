@@ -0,0 +1,77 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+from lrv_test.coherence import default_freqs, fourier_indices, half_coherences
+
+
+@pytest.mark.parametrize(
+    "freqs, B, N, expected",
+    [
+        ([0.5], 3, 10, [[4, 5, 6]]),
+        ([0, 0.25], 3, 8, [[7, 0, 1], [1, 2, 3]]),
+        ([0.1], 4, 10, [[0, 1, 2, 3]]),
+    ],
+)
+def test_fourier_indices(freqs, B, N, expected):
+    assert (fourier_indices(freqs, B, N) == expected).all()
+
+
+def test_half_coherences():
+    rng = np.random.default_rng(0)
+    y = rng.standard_normal((2, 300, 4))
+    B = 21
+
+    hC_hats, freqs = half_coherences(y, B)
+    assert (freqs == default_freqs(300, B)).all()
+    assert hC_hats.shape == (2, len(freqs), 4, B)
+
+    # the coherency matrices have a unit diagonal
+    coherences = hC_hats @ np.conj(np.swapaxes(hC_hats, -1, -2))
+    assert np.diagonal(coherences, axis1=-2, axis2=-1) == pytest.approx(1)
+
+    # a stack of time series gives the same as each time series
+    assert half_coherences(y[1], B)[0] == pytest.approx(hC_hats[1])
+
+
+def test_half_coherences_reference():
+    # spectral_coherence is the reference implementation of the coherency matrices
+    spectral_coherence = pytest.importorskip("spectral_coherence")
+    mx = pytest.importorskip("mlx.core")
+    y = np.random.default_rng(0).standard_normal((300, 4))
+    B = 21
+
+    expected, expected_freqs = spectral_coherence.half_coherences(mx.array(y), B)
+    expected = np.stack([np.array(hC_hat) for hC_hat in expected])
+    hC_hats, freqs = half_coherences(y, B)
+    assert freqs == pytest.approx(np.asarray(expected_freqs), rel=1e-12)
+
+    # MLX computes in single precision by default
+    rtol = 1e-12 if expected.dtype == np.complex128 else 1e-5
+    assert np.allclose(hC_hats, expected, rtol=rtol, atol=rtol)
+
+
+@pytest.fixture(scope="module")
+def reference():
+    # values computed once with spectral_coherence, see data/make_coherence_reference.py
+    with np.load(Path(__file__).parent / "data" / "coherence_reference.npz") as data:
+        return dict(data)
+
+
+def test_default_freqs_reference(reference):
+    expected = np.split(reference["freqs"], np.cumsum(reference["n_freqs"])[:-1])
+    for N, B, expected_freqs in zip(reference["N"], reference["B"], expected):
+        # the reference frequencies were computed in single precision
+        assert default_freqs(N, B) == pytest.approx(expected_freqs, abs=1e-6)
+
+
+def test_half_coherences_stored_reference(reference):
+    if "hC_hats" not in reference:
+        pytest.skip("the reference half coherency matrices were not stored")
+    hC_hats, freqs = half_coherences(reference["y"], reference["hC_hats"].shape[-1])
+    assert freqs == pytest.approx(reference["hC_freqs"], abs=1e-6)
+
+    # MLX computes in single precision by default
+    expected = reference["hC_hats"]
+    rtol = 1e-12 if expected.dtype == np.complex128 else 1e-5
+    assert np.allclose(hC_hats, expected, rtol=rtol, atol=rtol)
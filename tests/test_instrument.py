@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from lrv_test import instrument
+from lrv_test.instrument import count, is_profiling, profiling, stage
+from lrv_test.LRV import LRV
+
+
+def test_profiling():
+    spans = []
+    with profiling(spans.append) as outer:
+        with profiling() as inner:
+            with stage("a"):
+                count("n", 2)
+                with stage("b"):
+                    count("n")
+            with stage("a"):
+                count("n", 3)
+
+    assert [span.name for span in spans] == ["b", "a", "a"]
+    assert inner.timings["a"].calls == 2
+    assert inner.timings["a"].counters["n"] == 5
+    assert inner.timings["b"].counters["n"] == 1
+    assert outer.timings.keys() == inner.timings.keys()
+
+
+def test_no_profiling():
+    # nothing is recorded outside of a profiling context
+    assert not is_profiling()
+    assert stage("a") is instrument._NULL_STAGE
+    with stage("a"):
+        count("n")
+
+    spans = []
+    with profiling(spans.append) as profiler:
+        assert profiler.timings == {}
+    assert spans == []
+
+
+def test_LRV_profile():
+    rng = np.random.default_rng(0)
+    y = rng.standard_normal((200, 4)) + 1j * rng.standard_normal((200, 4))
+    f = lambda x: (x - 1) ** 2
+
+    result = LRV(y, 21, f, L=2, profile=True)
+    expected = LRV(y, 21, f, L=2)
+
+    assert expected.timings is None
+    assert result.t_stat_3 == pytest.approx(expected.t_stat_3)
+    assert {"half_coherences", "eigenvalues", "lag_window", "sigma"} <= set(
+        result.timings
+    )
+    assert result.timings["sigma"].counters["contour_integrals"] == 1
+    assert result.timings["half_coherences"].counters["nbytes"] > 0
+    assert result.timings["f_against_mp"].counters["integrand_evaluations"] > 0
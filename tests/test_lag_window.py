@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from lrv_test.lag_window import _compute_autocors, lag_window
+from lrv_test.utils import derivative
+
+
+@pytest.fixture
+def x():
+    rng = np.random.default_rng(0)
+    return rng.standard_normal((200, 3)) + 1j * rng.standard_normal((200, 3))
+
+
+@pytest.mark.parametrize("L", [1, 3, 10])
+def test__compute_autocors(x, L):
+    positive = [np.mean(x[l:, :] * np.conj(x[:-l, :]), axis=0) for l in range(1, L + 1)]
+    expected = np.concatenate(
+        [np.conj(positive[::-1]), [np.mean(np.abs(x) ** 2, axis=0)], positive]
+    )
+    assert _compute_autocors(x, L) == pytest.approx(expected)
+
+
+def test_lag_window_vectorized(x):
+    sd = lag_window(x, 3)
+    freqs = np.array([-0.3, 0, 0.1, 0.25])
+
+    values = sd(freqs)
+    assert values.shape == (4, 3)
+    for freq, value in zip(freqs, values):
+        assert sd(freq) == pytest.approx(value)
+
+
+def test_lag_window_derivative(x):
+    sd = lag_window(x, 3)
+    freqs = np.array([-0.3, 0, 0.1, 0.25])
+    assert sd.derivative(freqs) == pytest.approx(derivative(sd)(freqs), rel=1e-5)
+
+
+def test_lag_window_evaluate(x):
+    freqs = np.array([-0.3, 0, 0.1, 0.25])
+    for sd in [lag_window(x, 3), lag_window(np.stack([x, 2 * x]), 3)]:
+        values, derivatives = sd.evaluate(freqs)
+        assert values == pytest.approx(sd(freqs))
+        assert derivatives == pytest.approx(sd.derivative(freqs))
+
+
+def test_lag_window_single_precision(x):
+    single = lag_window(x, 3, precision="single")
+    assert single.autocors.dtype == np.complex64
+    expected = lag_window(x, 3).autocors
+    assert np.allclose(single.autocors, expected, atol=1e-5 * np.max(np.abs(expected)))
@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+from lrv_test.lss import coherence_eigenvalues
+
+
+@pytest.mark.parametrize(
+    "backend, method, shape",
+    [
+        ("numpy", "svd", (5, 3, 7)),
+        ("numpy", "svd", (5, 7, 3)),
+        ("numpy", "gram", (5, 3, 7)),
+        ("numpy", "gram", (5, 7, 3)),
+        ("jax", "svd", (5, 3, 7)),
+        ("mlx", "svd", (5, 3, 7)),
+    ],
+)
+def test_coherence_eigenvalues(backend, method, shape):
+    rng = np.random.default_rng(0)
+    hC_hats = rng.standard_normal(shape) + 1j * rng.standard_normal(shape)
+
+    λ = coherence_eigenvalues(hC_hats, backend, method)
+
+    # compare with the per frequency computation
+    expected = [np.linalg.svd(hC_hat, compute_uv=False) ** 2 for hC_hat in hC_hats]
+    assert λ.shape == (shape[0], min(shape[1:]))
+    assert np.sort(λ, axis=-1) == pytest.approx(np.sort(expected, axis=-1), rel=1e-4)
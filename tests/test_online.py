@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+from lrv_test.LRV import LRV
+from lrv_test.online import OnlineLRV
+from lrv_test.polynomial import PolynomialTestFunction
+
+
+@pytest.mark.parametrize("refresh_every", [None, 50])
+def test_online_lrv(refresh_every):
+    N, M, B, L = 200, 4, 11, 3
+    f = PolynomialTestFunction.from_roots((1, 1))
+    rng = np.random.default_rng(0)
+    y = rng.standard_normal((N + 130, M)) + 1j * rng.standard_normal((N + 130, M))
+
+    online = OnlineLRV(N, M, B, f, L=L, refresh_every=refresh_every)
+    online.update(y[:150])
+    assert not online.is_ready
+    with pytest.raises(ValueError):
+        online.result()
+
+    # ingest the samples in blocks of various sizes, and one by one
+    online.update(y[150:300])
+    for row in y[300:]:
+        online.update(row)
+
+    result = online.result()
+    expected = LRV(y[-N:], B, f, L=L)
+    assert result.freqs == pytest.approx(expected.freqs)
+    assert result.LSSs == pytest.approx(expected.LSSs)
+    assert result.t_stats_0 == pytest.approx(expected.t_stats_0)
+    for i in range(1, 5):
+        assert getattr(result, f"t_stat_{i}") == pytest.approx(
+            getattr(expected, f"t_stat_{i}")
+        )
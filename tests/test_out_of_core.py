@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+from lrv_test.lag_window import lag_window
+from lrv_test.LRV import LRV
+from lrv_test import out_of_core
+from lrv_test.coherence import default_freqs, dft, fourier_indices
+from lrv_test.out_of_core import (
+    AutocovarianceAccumulator,
+    DFTAccumulator,
+    column_block_dft,
+    is_out_of_core,
+)
+from lrv_test.polynomial import PolynomialTestFunction
+
+
+@pytest.fixture
+def y():
+    rng = np.random.default_rng(0)
+    return rng.standard_normal((300, 4)) + 1j * rng.standard_normal((300, 4))
+
+
+@pytest.mark.parametrize("tile_size", [1, 100, out_of_core.TILE_SIZE])
+def test_dft_accumulator(y, monkeypatch, tile_size):
+    monkeypatch.setattr(out_of_core, "TILE_SIZE", tile_size)
+    indices = np.array([0, 3, 17, 299])
+    accumulator = DFTAccumulator(indices, 300, 4)
+    for start in range(0, 300, 70):
+        accumulator.update(y[start : start + 70])
+
+    expected = np.fft.fft(y, axis=0)[indices] / np.sqrt(300)
+    assert accumulator.xi == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("L, block_size", [(0, 50), (3, 50), (3, 2), (5, 1)])
+def test_autocovariance_accumulator(y, L, block_size):
+    accumulator = AutocovarianceAccumulator(L, 4)
+    for start in range(0, 300, block_size):
+        accumulator.update(y[start : start + block_size])
+
+    assert accumulator.lag_window().autocors == pytest.approx(lag_window(y, L).autocors)
+
+
+def test_LRV_out_of_core(y, tmp_path):
+    B, L = 11, 2
+    f = PolynomialTestFunction.from_roots((1, 1))
+    memmap = np.lib.format.open_memmap(
+        tmp_path / "y.npy", mode="w+", dtype=y.dtype, shape=y.shape
+    )
+    memmap[:] = y
+
+    # the memmap is read by blocks of columns, the loaded array is not
+    expected = LRV(np.array(memmap), B, f, L=L)
+    result = LRV(memmap, B, f, L=L)
+    assert np.array_equal(result.LSSs, expected.LSSs)
+    assert result.thetas == pytest.approx(expected.thetas)
+    assert result.t_stats_0 == pytest.approx(expected.t_stats_0)
+    for i in range(1, 5):
+        assert getattr(result, f"t_stat_{i}") == pytest.approx(
+            getattr(expected, f"t_stat_{i}")
+        )
+
+    blocks = (y[start : start + 64] for start in range(0, 300, 64))
+    result = LRV(blocks, B, f, L=L, n_samples=300)
+    assert result.t_stats_0 == pytest.approx(expected.t_stats_0)
+    assert result.t_stat_3 == pytest.approx(expected.t_stat_3)
+
+
+@pytest.mark.parametrize("block_values", [300, 900, out_of_core.BLOCK_VALUES])
+def test_column_block_dft(y, block_values):
+    indices = fourier_indices(default_freqs(300, 11), 11, 300)
+    xi = column_block_dft(y, indices, block_values=block_values)
+    assert np.array_equal(xi, dft(y)[indices])
+
+
+def test_LRV_out_of_core_sparse_freqs(y, tmp_path):
+    # few Fourier frequencies are accumulated rather than transformed
+    f = PolynomialTestFunction.from_roots((1, 1))
+    freqs = np.array([0.25])
+    np.save(tmp_path / "y.npy", y)
+    memmap = np.load(tmp_path / "y.npy", mmap_mode="r")
+
+    result = LRV(memmap, 5, f, freqs=freqs, L=2)
+    expected = LRV(y, 5, f, freqs=freqs, L=2)
+    assert result.t_stats_0 == pytest.approx(expected.t_stats_0)
+
+
+class InMemoryArray:
+    """Array of another library, with a shape but no chunks"""
+
+    def __init__(self, array):
+        self.array = array
+        self.shape = array.shape
+
+    def __array__(self, dtype=None, copy=None):
+        return self.array
+
+
+def test_is_out_of_core(y, tmp_path):
+    np.save(tmp_path / "y.npy", y)
+    assert is_out_of_core(np.load(tmp_path / "y.npy", mmap_mode="r"))
+    assert is_out_of_core(iter([y]))
+    assert not is_out_of_core(y)
+    assert not is_out_of_core(y.tolist())
+    assert not is_out_of_core(InMemoryArray(y))
+
+
+def test_LRV_streaming_options(y):
+    f = lambda x: (x - 1) ** 2
+    blocks = lambda: (y[start : start + 64] for start in range(0, 300, 64))
+    with pytest.raises(ValueError, match="n_jobs"):
+        LRV(blocks(), 11, f, L=2, n_samples=300, n_jobs=2)
+
+    single = LRV(blocks(), 11, f, L=2, n_samples=300, precision="single")
+    assert single.LSSs.dtype == np.float32
+    assert single.t_stat_3 == pytest.approx(LRV(y, 11, f, L=2).t_stat_3, rel=1e-4)
@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+from lrv_test.LRV import LRV
+from lrv_test.panel import LRV_panel
+from lrv_test.polynomial import PolynomialTestFunction
+
+
+@pytest.mark.parametrize("L", [None, 2])
+def test_LRV_panel(L):
+    P, N, M, B = 7, 300, 4, 11
+    f = PolynomialTestFunction.from_roots((1, 1))
+    rng = np.random.default_rng(0)
+    Y = rng.standard_normal((P, N, M)) + 1j * rng.standard_normal((P, N, M))
+
+    batch = LRV_panel(Y, B, f, L=L, chunk_size=3)
+    assert len(batch) == P
+
+    for p in range(P):
+        expected = LRV(Y[p], B, f, L=L)
+        assert batch[p].thetas == pytest.approx(expected.thetas)
+        assert batch[p].t_stats_0 == pytest.approx(expected.t_stats_0)
+        for i in range(1, 5):
+            assert getattr(batch, f"t_stat_{i}")[p] == pytest.approx(
+                getattr(expected, f"t_stat_{i}")
+            )
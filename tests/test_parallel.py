@@ -0,0 +1,89 @@
+import os
+import sys
+import types
+from contextlib import contextmanager
+
+import numpy as np
+import pytest
+from lrv_test import parallel
+from lrv_test.LRV import LRV
+from lrv_test.lss import compute_LSSs
+from lrv_test.parallel import CHUNK_SIZE, parallel_LSSs
+from lrv_test.polynomial import PolynomialTestFunction
+
+
+@pytest.fixture
+def y():
+    return np.random.default_rng(0).standard_normal((1000, 12))
+
+
+@pytest.mark.parametrize("method", ["svd", "gram", "trace"])
+@pytest.mark.parametrize("chunk_size", [1, 5, 100])
+def test_parallel_LSSs(y, method, chunk_size):
+    f = PolynomialTestFunction([1, -2, 1])
+    expected, expected_freqs = compute_LSSs(y, 21, f, backend="numpy", method=method)
+    LSSs, freqs = parallel_LSSs(
+        y, 21, f, backend="numpy", method=method, n_jobs=4, chunk_size=chunk_size
+    )
+    assert np.array_equal(freqs, expected_freqs)
+    assert np.array_equal(LSSs, expected)
+
+
+def test_LRV_n_jobs(y):
+    f = lambda x: (x - 1) ** 2
+    expected = LRV(y, 21, f, L=3, backend="numpy")
+    result = LRV(y, 21, f, L=3, backend="numpy", n_jobs=-1)
+    assert np.array_equal(result.thetas, expected.thetas)
+    assert result.t_stat_3 == expected.t_stat_3
+
+
+@pytest.mark.parametrize("n_jobs", [0, -2])
+def test_LRV_invalid_n_jobs(y, n_jobs):
+    with pytest.raises(ValueError, match="n_jobs"):
+        LRV(y, 21, lambda x: (x - 1) ** 2, n_jobs=n_jobs)
+
+
+def test_LRV_n_jobs_profile(y):
+    f = lambda x: (x - 1) ** 2
+    expected = LRV(y, 21, f, backend="numpy", profile=True)
+    result = LRV(y, 21, f, backend="numpy", n_jobs=4, profile=True)
+
+    # the stages of the worker threads are recorded, once per chunk
+    n_chunks = len(range(0, len(result.freqs), CHUNK_SIZE))
+    assert result.timings["eigenvalues"].calls == n_chunks
+    assert expected.timings["eigenvalues"].calls == 1
+    assert "parallel_LSSs" in result.timings
+
+
+def test_parallel_LSSs_mlx_serial(y, monkeypatch):
+    calls = []
+
+    def compute_LSSs(*args):
+        calls.append(args)
+        return np.zeros(0), np.zeros(0)
+
+    monkeypatch.setattr(parallel, "compute_LSSs", compute_LSSs)
+    parallel_LSSs(y, 21, np.log1p, backend="mlx", n_jobs=4)
+    assert len(calls) == 1
+
+
+def test_blas_limits(monkeypatch):
+    limits = []
+
+    @contextmanager
+    def threadpool_limits(n_threads, api):
+        limits.append(n_threads)
+        yield
+
+    threadpoolctl = types.ModuleType("threadpoolctl")
+    threadpoolctl.threadpool_limits = threadpool_limits
+    monkeypatch.setitem(sys.modules, "threadpoolctl", threadpoolctl)
+
+    # a concurrent evaluation does not set the process-wide limits again
+    with parallel._blas_limits(2):
+        with parallel._blas_limits(4):
+            pass
+    with parallel._blas_limits(4):
+        pass
+    n_cpus = os.cpu_count() or 1
+    assert limits == [max(1, n_cpus // 2), max(1, n_cpus // 4)]
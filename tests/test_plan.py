@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+from lrv_test.plan import clear_cache, prepare
+
+
+def test_prepare_memoizes():
+    clear_cache()
+    n_calls = 0
+
+    def f(x):
+        nonlocal n_calls
+        n_calls += 1
+        return x**2
+
+    plan = prepare(f, 10, 20)
+    assert n_calls > 0
+    assert plan.sigma == pytest.approx(np.sqrt(2) / 2, rel=1e-6)
+
+    # same c, different shape: the constants are reused without evaluating f
+    n_calls_before = n_calls
+    other_plan = prepare(f, 20, 40)
+    assert n_calls == n_calls_before
+    assert (other_plan.M, other_plan.B) == (20, 40)
+    assert other_plan.sigma == plan.sigma
+
+    # another c is computed
+    prepare(f, 10, 30)
+    assert n_calls > n_calls_before
+
+
+def test_prepare_disk_cache(tmp_path):
+    clear_cache()
+    plan = prepare(lambda x: x**2, 10, 20, spec="x ** 2", cache_dir=tmp_path)
+    assert len(list(tmp_path.iterdir())) == 1
+
+    # a different function object with the same spec is read from the disk
+    clear_cache()
+    cached_plan = prepare(lambda x: 0, 10, 20, spec="x ** 2", cache_dir=tmp_path)
+    assert cached_plan.f_against_mp == plan.f_against_mp
+    assert cached_plan.f_against_D == plan.f_against_D
+    assert cached_plan.sigma == plan.sigma
+
+
+def test_prepare_disk_cache_requires_spec(tmp_path):
+    with pytest.raises(ValueError):
+        prepare(lambda x: x**2, 10, 20, cache_dir=tmp_path)
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from lrv_test.constants import compute_f_against_D, compute_f_against_mp
+from lrv_test.polynomial import PolynomialTestFunction, mp_moments
+from lrv_test.sigma import compute_sigma
+
+
+@pytest.mark.parametrize(
+    "c, expected",
+    [
+        (1 / 2, [1, 1, 3 / 2, 11 / 4]),
+        (2, [1 / 2, 1, 3, 11]),
+    ],
+)
+def test_mp_moments(c, expected):
+    assert mp_moments(3, c) == pytest.approx(expected)
+
+
+def test_from_roots():
+    f = PolynomialTestFunction.from_roots((1, 1))
+    assert f.coefficients == (1, -2, 1)
+    assert f(np.array([0, 1, 3])) == pytest.approx([1, 0, 4])
+
+
+@pytest.mark.parametrize(
+    "coefficients",
+    [
+        (0, 0, 1),
+        (1, -2, 1),
+        (0, 1, 0, 1),
+        (2, 0, -1, 0, 0.5),
+    ],
+)
+@pytest.mark.parametrize("c", [0.3, 1 / 2, 0.9])
+def test_closed_forms_against_quadrature(coefficients, c):
+    f = PolynomialTestFunction(coefficients)
+    g = lambda x: f(x)  # hides the polynomial structure, uses the numerical path
+
+    assert compute_f_against_mp(f, c, 1e-6) == pytest.approx(
+        compute_f_against_mp(g, c, 1e-6), rel=1e-6
+    )
+    assert compute_f_against_D(f, c, 1e-6) == pytest.approx(
+        compute_f_against_D(g, c, 1e-6), rel=1e-6
+    )
+    assert compute_sigma(f, c, 1e-6) == pytest.approx(
+        compute_sigma(g, c, 1e-6), rel=1e-4
+    )
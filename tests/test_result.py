@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+from lrv_test.result import LRVResult, is_positive, p_values, reject
+
+
+def make_result(t_stat_1, t_stat_2, t_stat_3, t_stat_4, n_freqs=10):
+    freqs = np.linspace(0, 0.5, n_freqs)
+    zeros = np.zeros(n_freqs)
+    return LRVResult(
+        100,
+        5,
+        11,
+        freqs,
+        zeros,
+        0.1,
+        zeros,
+        1,
+        0,
+        zeros,
+        t_stat_1,
+        t_stat_2,
+        t_stat_3,
+        t_stat_4,
+    )
+
+
+@pytest.mark.parametrize(
+    "test_stat, distribution, alternative, level, df, expected",
+    [
+        (2.0, "normal", "double", 0.05, None, True),
+        (-2.0, "normal", "double", 0.05, None, True),
+        (1.9, "normal", "double", 0.05, None, False),
+        (1.9, "normal", "right", 0.05, None, True),
+        (-1.9, "normal", "left", 0.05, None, True),
+        (18.4, "chi2", "right", 0.05, 10, True),
+        (18.2, "chi2", "right", 0.05, 10, False),
+        (3.0, "gumbel", "right", 0.05, None, True),
+    ],
+)
+def test_is_positive(test_stat, distribution, alternative, level, df, expected):
+    assert is_positive(test_stat, distribution, alternative, level, df) == expected
+
+
+def test_reject():
+    results = [
+        make_result(0.1, 0.1, 5.0, 0.0),
+        make_result(2.2, -2.2, 25.0, 4.0, n_freqs=20),
+        make_result(-3.0, 1.0, 40.0, 1.0, n_freqs=20),
+    ]
+    levels = [0.01, 0.05, 0.1, 0.5]
+
+    decisions = reject(results, levels)
+    assert decisions.shape == (3, 4, 4)
+    for i, result in enumerate(results):
+        for k, level in enumerate(levels):
+            expected = [
+                result.is_positive_1(level),
+                result.is_positive_2(level),
+                result.is_positive_3(level),
+                result.is_positive_4(level),
+            ]
+            assert list(decisions[i, :, k]) == expected
+
+    # the decisions are consistent with the p-values
+    p = p_values(results)
+    assert (decisions == (p[:, :, np.newaxis] < np.array(levels))).all()
+
+
+def test_reject_columnar():
+    results = [make_result(0.1, 0.1, 5.0, 0.0), make_result(2.2, -2.2, 25.0, 4.0)]
+    columns = {
+        f"t_stat_{i}": [getattr(r, f"t_stat_{i}") for r in results] for i in range(1, 5)
+    }
+    columns["n_freqs"] = [10, 10]
+
+    levels = [0.05, 0.1]
+    assert (reject(columns, levels) == reject(results, levels)).all()
+    assert reject(columns, levels, statistics=[1], alternatives={1: "left"}).shape == (
+        2,
+        1,
+        2,
+    )
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from lrv_test.coherence import default_freqs
+from lrv_test.LRV import LRV
+from lrv_test.polynomial import PolynomialTestFunction
+from lrv_test.screen import _coarse_to_fine_order, screen
+
+
+@pytest.mark.parametrize(
+    "n_freqs, expected",
+    [
+        (1, [0]),
+        (5, [0, 4, 2, 1, 3]),
+        (8, [0, 4, 2, 6, 1, 3, 5, 7]),
+    ],
+)
+def test__coarse_to_fine_order(n_freqs, expected):
+    assert list(_coarse_to_fine_order(n_freqs)) == expected
+
+
+@pytest.fixture
+def f():
+    return PolynomialTestFunction.from_roots((1, 1))
+
+
+@pytest.mark.parametrize("statistic", [3, 4])
+@pytest.mark.parametrize("freqs", [None, default_freqs(1000, 21)[::3]])
+def test_screen_negative(f, statistic, freqs):
+    rng = np.random.default_rng(0)
+    y = rng.standard_normal((1000, 5)) + 1j * rng.standard_normal((1000, 5))
+
+    # on independent series, the whole grid is evaluated and gives the full test
+    result = screen(y, 21, f, 1e-6, statistic, freqs=freqs, L=2)
+    expected = LRV(y, 21, f, freqs=freqs, L=2)
+    assert result.freqs == pytest.approx(expected.freqs)
+    assert result.n_freqs_evaluated == result.n_freqs_total == len(expected.freqs)
+    assert result.t_stats_0 == pytest.approx(expected.t_stats_0)
+    assert result.t_stat_3 == pytest.approx(expected.t_stat_3)
+    assert result.t_stat_4 == pytest.approx(expected.t_stat_4)
+
+
+@pytest.mark.parametrize("statistic", [3, 4])
+def test_screen_positive(f, statistic):
+    rng = np.random.default_rng(0)
+    x = rng.standard_normal((1000, 1)) + 1j * rng.standard_normal((1000, 1))
+    y = x + 0.1 * rng.standard_normal((1000, 5))
+
+    # strongly dependent series are detected on the coarse frequencies
+    result = screen(y, 21, f, 0.05, statistic, L=2)
+    assert result.n_freqs_evaluated == 8
+    assert getattr(result, f"is_positive_{statistic}")(0.05)
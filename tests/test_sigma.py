@@ -13,3 +13,11 @@ from lrv_test.sigma import compute_sigma
 def test_compute_sigma(f, c, tolerance, expected_sigma):
     sigma = compute_sigma(f, c, tolerance)
     assert sigma == pytest.approx(expected_sigma, rel=tolerance)
+
+
+@pytest.mark.filterwarnings("error::RuntimeWarning")
+@pytest.mark.parametrize("c", [0.01, 0.05, 0.1])
+def test_compute_sigma_small_c(c):
+    # the integrands are large on the contour, the integrals must still converge
+    sigma = compute_sigma(lambda x: (x - 1) ** 2, c, 1e-10)
+    assert sigma == pytest.approx(np.sqrt(2) * c, rel=1e-10)
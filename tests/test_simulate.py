@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+from lrv_test.polynomial import PolynomialTestFunction
+from lrv_test.simulate import load_simulations, simulate
+
+pytest.importorskip("pyarrow")
+
+
+def complex_gaussian(rng, N, M):
+    return rng.standard_normal((N, M)) + 1j * rng.standard_normal((N, M))
+
+
+@pytest.fixture
+def simulation_kwargs(tmp_path):
+    return dict(
+        generator=complex_gaussian,
+        grid=[(400, 5, 21, 2), (400, 5, 21, None)],
+        n_replicates=5,
+        f=PolynomialTestFunction.from_roots((1, 1)),
+        output_dir=tmp_path,
+        chunk_size=2,
+    )
+
+
+def test_simulate(simulation_kwargs):
+    rates = simulate(**simulation_kwargs)
+
+    assert [(rate["N"], rate["L"]) for rate in rates] == [(400, 2), (400, None)]
+    table = load_simulations(simulation_kwargs["output_dir"])
+    assert table.num_rows == 10
+    for rate in rates:
+        for i in range(5):
+            assert 0 <= rate[f"is_positive_{i}"] <= 1
+
+
+def test_simulate_n_jobs(simulation_kwargs, tmp_path):
+    rates = simulate(**simulation_kwargs)
+    t_stats = load_simulations(simulation_kwargs["output_dir"])["t_stat_3"]
+
+    # the replicates do not depend on the number of workers
+    output_dir = tmp_path / "n_jobs"
+    kwargs = simulation_kwargs | {"output_dir": output_dir, "n_jobs": 2}
+    assert simulate(**kwargs) == rates
+    other_t_stats = load_simulations(output_dir)["t_stat_3"]
+    assert np.array(other_t_stats) == pytest.approx(np.array(t_stats))
+
+
+@pytest.mark.parametrize("n_jobs", [0, -2])
+def test_simulate_invalid_n_jobs(simulation_kwargs, n_jobs):
+    with pytest.raises(ValueError, match="n_jobs"):
+        simulate(**(simulation_kwargs | {"n_jobs": n_jobs}))
+
+
+def test_simulate_resume(simulation_kwargs):
+    rates = simulate(**simulation_kwargs)
+    t_stats = load_simulations(simulation_kwargs["output_dir"])["t_stat_3"]
+
+    # remove a chunk, it is recomputed identically
+    path = sorted(simulation_kwargs["output_dir"].glob("*.parquet"))[1]
+    path.unlink()
+    assert simulate(**simulation_kwargs) == rates
+    resumed_t_stats = load_simulations(simulation_kwargs["output_dir"])["t_stat_3"]
+    assert np.array(resumed_t_stats) == pytest.approx(np.array(t_stats))
+
+
+def real_gaussian(rng, N, M):
+    return rng.standard_normal((N, M))
+
+
+@pytest.mark.parametrize(
+    "changes",
+    [
+        {"seed": 1},
+        {"f": PolynomialTestFunction.from_roots((1, 2))},
+        {"freqs": np.array([0.1, 0.2])},
+        {"tolerance": 1e-8},
+        {"generator": real_gaussian},
+    ],
+)
+def test_simulate_rejects_other_config(simulation_kwargs, changes):
+    simulate(**simulation_kwargs)
+    with pytest.raises(ValueError, match="another configuration"):
+        simulate(**(simulation_kwargs | changes))
+
+
+def test_simulate_requires_spec(simulation_kwargs):
+    f = lambda x: (x - 1) ** 2
+    with pytest.raises(ValueError, match="spec"):
+        simulate(**(simulation_kwargs | {"f": f}))
+    simulate(**(simulation_kwargs | {"f": f, "spec": "(x - 1) ** 2"}))
@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+from lrv_test.LRV import LRV
+from lrv_test.sweep import sweep
+
+
+def test_sweep():
+    rng = np.random.default_rng(0)
+    y = rng.standard_normal((400, 5)) + 1j * rng.standard_normal((400, 5))
+    f = lambda x: (x - 1) ** 2
+
+    swept = sweep(y, [11, 21, 31], [None, 2, 4], f)
+    assert set(swept.plans) == {11, 21, 31}
+    assert len(swept.results) == 9
+
+    for (B, L), result in swept.results.items():
+        expected = LRV(y, B, f, L=L, backend="numpy")
+        assert result.freqs == pytest.approx(expected.freqs)
+        assert result.thetas == pytest.approx(expected.thetas)
+        assert result.t_stat_3 == pytest.approx(expected.t_stat_3)
+        assert swept.plans[B].f_against_mp == pytest.approx(expected.f_mp)
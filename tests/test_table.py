@@ -0,0 +1,78 @@
+import warnings
+
+import numpy as np
+import pytest
+from lrv_test import plan
+from lrv_test.polynomial import PolynomialTestFunction
+from lrv_test.table import ConstantTable, build_table, clear_tables, register_table
+
+SPEC = "(x - 1) ** 2"
+
+
+@pytest.fixture(scope="module")
+def table():
+    return build_table(lambda x: (x - 1) ** 2, (0.1, 0.6), spec=SPEC, degree=12)
+
+
+@pytest.fixture
+def registered(table):
+    plan.clear_cache()
+    register_table(table)
+    yield table
+    clear_tables()
+    plan.clear_cache()
+
+
+@pytest.mark.parametrize("c_range", [(0.1, 0.6), (1.5, 4)])
+def test_build_table(table, c_range):
+    if c_range != table.c_range:
+        table = build_table(lambda x: (x - 1) ** 2, c_range, spec=SPEC, degree=16)
+
+    # the closed forms of the polynomial are the exact constants
+    polynomial = PolynomialTestFunction.from_roots((1, 1))
+    for c in np.linspace(*c_range, 21):
+        expected = [polynomial.against_mp(c), polynomial.against_D(c)]
+        expected.append(polynomial.sigma(c))
+        assert np.all(np.abs(np.array(table(c)) - expected) <= table.error_bounds)
+    assert np.all(table.error_bounds < 1e-8)
+
+
+@pytest.mark.parametrize("c_range", [(0.5, 1), (0.5, 2), (1, 2), (0, 0.5), (2, 1.5)])
+def test_build_table_range(c_range):
+    with pytest.raises(ValueError, match="range"):
+        build_table(lambda x: (x - 1) ** 2, c_range, spec=SPEC)
+
+
+def test_build_table_not_converged(monkeypatch):
+    def warn(*args):
+        warnings.warn("The integral did not converge", RuntimeWarning)
+        return (0.0, 0.0, 1.0)
+
+    monkeypatch.setattr(plan, "_compute_constants", warn)
+    with pytest.raises(RuntimeWarning):
+        build_table(lambda x: (x - 1) ** 2, (0.1, 0.6), spec=SPEC, degree=4)
+
+
+def test_table_save_load(table, tmp_path):
+    table.save(tmp_path / "table.json")
+    loaded = ConstantTable.load(tmp_path / "table.json")
+    assert loaded.key == table.key and loaded.c_range == table.c_range
+    assert loaded(0.3) == table(0.3)
+
+
+def test_prepare_from_table(registered, monkeypatch):
+    f = lambda x: (x - 1) ** 2
+    expected = plan.prepare(f, 35, 40, spec=SPEC)  # c outside of the table
+
+    def fail(*args):
+        raise AssertionError("the constants should be interpolated")
+
+    monkeypatch.setattr(plan, "_compute_constants", fail)
+    interpolated = plan.prepare(f, 10, 40, spec=SPEC)
+    assert interpolated.sigma == registered(0.25)[2]
+    # a tolerance below the error bounds, or another spec, is computed directly
+    with pytest.raises(AssertionError):
+        plan.prepare(f, 10, 40, tolerance=1e-14, spec=SPEC)
+    with pytest.raises(AssertionError):
+        plan.prepare(f, 10, 40, spec="x ** 2")
+    assert plan.prepare(f, 35, 40, spec=SPEC) == expected
@@ -0,0 +1,85 @@
+import importlib
+
+import numpy as np
+import pytest
+from lrv_test.LRV import LRV
+from lrv_test.lss import coherence_eigenvalues, coherence_LSSs
+from lrv_test.polynomial import PolynomialTestFunction
+from lrv_test import trace
+from lrv_test.trace import power_traces, trace_LSSs
+
+
+def _hC_hats(shape, seed=0):
+    rng = np.random.default_rng(seed)
+    return (rng.standard_normal(shape) + 1j * rng.standard_normal(shape)) / np.sqrt(
+        2 * shape[-1]
+    )
+
+
+@pytest.mark.parametrize("shape", [(4, 6, 9), (4, 9, 6), (2, 3, 5, 5)])
+def test_power_traces(shape):
+    hC_hats = _hC_hats(shape)
+    λ = coherence_eigenvalues(hC_hats)
+
+    traces = power_traces(hC_hats, 5)
+    expected = np.stack([np.sum(λ**k, axis=-1) for k in range(6)], axis=-1)
+    assert traces == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("shape", [(4, 6, 9), (4, 9, 6)])
+def test_trace_LSSs_polynomial(shape):
+    hC_hats = _hC_hats(shape)
+    f = PolynomialTestFunction.from_roots((1, 1, 2))
+
+    expected = coherence_LSSs(hC_hats, f)
+    LSSs = coherence_LSSs(hC_hats, f, method="trace")
+    assert LSSs == pytest.approx(expected, abs=1e-12)
+
+
+def test_trace_LSSs_stochastic(monkeypatch):
+    hC_hats = _hC_hats((3, 60, 80))
+    f = lambda x: np.log(1 + x)
+    expected = coherence_LSSs(hC_hats, f)
+
+    def fail(*args):
+        raise AssertionError("the LSSs should be estimated")
+
+    # 60 // 4 = 15 probes are cheaper than the eigenvalues
+    monkeypatch.setattr(trace, "_exact_LSSs", fail)
+    LSSs = trace_LSSs(hC_hats, f, tolerance=2e-2, n_steps=4, n_probes=4)
+    assert LSSs == pytest.approx(expected, abs=5e-2)
+
+
+@pytest.mark.parametrize("n_steps, n_probes", [(4, 4), (20, 16)])
+def test_trace_LSSs_exact_fallback(n_steps, n_probes):
+    # an unreachable tolerance within the budget of probes, or a budget below a
+    # single round of probes, gives the exact LSSs
+    hC_hats = _hC_hats((3, 60, 80))
+    f = lambda x: np.log(1 + x)
+
+    expected = coherence_LSSs(hC_hats, f)
+    LSSs = trace_LSSs(hC_hats, f, 1e-8, n_steps=n_steps, n_probes=n_probes)
+    assert LSSs == pytest.approx(expected, abs=1e-12)
+
+
+def test_LRV_trace_tolerance(monkeypatch):
+    # lrv_test.LRV is the function, the module is imported by name
+    LRV_module = importlib.import_module("lrv_test.LRV")
+    compute_LSSs = LRV_module.parallel_LSSs
+    tolerances = []
+
+    def parallel_LSSs(*args, trace_tolerance, **kwargs):
+        tolerances.append(trace_tolerance)
+        return compute_LSSs(*args, trace_tolerance=trace_tolerance, **kwargs)
+
+    monkeypatch.setattr(LRV_module, "parallel_LSSs", parallel_LSSs)
+    y = np.random.default_rng(0).standard_normal((500, 10))
+    f = lambda x: np.log(1 + x)
+    expected = LRV(y, 21, f)
+    sigma = 10 * expected.thetas[0] / expected.t_stats_0[0]
+    tolerances.clear()
+    result = LRV(y, 21, f, method="trace", trace_tolerance=0.5)
+
+    assert tolerances == [pytest.approx(0.5 * sigma / 10)]
+    # M is too small for the stochastic estimation, the exact eigenvalues are used
+    assert result.t_stats_0 == pytest.approx(expected.t_stats_0)
@@ -3,7 +3,13 @@ import numpy as np
 import pytest
 from lrv_test.contour import Contour
 from lrv_test.functions import support_MP, t
-from lrv_test.utils import action_D_on_f, contour_integral, derivative
+from lrv_test.utils import (
+    action_D_on_f,
+    action_D_on_f_gauss_jacobi,
+    contour_integral,
+    contour_integral_trapezoidal,
+    derivative,
+)
 
 
 @pytest.mark.parametrize(
@@ -39,3 +45,66 @@ def p(f, c, expected):
 def test_contour_integral(integrand, center, radius, expected):
     contour = Contour.from_circle_parameters(center, radius)
     assert contour_integral(integrand, contour) == pytest.approx(expected, rel=1e-3)
+
+
+@pytest.mark.parametrize(
+    "integrand, center, radius, expected",
+    [
+        (lambda z: z, 0, 1, 0),
+        (lambda z: z**2, 0, 1, 0),
+        (lambda z: 1 / z, 0, 1, -2 * np.pi * 1j),
+        (lambda z: np.exp(z) / z, 0, 2, -2 * np.pi * 1j),
+        (lambda z: 1 / (z - 0.5), 0, 1, -2 * np.pi * 1j),
+    ],
+)
+def test_contour_integral_trapezoidal(integrand, center, radius, expected):
+    contour = Contour.from_circle_parameters(center, radius)
+    value = contour_integral_trapezoidal(integrand, contour)
+    assert value == pytest.approx(expected, abs=1e-8)
+
+
+def test_contour_integral_trapezoidal_batched():
+    contour = Contour.from_circle_parameters(0, 1)
+    n = np.arange(4)[:, np.newaxis]
+    values = contour_integral_trapezoidal(lambda z: 1 / z ** (n + 1), contour)
+    assert values == pytest.approx([-2 * np.pi * 1j, 0, 0, 0], abs=1e-8)
+
+
+@pytest.mark.parametrize("c", [0.3, 1, 2])
+@pytest.mark.parametrize("f", [lambda x: x**3, lambda x: np.log(1 + x)])
+def test_action_D_on_f_gauss_jacobi(f, c):
+    g = lambda z: t(z, c)
+    expected = action_D_on_f(f, g, support_MP(c), 1e-6)
+    value = action_D_on_f_gauss_jacobi(f, g, support_MP(c), 1e-6)
+    assert value == pytest.approx(expected, abs=1e-8)
+
+
+@pytest.mark.filterwarnings("error::RuntimeWarning")
+@pytest.mark.parametrize(
+    "f, c, expected",
+    [
+        # f singular at the hard edge: the Gauss-Jacobi rule falls back to quad
+        (np.log, 1, -1),
+        (np.sqrt, 1, 8 / (3 * np.pi)),
+        (np.log, 0.99, None),
+    ],
+)
+def test_action_D_on_f_gauss_jacobi_hard_edge(f, c, expected):
+    g = lambda z: t(z, c)
+    if expected is None:
+        expected = action_D_on_f(f, g, support_MP(c), 1e-6)
+    value = action_D_on_f_gauss_jacobi(f, g, support_MP(c), 1e-6)
+    assert value == pytest.approx(expected, abs=1e-8)
+
+
+def test_t_vectorized():
+    c = 0.5
+    low, high = support_MP(c)
+    x = np.linspace(low, high, 12)[1:-1].reshape(2, 5)
+    values = t(x + 1e-20j, c)
+    assert values.shape == x.shape
+
+    # on the support, t is (x - 1 + c) / (2 c x) + i pi density(x)
+    density = np.sqrt((high - x) * (x - low)) / (2 * np.pi * c * x)
+    expected = (x - 1 + c) / (2 * c * x) + 1j * np.pi * density
+    assert values == pytest.approx(expected)